@@ -4,12 +4,19 @@ import streamlit as st
 import to_Lean as toLean
 import samples
 
+@st.cache_resource
+def get_compile_cache():
+    """再実行(rerun)をまたいで共有する変換結果キャッシュ"""
+    return toLean.CompileCache()
+
 # --- 描画ロジックの分離 ---
 def render_lean_view(code_input):
     st.subheader("Lean 4 View")
     try:
         # 変換ロジック呼び出し（UI非依存）
-        final_code, warnings = toLean.compile_python_to_lean(code_input)
+        # 編集のたびに変更された宣言だけを再変換する
+        cache = get_compile_cache()
+        final_code, warnings = st.session_state.compile_session.compile(code_input, cache=cache)
 
         st.code(final_code, language="lean")
 
@@ -22,6 +29,9 @@ def render_lean_view(code_input):
         # 注釈があれば表示
         if st.session_state.annotation:
             st.info(st.session_state.annotation)
+
+        stats = cache.stats()
+        st.caption(f"キャッシュ: ヒット {stats['memory_hits'] + stats['disk_hits']} / ミス {stats['misses']}")
         
     except ValueError as e:
         st.warning(str(e))
@@ -35,6 +45,8 @@ st.caption("PythonをLean 4へリアルタイム変換")
 # セッション状態で入力コードを管理
 if 'annotation' not in st.session_state:
     st.session_state.annotation = ""
+if 'compile_session' not in st.session_state:
+    st.session_state.compile_session = toLean.IncrementalSession()
 
 # サイドバーにサンプルボタンを配置
 st.sidebar.header("サンプル選択")
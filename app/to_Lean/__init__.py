@@ -1,18 +1,124 @@
 import ast
+import threading
 from . import translator
+from .cache import CompileCache, VerificationCache
+from .incremental import IncrementalSession
+from .project import LeanProject, write_project
+from .verify import LeanVerifier, verify_python
+from .prover import TacticPortfolio, TacticStore, prove_python
+from .translator.context import TranslationContext
+from .translator import obligations
 
-def compile_python_to_lean(code: str):
+def compile_python_to_lean(code: str, cache=None, preamble=None, pool_threshold=None):
     """
     Pythonソースコードを受け取り、Lean 4コードと警告リストを返すメインエントリポイント。
+    cache に CompileCache を渡すと、同一ソースの再変換を省略する。
+    preamble="inline" では使うヘルパー (py_div など) の定義を、"import" では共有プレリュード
+    (PyLean/Prelude.lean, preamble.write_prelude で生成) の import を先頭に置く。
+    pool_threshold を指定すると、その回数以上現れる小数リテラルを共有の Rat 定義にまとめる (translator/pool.py)。
     """
+    if cache is None:
+        return _compile(code, preamble, pool_threshold)
+    key = cache.make_key(code, _cache_options(preamble, pool_threshold))
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+    lean_code, warnings = _compile(code, preamble, pool_threshold)
+    cache.put(key, lean_code, warnings)
+    return lean_code, warnings
+
+_sessions = threading.local()
+
+def _cache_options(preamble, pool_threshold):
+    """CompileCache のキーに含める翻訳オプション（既定値のものは含めない）"""
+    options = {}
+    if preamble:
+        options["preamble"] = preamble
+    if pool_threshold:
+        options["pool_threshold"] = pool_threshold
+    return options or None
+
+def _compile(code, preamble=None, pool_threshold=None):
+    """キャッシュを介さずに解析と変換を行う"""
+    return _session(preamble, pool_threshold).compile(code)
+
+def _session(preamble, pool_threshold=None):
+    """スレッドごと・(preamble, pool_threshold) の組ごとに再利用する TranslatorSession"""
+    sessions = getattr(_sessions, "by_options", None)
+    if sessions is None:
+        sessions = _sessions.by_options = {}
+    session = sessions.get((preamble, pool_threshold))
+    if session is None:
+        session = sessions[preamble, pool_threshold] = translator.TranslatorSession(
+            preamble=preamble, pool_threshold=pool_threshold)
+    return session
+
+def compile_python_to_lean_with_obligations(code: str, preamble=None, pool_threshold=None):
+    """
+    compile_python_to_lean と同じ変換を行い、(Leanコード, 警告リスト, 証明責務のマニフェスト) を返す。
+    マニフェストは (by sorry) などの証明責務を、内容から決まる安定した ID とソース上の位置とともに列挙する。
+    キャッシュは使わない。
+    """
+    session = _session(preamble, pool_threshold)
+    lean_code, warnings = session.compile(code)
+    return lean_code, warnings, obligations.manifest(session.context.obligation_list())
+
+def iter_compile_python_to_lean(code: str, preamble=None, pool_threshold=None):
+    """
+    Pythonソースコードを宣言単位で変換し、(宣言名, Leanコード, その宣言の警告リスト) を順に返すジェネレータ。
+    全体の結合を待たずに、先頭の宣言から描画や検証を始められる。
+    宣言は依存先が先に来る順に返す。相互再帰の mutual ブロックでは宣言名はメンバー名のタプルとなる。
+    宣言名は関数・クラス以外の文と、先頭の定数プールの定義では None となる。
+    出力を伴わない末尾の文の警告は、Leanコードが空のチャンクとして最後に返す。
+    preamble="inline" では、使うヘルパーが決まるまで（全宣言の変換後まで）最初のチャンクを返さない。
+    """
+    return _iter_compile(code, TranslationContext(preamble=preamble, pool_threshold=pool_threshold))
+
+def _iter_compile(code, context):
+    try:
+        tree = translator.parse_module(code)
+        context, stmt_warnings = translator.analyze_declarations(tree, context)
+    except Exception as e:
+        yield None, f"-- Error during translation: {str(e)}", [str(e)]
+        return
+    # 出力のない文 (import 等) の警告は次に返す宣言にまとめて渡す
+    positions = {id(stmt): i for i, stmt in enumerate(tree.body)}
+    pending = []
     try:
-        tree = ast.parse(code)
-        context = translator.analyze(tree)
-        lean_code = translator.translate_to_lean(tree, context)
-        return lean_code, context.warnings
+        for stmts, lean_code in translator.iter_declaration_groups(tree, context):
+            for stmt in stmts:
+                pending.extend(stmt_warnings[positions[id(stmt)]])
+            if not lean_code:
+                continue
+            names = [getattr(stmt, "name", None) for stmt in stmts]
+            name = tuple(names) if len(names) > 1 else names[0] if names else None
+            yield name, lean_code, pending
+            pending = []
     except Exception as e:
-        # パースエラー等の致命的なエラー時のハンドリング
-        return f"-- Error during translation: {str(e)}", [str(e)]
+        yield None, f"-- Error during translation: {str(e)}", [str(e)]
+        return
+    if pending:
+        yield None, "", pending
+
+def compile_python_to_lean_file(code: str, path, preamble=None, manifest=False, pool_threshold=None):
+    """
+    変換結果を宣言ごとに逐次ファイルへ書き出し、警告リストを返す。
+    書き出される内容は compile_python_to_lean の Leanコードと同一。
+    manifest=True では、証明責務のマニフェストを隣のファイル (x.lean -> x.obligations.json) に書き出す。
+    """
+    warnings = []
+    context = TranslationContext(preamble=preamble, pool_threshold=pool_threshold)
+    with open(path, "w", encoding="utf-8") as f:
+        for _, lean_code, decl_warnings in _iter_compile(code, context):
+            warnings.extend(decl_warnings)
+            if not lean_code:
+                continue
+            if f.tell():
+                f.write("\n\n")
+            f.write(lean_code)
+    if manifest:
+        obligations.write_manifest(obligations.manifest_path(str(path)), context.obligation_list())
+    return warnings
 
 def analyze(node):
     """下位互換性のために維持: ASTの解析を行う"""
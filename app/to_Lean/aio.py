@@ -0,0 +1,209 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class TranslationResult:
+    """非同期変換の結果。status は "ok" / "timeout" / "error" のいずれか"""
+    __slots__ = ("status", "lean_code", "warnings", "elapsed", "error")
+
+    def __init__(self, status, lean_code=None, warnings=None, elapsed=0.0, error=None):
+        self.status = status
+        self.lean_code = lean_code
+        self.warnings = warnings or []
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+    def __repr__(self):
+        return f"TranslationResult(status={self.status!r}, elapsed={self.elapsed:.3f}, error={self.error!r})"
+
+class _Worker:
+    """
+    変換を実行する子プロセス1つ分。タイムアウト時は終了させて作り直す。
+    子プロセスが翻訳器を読み込み終えるまで待ってから返す（起動できなければ EOFError / OSError）。
+    """
+    def __init__(self, mp_context):
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        try:
+            self.conn.recv()
+        except (EOFError, OSError):
+            self.kill()
+            raise
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+def _worker_main(conn):
+    """子プロセスのループ: 準備ができたことを知らせた後、(メソッド, コード) を受け取り、結果を送り返す"""
+    from . import compile_python_to_lean, translator
+    conn.send(("ready", None))
+    while True:
+        try:
+            method, code = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            if method == "compile":
+                lean_code, warnings = compile_python_to_lean(code)
+                conn.send(("ok", (lean_code, list(warnings))))
+            else:
+                context = translator.analyze(translator.parse_module(code))
+                conn.send(("ok", (None, list(context.warnings))))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+class AsyncTranslator:
+    """
+    asyncio から使う変換 API。変換は管理下のワーカープロセスで実行し、イベントループを塞がない。
+
+    役割:
+    - 同時実行数の上限 (max_concurrency) をセマフォで制御する。
+    - リクエストごとの期限を超えた変換は status="timeout" の結果として返す。期限には空きの待ち時間と
+      変換の時間を含め、ワーカープロセスの起動（翻訳器の読み込みまで）にかかった時間は含めない。
+    - タイムアウトや取り消し (CancelledError) の際は担当ワーカーを終了させ、実際に CPU を解放する。
+    - 待機中・使用中のワーカーの集合はスレッドから操作するため、ロックで保護する。
+
+    使用例:
+        async with AsyncTranslator(max_concurrency=4, timeout=2.0) as t:
+            result = await t.compile(code)
+    """
+    def __init__(self, max_concurrency=4, timeout=None, mp_context=None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._mp = mp_context or multiprocessing.get_context("spawn")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._threads = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="to_Lean-aio")
+        self._idle = []
+        self._busy = set()
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.restarts = 0
+
+    async def compile(self, code, timeout=None):
+        """compile_python_to_lean の非同期版"""
+        return await self._call("compile", code, timeout)
+
+    async def analyze(self, code, timeout=None):
+        """analyze の非同期版。警告リストのみを返す (lean_code は None)"""
+        return await self._call("analyze", code, timeout)
+
+    async def aclose(self):
+        """すべてのワーカーを終了する"""
+        with self._lock:
+            workers = self._idle + list(self._busy)
+            self._idle.clear()
+            self._busy.clear()
+        for worker in workers:
+            worker.kill()
+        self._threads.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def _call(self, method, code, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        # 期限はセマフォの待ち時間も含めて数える
+        started = time.perf_counter()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - loop.time())
+
+        def timed_out():
+            self.timeouts += 1
+            return TranslationResult("timeout", elapsed=time.perf_counter() - started,
+                                     error=f"translation exceeded {timeout}s")
+
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), remaining())
+        except asyncio.TimeoutError:
+            return timed_out()
+        try:
+            acquiring = loop.run_in_executor(self._threads, self._acquire)
+            try:
+                worker, spawn = await asyncio.shield(acquiring)
+            except asyncio.CancelledError:
+                # 取り出し中のワーカーは、取り出しが終わりしだい待機中に戻す（_busy に残さない）
+                acquiring.add_done_callback(self._return_acquired)
+                raise
+            except (EOFError, OSError) as e:
+                return TranslationResult("error", elapsed=time.perf_counter() - started,
+                                         error=f"worker failed to start: {e!r}")
+            if deadline is not None:
+                # ワーカーの起動にかかった時間は期限に含めない
+                deadline += spawn
+            try:
+                worker.conn.send((method, code))
+                reply = loop.run_in_executor(self._threads, worker.conn.recv)
+                status, payload = await asyncio.wait_for(reply, remaining())
+            except asyncio.TimeoutError:
+                self._discard(worker)
+                return timed_out()
+            except asyncio.CancelledError:
+                self._discard(worker)
+                raise
+            except (EOFError, OSError) as e:
+                self._discard(worker)
+                return TranslationResult("error", elapsed=time.perf_counter() - started,
+                                         error=f"worker terminated: {e!r}")
+            self._release(worker)
+        finally:
+            self._semaphore.release()
+        elapsed = time.perf_counter() - started
+        if status != "ok":
+            return TranslationResult("error", elapsed=elapsed, error=payload)
+        lean_code, warnings = payload
+        return TranslationResult("ok", lean_code, warnings, elapsed)
+
+    def _acquire(self):
+        """
+        待機中のワーカーを取り出す。なければ起動する（スレッド上で実行される）。
+        (ワーカー, 起動にかかった秒数) を返す（待機中のワーカーを使った場合は 0）
+        """
+        while True:
+            with self._lock:
+                worker = self._idle.pop() if self._idle else None
+                if worker is not None and worker.alive():
+                    self._busy.add(worker)
+                    return worker, 0.0
+            if worker is None:
+                break
+            worker.kill()
+        started = time.perf_counter()
+        worker = _Worker(self._mp)
+        with self._lock:
+            self._busy.add(worker)
+        return worker, time.perf_counter() - started
+
+    def _return_acquired(self, future):
+        """取り消された呼び出しのために取り出したワーカーを待機中に戻す"""
+        if not future.cancelled() and future.exception() is None:
+            self._release(future.result()[0])
+
+    def _release(self, worker):
+        with self._lock:
+            self._busy.discard(worker)
+            self._idle.append(worker)
+
+    def _discard(self, worker):
+        with self._lock:
+            self._busy.discard(worker)
+            self.restarts += 1
+        worker.kill()
@@ -0,0 +1,320 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from .translator import constants
+
+class CompileCache:
+    """
+    compile_python_to_lean の結果 (Leanコード, 警告リスト) を保持する2段構成のキャッシュ。
+
+    役割:
+    - ソースコード・翻訳器バージョン・オプションのハッシュをキーとする (content-addressed)。
+    - 1段目: プロセス内の LRU (件数上限)。
+    - 2段目: ディスク上の JSON ファイル (合計サイズ上限を超えたら古いものから削除)。
+    - ヒット/ミスの回数を記録し、キャッシュの効果を確認できるようにする。
+    """
+    def __init__(self, max_entries=256, directory=None, max_disk_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._disk_bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    @staticmethod
+    def make_key(code, options=None):
+        """ソースコードと翻訳オプションからキャッシュキー (sha256) を生成する"""
+        h = hashlib.sha256()
+        h.update(constants.TRANSLATOR_VERSION.encode("utf-8"))
+        h.update(b"\0")
+        h.update(json.dumps(options or {}, sort_keys=True, default=str).encode("utf-8"))
+        h.update(b"\0")
+        h.update(code.encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key):
+        """キャッシュを参照する。見つからなければ None を返す"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0], list(entry[1])
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return entry[0], list(entry[1])
+
+    def put(self, key, lean_code, warnings):
+        """翻訳結果を両方の段に保存する"""
+        entry = (lean_code, tuple(warnings))
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def stats(self):
+        """ヒット/ミスの集計を辞書で返す"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        """メモリ上のエントリとディスク上のファイルをすべて削除する"""
+        with self._lock:
+            self._memory.clear()
+            for path, _, _ in self._disk_entries():
+                self._remove(path)
+            self._disk_bytes = 0
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            os.utime(path)  # 参照されたエントリを新しい扱いにする (LRU 的な削除順のため)
+        except (OSError, ValueError):
+            return None
+        return data["lean"], tuple(data["warnings"])
+
+    def _write_disk(self, key, entry):
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        payload = json.dumps({"lean": entry[0], "warnings": list(entry[1])}, ensure_ascii=False)
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+            size = os.path.getsize(path)
+        except OSError:
+            self._remove(tmp)
+            return
+        with self._lock:
+            self._disk_bytes += size - old_size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """合計サイズが上限を下回るまで、更新の古いファイルから削除する"""
+        self._disk_bytes, evicted = _evict_oldest(self._disk_entries(), self.max_disk_bytes)
+        self.evictions += evicted
+
+    def _disk_entries(self):
+        return _json_files(self.directory)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+class VerificationCache:
+    """
+    宣言ごとの Lean 検査結果のキャッシュ（LeanVerifier が使う）。
+
+    役割:
+    - キーは verify.unit_keys が作る Merkle 風のハッシュ（宣言の Leanコード・直接参照する宣言のキー・
+      使うヘルパーの定義）。宣言を編集するとキーの変化が依存元へ伝わり、依存元だけが再検査になる。
+    - スコープ（ファイルなど）と宣言名ごとに直前のキーと Leanコードのハッシュを覚え、キーが変わった宣言を
+      無効化として、自身の変更 ("changed") か依存先・ヘルパーの変更 ("dependency") かとともに数える。
+    - directory を渡すと、結果と宣言名の索引をディスクに保存し、プロセスをまたいで使う。
+    - メモリ上の結果は max_entries 件までの LRU、ディスク上の結果は合計 max_disk_bytes までとし、
+      超えたら参照の古いものから削除する（CompileCache と同じ）。索引は宣言名ごとに1件なので削除しない。
+    """
+    def __init__(self, directory=None, max_entries=4096, max_disk_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._names = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self._disk_bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            try:
+                with open(self._index_path(), encoding="utf-8") as f:
+                    self._names = json.load(f)
+            except (OSError, ValueError):
+                self._names = {}
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def lookup(self, scope, name, key, digest):
+        """
+        結果を参照し、(結果の辞書または None, 無効化の理由または None) を返す。
+        digest は宣言自身の Leanコードのハッシュ（無効化の理由の判定に使う）。
+        """
+        entry = self._read(key)
+        with self._lock:
+            label = _label(scope, name)
+            if entry is not None:
+                self.hits += 1
+                if label is not None:
+                    self._names[label] = [key, digest]
+                return entry, None
+            self.misses += 1
+            previous = self._names.get(label) if label is not None else None
+            if previous is None or previous[0] == key:
+                return None, None
+            self.invalidations += 1
+            return None, "changed" if previous[1] != digest else "dependency"
+
+    def store(self, scope, name, key, digest, entry):
+        """検査結果を保存し、宣言名の索引を更新する"""
+        with self._lock:
+            self._remember(key, entry)
+            label = _label(scope, name)
+            if label is not None:
+                self._names[label] = [key, digest]
+        if self.directory:
+            path = os.path.join(self.directory, f"{key}.json")
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            if not _write_json(path, entry):
+                return
+            with self._lock:
+                self._disk_bytes += os.path.getsize(path) - old_size
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._disk_bytes, evicted = _evict_oldest(self._disk_entries(), self.max_disk_bytes)
+                    self.evictions += evicted
+
+    def flush(self):
+        """宣言名の索引をディスクに書き出す"""
+        if self.directory:
+            with self._lock:
+                names = dict(self._names)
+            _write_json(self._index_path(), names)
+
+    def stats(self):
+        """ヒット/ミス/無効化の集計を辞書で返す"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "disk_bytes": self._disk_bytes,
+                "evictions": self.evictions,
+            }
+
+    def _read(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None or not self.directory:
+            return entry
+        path = os.path.join(self.directory, f"{key}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # 参照されたエントリを新しい扱いにする (LRU 的な削除順のため)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_entries(self):
+        return _json_files(self.directory, skip=self._index_path())
+
+    def _index_path(self):
+        return os.path.join(self.directory, "names.json")
+
+def _label(scope, name):
+    """索引のキー。関数・クラス以外の文（名前が None）は追跡しない"""
+    if name is None:
+        return None
+    name = ",".join(name) if isinstance(name, tuple) else name
+    return f"{scope}::{name}" if scope else name
+
+def _write_json(path, data):
+    """一時ファイルを経由して書き出す。書き出せたかを返す"""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError:
+        CompileCache._remove(tmp)
+        return False
+    return True
+
+def _json_files(directory, skip=None):
+    """directory の .json ファイルの (パス, サイズ, 更新時刻) のリスト（skip のパスを除く）"""
+    if not directory:
+        return []
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(directory, name)
+        if path == skip:
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((path, st.st_size, st.st_mtime))
+    return entries
+
+def _evict_oldest(entries, limit):
+    """合計サイズが limit を下回るまで、更新の古いファイルから削除する。(残りの合計サイズ, 削除した件数) を返す"""
+    entries = sorted(entries, key=lambda e: e[2])
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for path, size, _ in entries:
+        if total <= limit:
+            break
+        if CompileCache._remove(path):
+            total -= size
+            evicted += 1
+    return total, evicted
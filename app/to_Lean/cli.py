@@ -0,0 +1,270 @@
+import argparse
+import json
+import os
+import shlex
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from .prover import DEFAULT_TACTICS
+
+ERROR_PREFIX = "-- Error during translation"
+
+_worker_cache = None
+_worker_preamble = None
+_worker_obligations = False
+_worker_pool_threshold = None
+
+def _init_worker(cache_dir, preamble=None, obligations=False, pool_threshold=None):
+    """ワーカープロセスごとにディスクキャッシュを共有する CompileCache と変換のオプションを用意する"""
+    global _worker_cache, _worker_preamble, _worker_obligations, _worker_pool_threshold
+    _worker_preamble = preamble
+    _worker_obligations = obligations
+    _worker_pool_threshold = pool_threshold
+    if cache_dir:
+        from .cache import CompileCache
+        _worker_cache = CompileCache(directory=cache_dir)
+
+def translate_file(source, output):
+    """1ファイルを変換して書き出し、結果を辞書で返す（ワーカープロセスで実行される）"""
+    from . import compile_python_to_lean, compile_python_to_lean_with_obligations
+    from .translator import obligations
+    started = time.perf_counter()
+    result = {"source": source, "output": output, "status": "ok", "warnings": [], "lines": 0}
+    try:
+        with open(source, encoding="utf-8") as f:
+            code = f.read()
+        result["lines"] = code.count("\n") + 1
+        manifest = None
+        if _worker_obligations:
+            lean_code, warnings, manifest = compile_python_to_lean_with_obligations(
+                code, preamble=_worker_preamble, pool_threshold=_worker_pool_threshold)
+        else:
+            lean_code, warnings = compile_python_to_lean(code, cache=_worker_cache, preamble=_worker_preamble,
+                                                         pool_threshold=_worker_pool_threshold)
+        result["warnings"] = list(warnings)
+        if lean_code.startswith(ERROR_PREFIX):
+            result["status"] = "error"
+            result["error"] = warnings[0] if warnings else lean_code
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(lean_code)
+        if manifest is not None:
+            manifest["source"] = source
+            result["obligations"] = obligations.manifest_path(output)
+            with open(result["obligations"], "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+                f.write("\n")
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+def collect_sources(paths, output_dir=None):
+    """引数のファイル/ディレクトリから (入力 .py, 出力 .lean) の組を列挙する"""
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__")
+                for name in sorted(files):
+                    if name.endswith(".py"):
+                        source = os.path.join(root, name)
+                        jobs.append((source, _output_path(source, os.path.relpath(source, path), output_dir)))
+        else:
+            jobs.append((path, _output_path(path, os.path.basename(path), output_dir)))
+    return jobs
+
+def _output_path(source, relative, output_dir):
+    base = os.path.join(output_dir, relative) if output_dir else source
+    return os.path.splitext(base)[0] + ".lean"
+
+def run_batch(jobs, workers=None, cache_dir=None, preamble=None, obligations=False, pool_threshold=None):
+    """変換をプロセスプールに分散する。1ファイルの異常終了が他のファイルを止めないようにする"""
+    if workers == 1:
+        _init_worker(cache_dir, preamble, obligations, pool_threshold)
+        return [translate_file(src, out) for src, out in jobs]
+
+    results = {}
+    pending = list(jobs)
+    isolate = False
+    while pending:
+        # プールが壊れた場合、残りのファイルは1件ずつ独立したプールで再実行して原因を特定する
+        batches = [[job] for job in pending] if isolate else [pending]
+        pending = []
+        for batch in batches:
+            size = 1 if isolate else workers
+            with ProcessPoolExecutor(max_workers=size, initializer=_init_worker, initargs=(cache_dir, preamble, obligations, pool_threshold)) as pool:
+                futures = {pool.submit(translate_file, src, out): (src, out) for src, out in batch}
+                for future in as_completed(futures):
+                    src, out = futures[future]
+                    try:
+                        results[src] = future.result()
+                    except BrokenProcessPool:
+                        if isolate:
+                            results[src] = {"source": src, "output": out, "status": "crashed",
+                                            "error": "worker process terminated unexpectedly",
+                                            "warnings": [], "lines": 0, "seconds": 0.0}
+                        else:
+                            pending.append((src, out))
+        isolate = True
+    return [results[src] for src, _ in jobs]
+
+def build_report(results, elapsed):
+    """JSON レポート（ファイルごとの結果と集計）を組み立てる"""
+    lines = sum(r["lines"] for r in results)
+    failed = [r for r in results if r["status"] != "ok"]
+    return {
+        "files": results,
+        "summary": {
+            "files": len(results),
+            "ok": len(results) - len(failed),
+            "failed": len(failed),
+            "warnings": sum(len(r["warnings"]) for r in results),
+            "lines": lines,
+            "seconds": elapsed,
+            "files_per_second": len(results) / elapsed if elapsed else 0.0,
+            "lines_per_second": lines / elapsed if elapsed else 0.0,
+        },
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m to_Lean", description="Python ファイルを Lean 4 へ一括変換する")
+    parser.add_argument("paths", nargs="+", help="変換する .py ファイルまたはディレクトリ")
+    parser.add_argument("-o", "--output-dir", help="出力先ディレクトリ（省略時は入力ファイルと同じ場所）")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="並列ワーカー数")
+    parser.add_argument("--report", help="警告レポート (JSON) の出力先（省略時は <出力先>/warnings.json）")
+    parser.add_argument("--cache-dir", help="変換結果のディスクキャッシュを置くディレクトリ")
+    parser.add_argument("--preamble", choices=["inline", "import"],
+                        help="inline: 使うヘルパーの定義を各ファイルの先頭に置く / "
+                             "import: 共有の PyLean/Prelude.lean を出力先に生成し、各ファイルから import する")
+    parser.add_argument("--pool-threshold", type=int, metavar="N",
+                        help="N 回以上現れる小数リテラルを共有の Rat 定義にまとめる（省略時はまとめない）")
+    parser.add_argument("--obligations", action="store_true",
+                        help="各 .lean の隣に証明責務のマニフェスト (<名前>.obligations.json) を書き出す")
+    parser.add_argument("--project", action="store_true",
+                        help="ソースのルートディレクトリ1つを、モジュールごとの Lean ファイルと lakefile.lean "
+                             "からなる Lake プロジェクトとして出力先に書き出す")
+    parser.add_argument("--verify", action="store_true",
+                        help="変換後に宣言ごとに Lean で検査し、結果をレポートに加える")
+    parser.add_argument("--lean", default="lean",
+                        help="検査に使う lean のコマンド (例: \"lake env lean\"、テスト用の代わりのスクリプト)")
+    parser.add_argument("--lean-timeout", type=float, default=60.0, help="宣言1つあたりの検査時間の上限（秒）")
+    parser.add_argument("--lean-memory", type=int, help="宣言1つあたりの lean のメモリ上限 (MiB)")
+    parser.add_argument("--verify-cache", help="宣言ごとの検査結果のキャッシュを置くディレクトリ（--verify と使う）")
+    parser.add_argument("--prove", action="store_true",
+                        help="by sorry をタクティクのポートフォリオで埋め、証明できた箇所を置き換えて書き出す "
+                             "（プリアンブルは --preamble import 以外では inline）")
+    parser.add_argument("--tactics", default=",".join(DEFAULT_TACTICS),
+                        help="同時に試すタクティク（カンマ区切り）")
+    parser.add_argument("--tactic-store", help="勝ったタクティクの記録 (JSON) の保存先。次回の実行で再利用する")
+    parser.add_argument("-q", "--quiet", action="store_true", help="ファイルごとの結果を表示しない")
+    args = parser.parse_args(argv)
+
+    if args.project:
+        return _main_project(args)
+
+    jobs = collect_sources(args.paths, args.output_dir)
+    if not jobs:
+        print("No Python files found.", file=sys.stderr)
+        return 1
+
+    if args.preamble == "import":
+        from .preamble import write_prelude
+        write_prelude(args.output_dir or ".")
+
+    started = time.perf_counter()
+    results = run_batch(jobs, workers=max(1, args.jobs), cache_dir=args.cache_dir, preamble=args.preamble,
+                        obligations=args.obligations, pool_threshold=args.pool_threshold)
+    if args.prove:
+        prove_files(results, args)
+    if args.verify:
+        verify_files(results, args)
+    elapsed = time.perf_counter() - started
+    report = build_report(results, elapsed)
+
+    report_path = args.report or os.path.join(args.output_dir or ".", "warnings.json")
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if not args.quiet:
+        for r in results:
+            if r["status"] != "ok":
+                print(f"[{r['status']}] {r['source']}: {r.get('error', '')}", file=sys.stderr)
+    s = report["summary"]
+    print(f"{s['files']} files ({s['ok']} ok, {s['failed']} failed, {s['warnings']} warnings) in {s['seconds']:.2f}s: "
+          f"{s['files_per_second']:.1f} files/s, {s['lines_per_second']:.0f} lines/s", file=sys.stderr)
+    return 1 if s["failed"] else 0
+
+def verify_files(results, args):
+    """変換できたファイルを宣言ごとに Lean で検査し、結果を各ファイルの "verification" に加える"""
+    from .cache import VerificationCache
+    from .verify import LeanVerifier
+    cache = VerificationCache(args.verify_cache) if args.verify_cache else None
+    verifier = LeanVerifier(shlex.split(args.lean), workers=max(1, args.jobs), timeout=args.lean_timeout,
+                            memory_mb=args.lean_memory, preamble="import" if args.preamble == "import" else "inline",
+                            cwd=args.output_dir if args.preamble == "import" else None, cache=cache,
+                            pool_threshold=args.pool_threshold)
+    for r in results:
+        if r["status"] != "ok":
+            continue
+        with open(r["source"], encoding="utf-8") as f:
+            report = verifier.verify(f.read(), scope=os.path.abspath(r["source"]))
+        r["verification"] = report
+        if report["status"] not in ("ok", "sorry"):
+            r["status"] = "unverified"
+            failed = [d for d in report["declarations"] if d["status"] not in ("ok", "sorry")]
+            r["error"] = ", ".join(f"{d['declaration']} ({d['status']}, line {d['span']['line']})" for d in failed) \
+                or (report["warnings"][0] if report["warnings"] else "")
+    if cache is not None and not args.quiet:
+        s = cache.stats()
+        print(f"verification cache: {s['hits']} hits, {s['misses']} misses, {s['invalidations']} invalidated",
+              file=sys.stderr)
+
+def prove_files(results, args):
+    """変換できたファイルの by sorry をタクティクで埋めて書き直し、結果を各ファイルの "proof" に加える"""
+    from .prover import TacticPortfolio, TacticStore
+    from .verify import LeanVerifier
+    verifier = LeanVerifier(shlex.split(args.lean), workers=max(1, args.jobs), timeout=args.lean_timeout,
+                            memory_mb=args.lean_memory, preamble="import" if args.preamble == "import" else "inline",
+                            cwd=args.output_dir if args.preamble == "import" else None,
+                            pool_threshold=args.pool_threshold)
+    tactics = [t.strip() for t in args.tactics.split(",") if t.strip()]
+    portfolio = TacticPortfolio(verifier, tactics, TacticStore(args.tactic_store))
+    for r in results:
+        if r["status"] != "ok":
+            continue
+        with open(r["source"], encoding="utf-8") as f:
+            report = portfolio.prove(f.read(), scope=os.path.abspath(r["source"]))
+        r["proof"] = {"obligations": report["obligations"], "summary": report["summary"]}
+        if report["lean"] is not None and report["summary"]["proved"]:
+            with open(r["output"], "w", encoding="utf-8") as f:
+                f.write(report["lean"])
+    if not args.quiet:
+        proofs = [r["proof"]["summary"] for r in results if "proof" in r]
+        print(f"tactics: {sum(p['proved'] for p in proofs)} of {sum(p['obligations'] for p in proofs)} "
+              f"obligations proved ({sum(p['reused'] for p in proofs)} reused)", file=sys.stderr)
+
+def _main_project(args):
+    """--project: Lake プロジェクトを書き出し、警告レポートを保存する"""
+    from .project import write_project
+    if len(args.paths) != 1 or not os.path.isdir(args.paths[0]) or not args.output_dir:
+        print("--project requires one source directory and --output-dir.", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    report = write_project(args.paths[0], args.output_dir, jobs=max(1, args.jobs))
+    elapsed = time.perf_counter() - started
+    report_path = args.report or os.path.join(args.output_dir, "warnings.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    failed = [m for m in report["modules"] if m["status"] != "ok"]
+    if not args.quiet:
+        for m in failed:
+            print(f"[{m['status']}] {m['source']}: {m['warnings'][0] if m['warnings'] else ''}", file=sys.stderr)
+        for cycle in report["cycles"]:
+            print(f"[cycle] imports dropped between: {', '.join(cycle)}", file=sys.stderr)
+    print(f"{len(report['modules'])} modules ({len(failed)} failed, {report['written']} files written) "
+          f"in {elapsed:.2f}s: {report['library']} -> {os.path.join(args.output_dir, 'lakefile.lean')}", file=sys.stderr)
+    return 1 if failed else 0
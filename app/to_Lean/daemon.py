@@ -0,0 +1,286 @@
+import argparse
+import ast
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from . import compile_python_to_lean, compile_python_to_lean_with_obligations, translator
+from .cache import CompileCache
+
+# JSON-RPC 2.0 のエラーコード
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+REQUEST_CANCELLED = -32800
+
+# translate の params.preamble に指定できる値
+PREAMBLE_MODES = (None, "inline", "import")
+
+# リクエストの id に使える型 (JSON-RPC 2.0: 文字列・数値・null)
+_ID_TYPES = (str, int, float, type(None))
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+class TranslationServer:
+    """
+    常駐型の変換ワーカー。1行1メッセージの JSON-RPC 2.0 を標準入出力または Unix ソケットで受け付ける。
+
+    役割:
+    - インポート済みの翻訳器と CompileCache をリクエスト間で使い回し、起動コストを払わない。
+    - リクエストをワーカースレッドへ渡し、応答を待たずに次のリクエストを読む（パイプライン処理）。
+    - cancel による取り消しと、リクエストごとのレイテンシ計測を提供する。
+    """
+    def __init__(self, workers=1, cache=None):
+        self.cache = cache if cache is not None else CompileCache()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.methods = {
+            "translate": self._translate,
+            "analyze": self._analyze,
+            "stats": self._stats,
+        }
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1024)
+        self.served = 0
+        self.cancelled = 0
+        self.shutdown_requested = threading.Event()
+
+    def serve_stream(self, reader, writer):
+        """ストリーム1本分の接続を処理する（EOF または shutdown で終了）"""
+        _Connection(self, reader, writer).run()
+
+    def serve_unix(self, path):
+        """Unix ソケットで待ち受け、接続ごとにスレッドで処理する"""
+        if os.path.exists(path):
+            os.remove(path)
+        server_ref = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server_ref.serve_stream(self.rfile, self.wfile)
+                if server_ref.shutdown_requested.is_set():
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+        with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+            server.daemon_threads = True
+            try:
+                server.serve_forever()
+            finally:
+                os.remove(path)
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def record(self, latency_ms, cancelled=False):
+        with self._lock:
+            self.served += 1
+            if cancelled:
+                self.cancelled += 1
+            self._latencies.append(latency_ms)
+
+    def _translate(self, params):
+        code = _require_code(params)
+        mode = params.get("preamble")
+        if mode not in PREAMBLE_MODES:
+            raise RpcError(INVALID_PARAMS, "params.preamble must be null, \"inline\" or \"import\"")
+        if params.get("obligations"):
+            lean_code, warnings, manifest = compile_python_to_lean_with_obligations(code, preamble=mode)
+            return {"lean": lean_code, "warnings": list(warnings), "obligations": manifest}
+        lean_code, warnings = compile_python_to_lean(code, cache=self.cache, preamble=mode)
+        return {"lean": lean_code, "warnings": list(warnings)}
+
+    def _analyze(self, params):
+        code = _require_code(params)
+        try:
+            context = translator.analyze(translator.parse_module(code))
+        except SyntaxError as e:
+            return {"warnings": [str(e)], "diagnostics": [], "functions": {}}
+        functions = {
+            name: {
+                "preconditions": [ast.unparse(cond) for cond in info.preconditions],
+                "loops": len(info.loops),
+            }
+            for name, info in context.functions.items()
+        }
+        return {"warnings": list(context.warnings), "diagnostics": [d.to_dict() for d in context.diagnostics],
+                "functions": functions}
+
+    def _stats(self, params):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            served, cancelled = self.served, self.cancelled
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+        return {"served": served, "cancelled": cancelled, "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)},
+                "cache": self.cache.stats()}
+
+class _Connection:
+    """1接続分の状態（実行中のリクエストと書き込みロック）"""
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.write_lock = threading.Lock()
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+
+    def run(self):
+        for line in self.reader:
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            if not line.strip():
+                continue
+            received = time.perf_counter()
+            try:
+                msg = json.loads(line)
+            except (ValueError, RecursionError):
+                # 入れ子の深すぎる JSON も解析できないメッセージとして扱う
+                self._send_error(None, PARSE_ERROR, "Parse error")
+                continue
+            if not isinstance(msg, dict) or "method" not in msg:
+                self._send_error(msg.get("id") if isinstance(msg, dict) else None, INVALID_REQUEST, "Invalid Request")
+                continue
+            if not self._dispatch(msg, received):
+                break
+        # 未完了のリクエストの応答を書き終えてから戻る
+        with self.pending_lock:
+            futures = [f for f, _ in self.pending.values()]
+        for future in futures:
+            try:
+                future.result()
+            except BaseException:
+                pass
+
+    def _dispatch(self, msg, received):
+        method, req_id, params = msg["method"], msg.get("id"), msg.get("params")
+        # 不正なメッセージはエラーを返して読み続ける（例外で接続を終わらせない）
+        if not isinstance(req_id, _ID_TYPES):
+            self._send_error(None, INVALID_REQUEST, "Invalid Request: id must be a string, number or null")
+            return True
+        if not isinstance(method, str):
+            self._send_error(req_id, INVALID_REQUEST, "Invalid Request: method must be a string")
+            return True
+        if params is None:
+            params = {}
+        elif not isinstance(params, dict):
+            self._send_error(req_id, INVALID_PARAMS, "Invalid params: params must be an object")
+            return True
+        if method == "shutdown":
+            self.server.shutdown_requested.set()
+            self._send_result(req_id, None, received)
+            return False
+        if method in ("cancel", "$/cancelRequest"):
+            self._cancel(params.get("id"))
+            if req_id is not None:
+                self._send_result(req_id, None, received)
+            return True
+        handler = self.server.methods.get(method)
+        if handler is None:
+            self._send_error(req_id, METHOD_NOT_FOUND, f"Method not found: {method}")
+            return True
+
+        state = {"cancelled": False}
+        # 登録前に完了して pending に残らないよう、投入と登録をロック内で行う
+        with self.pending_lock:
+            duplicate = req_id is not None and req_id in self.pending
+            if not duplicate:
+                future = self.server.executor.submit(self._run, handler, params, req_id, state, received)
+                if req_id is not None:
+                    self.pending[req_id] = (future, state)
+        if duplicate:
+            # 実行中のリクエストと同じ id では応答と取り消しの対象を区別できない
+            self._send_error(req_id, INVALID_REQUEST, f"Invalid Request: id {req_id!r} is already in use")
+        return True
+
+    def _run(self, handler, params, req_id, state, received):
+        started = time.perf_counter()
+        try:
+            result = handler(params)
+            error = None
+        except RpcError as e:
+            result, error = None, e
+        except Exception as e:
+            result, error = None, RpcError(INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+        finally:
+            with self.pending_lock:
+                self.pending.pop(req_id, None)
+        if req_id is None:
+            return
+        if state["cancelled"]:
+            # 実行中に取り消されたリクエストは結果を破棄する
+            self._send_error(req_id, REQUEST_CANCELLED, "Request cancelled", received)
+        elif error is not None:
+            self._send_error(req_id, error.code, str(error), received)
+        else:
+            self._send_result(req_id, result, received, compute_ms=(time.perf_counter() - started) * 1000)
+
+    def _cancel(self, target_id):
+        if not isinstance(target_id, _ID_TYPES):
+            return
+        with self.pending_lock:
+            entry = self.pending.get(target_id)
+        if entry is None:
+            return
+        future, state = entry
+        state["cancelled"] = True
+        if future.cancel():
+            # まだ開始前ならワーカーを使わずに取り消せる
+            with self.pending_lock:
+                self.pending.pop(target_id, None)
+            self._send_error(target_id, REQUEST_CANCELLED, "Request cancelled", time.perf_counter())
+
+    def _send_result(self, req_id, result, received, compute_ms=None):
+        latency_ms = (time.perf_counter() - received) * 1000
+        self.server.record(latency_ms)
+        if isinstance(result, dict):
+            result = dict(result, timing={"latency_ms": latency_ms, "compute_ms": compute_ms})
+        self._write({"jsonrpc": "2.0", "id": req_id, "result": result})
+
+    def _send_error(self, req_id, code, message, received=None):
+        if received is not None:
+            self.server.record((time.perf_counter() - received) * 1000, cancelled=(code == REQUEST_CANCELLED))
+        self._write({"jsonrpc": "2.0", "id": req_id, "error": {"code": code, "message": message}})
+
+    def _write(self, payload):
+        data = json.dumps(payload, ensure_ascii=False) + "\n"
+        with self.write_lock:
+            if hasattr(self.writer, "encoding"):
+                self.writer.write(data)
+            else:
+                self.writer.write(data.encode("utf-8"))
+            self.writer.flush()
+
+def _require_code(params):
+    code = params.get("code") if isinstance(params, dict) else None
+    if not isinstance(code, str):
+        raise RpcError(INVALID_PARAMS, "params.code must be a string")
+    return code
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m to_Lean.daemon", description="常駐型の Python→Lean 変換ワーカー (JSON-RPC)")
+    parser.add_argument("--socket", help="Unix ソケットのパス（省略時は標準入出力）")
+    parser.add_argument("--workers", type=int, default=1, help="変換を実行するワーカースレッド数")
+    args = parser.parse_args(argv)
+
+    server = TranslationServer(workers=max(1, args.workers))
+    try:
+        if args.socket:
+            server.serve_unix(args.socket)
+        else:
+            server.serve_stream(sys.stdin, sys.stdout)
+    finally:
+        server.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
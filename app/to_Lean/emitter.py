@@ -1,5 +1,5 @@
 from .translator import constants
-from fractions import Fraction
+from .translator.pool import to_fraction
 
 class LeanEmitter:
     """Lean 4 のコード文字列を生成するためのフォーマッタクラス"""
@@ -16,10 +16,12 @@ class LeanEmitter:
         """定数を整形する"""
         return f'"{value}"' if isinstance(value, str) else str(value)
 
-    def format_rat_constant(self, value: float):
-        """浮動小数点数を有理数 (Rat) 形式に整形する"""
-        f = Fraction(value).limit_denominator()
-        return f"({f.numerator}/{f.denominator} : Rat)"
+    def format_rat_constant(self, value):
+        """浮動小数点数（または Fraction）を有理数 (Rat) 形式に整形する。定数プールにある値は名前で参照する"""
+        f = to_fraction(value)
+        self.context.use_helper("Rat")
+        name = self.context.rat_pool.reference(f)
+        return name or f"({f.numerator}/{f.denominator} : Rat)"
 
     def format_attribute(self, value, attr):
         """属性アクセス (obj.attr) を整形する"""
@@ -29,11 +31,11 @@ class LeanEmitter:
         """変数代入 (let) を整形する"""
         return f"let {target} := {value};"
 
-    def format_assert(self, test, label=None):
+    def format_assert(self, test, label=None, proof="by sorry"):
         """アサーションを整形する"""
         if label:
-            return f"have {label} : {test} := by sorry"
-        return f"have : {test} := by sorry"
+            return f"have {label} : {test} := {proof}"
+        return f"have : {test} := {proof}"
 
     def format_if_exp(self, test, body, orelse):
         """三項演算子 (IfExp) を整形する"""
@@ -46,9 +48,15 @@ class LeanEmitter:
     def format_binop(self, left, op_str, right, is_div=False):
         """二項演算を整形する"""
         if is_div:
+            self.context.use_helper("py_div")
             return f"py_div {left} {right}"
         return f"{left} {op_str} {right}"
 
+    def format_sum(self, iterable):
+        """組み込みの sum() を整形する"""
+        self.context.use_helper("py_sum")
+        return f"py_sum {iterable}"
+
     def format_unaryop(self, op_str, operand):
         """単項演算を整形する"""
         return f"({op_str}{operand})"
@@ -74,17 +82,30 @@ class LeanEmitter:
                 res += f"\nelse\n  {else_part}"
         return res
 
+    def format_loop(self, typed_args, ret_type, base_return, body_lines, state_args, binding):
+        """for ループを末尾再帰 (let rec) と初期呼び出しの束縛に整形する"""
+        body = "\n".join(["    " + line for line in body_lines])
+        res = [
+            f"let rec loop (n : Nat) {typed_args} : {ret_type} :=",
+            f"  if n = 0 then {base_return}",
+            f"  else",
+            f"    {body}",
+            f"    loop (n - 1) {state_args}",
+            f"  termination_by n"
+        ]
+        return "\n".join(res) + "\n" + binding
+
     def format_example(self, prop, proof="rfl"):
         """example (値のテスト) を整形する"""
         return f"example : {prop} := {proof}"
 
-    def format_theorem(self, name, args, prop, body_lines, doc=None):
-        """定理 (theorem) を整形する"""
+    def format_theorem(self, name, args, prop, body_lines, doc=None, proof="by sorry"):
+        """定理 (theorem) を整形する。proof は本体の後に置く証明"""
         doc_str = self._format_doc(doc)
         body = "\n  ".join(body_lines)
         if body.strip() == "rfl":
             return f"{doc_str}theorem {name} {args} : {prop} :=\n  rfl"
-        return f"{doc_str}theorem {name} {args} : {prop} :=\n  {body}\n  by sorry"
+        return f"{doc_str}theorem {name} {args} : {prop} :=\n  {body}\n  {proof}"
 
     def format_function(self, name, args, ret_type, body_lines, doc=None, termination_hint=None, is_recursive=False):
         """関数 (def) を整形する"""
@@ -98,6 +119,11 @@ class LeanEmitter:
             return f"-- [PyLean] Warning: No termination measure found.\n{code}"
         return code
 
+    def format_mutual(self, declarations):
+        """相互再帰する宣言 (変換済みの文字列) を mutual ブロックにまとめる"""
+        body = "\n\n".join(declarations)
+        return f"mutual\n{body}\nend"
+
     def format_inductive(self, name, variants):
         """列挙型 (inductive) を整形する"""
         items = "\n  ".join([f"| {v}" for v in variants])
@@ -117,4 +143,101 @@ class LeanEmitter:
         else:
             if cond_str:
                 return f"({iterable}).filter (fun {target} => {cond_str}).flatMap (fun {target} => {expr})"
-            return f"({iterable}).flatMap (fun {target} => {expr})"
\ No newline at end of file
+            return f"({iterable}).flatMap (fun {target} => {expr})"
+
+class LeanFragment:
+    """
+    Leanコードの断片を文字列と子断片のリストとして保持するロープ構造。
+
+    ネストした if や関数本体を連結のたびにコピーせず、最後に一度だけ平坦化して出力する。
+    インデントや区切りも部品として保持するだけで、子の文字列を作り直すことはない。
+    """
+    __slots__ = ("parts",)
+
+    def __init__(self, parts):
+        self.parts = parts
+
+    def write_to(self, write):
+        """再帰を使わずに断片を先頭から順に write へ渡す"""
+        stack = [iter(self.parts)]
+        while stack:
+            for part in stack[-1]:
+                if isinstance(part, LeanFragment):
+                    stack.append(iter(part.parts))
+                    break
+                write(part)
+            else:
+                stack.pop()
+
+    def __str__(self):
+        out = []
+        self.write_to(out.append)
+        return "".join(out)
+
+    def __format__(self, spec):
+        return format(str(self), spec)
+
+    def __add__(self, other):
+        return LeanFragment([self, other])
+
+    def __radd__(self, other):
+        return LeanFragment([other, self])
+
+    def __bool__(self):
+        # 構文キーワードを必ず含むため、空の断片は作られない
+        return True
+
+def _interleave(lines, sep):
+    """sep.join(lines) に相当する部品列を、要素を連結せずに作る"""
+    parts = []
+    for i, line in enumerate(lines):
+        if i:
+            parts.append(sep)
+        parts.append(line)
+    return parts
+
+def _is_blank(line):
+    return isinstance(line, str) and not line.strip()
+
+class BufferedLeanEmitter(LeanEmitter):
+    """
+    ブロック構造 (if / def / theorem / loop) を LeanFragment として返すエミッタ。
+    出力文字列は LeanEmitter と同一で、深いネストでも子の文字列を再コピーしない。
+    """
+    def format_if_stmt(self, test, then_lines, else_lines, is_elif=False):
+        parts = ["if ", test, " then\n  "] + _interleave(then_lines, "\n  ")
+        if else_lines:
+            if is_elif:
+                parts += ["\nelse ", else_lines[0]]
+            else:
+                parts += ["\nelse\n  "] + _interleave(else_lines, "\n  ")
+        return LeanFragment(parts)
+
+    def format_theorem(self, name, args, prop, body_lines, doc=None, proof="by sorry"):
+        doc_str = self._format_doc(doc)
+        head = f"{doc_str}theorem {name} {args} : {prop} :=\n  "
+        non_blank = [line for line in body_lines if not _is_blank(line)]
+        if len(non_blank) == 1 and isinstance(non_blank[0], str) and non_blank[0].strip() == "rfl":
+            return f"{head}rfl"
+        return LeanFragment([head] + _interleave(body_lines, "\n  ") + ["\n  ", proof])
+
+    def format_function(self, name, args, ret_type, body_lines, doc=None, termination_hint=None, is_recursive=False):
+        doc_str = self._format_doc(doc)
+        term = f"\ntermination_by {termination_hint}" if termination_hint else ""
+        header = f"{doc_str}def {name} {args} : {ret_type} :="
+        parts = [header, "\n  "] + _interleave(body_lines, "\n  ") + [term]
+        if is_recursive and not termination_hint:
+            parts.insert(0, "-- [PyLean] Warning: No termination measure found.\n")
+        return LeanFragment(parts)
+
+    def format_loop(self, typed_args, ret_type, base_return, body_lines, state_args, binding):
+        body = _interleave([LeanFragment(["    ", line]) for line in body_lines], "\n")
+        return LeanFragment([
+            f"let rec loop (n : Nat) {typed_args} : {ret_type} :=\n",
+            f"  if n = 0 then {base_return}\n",
+            "  else\n",
+            "    ", *body, "\n",
+            f"    loop (n - 1) {state_args}\n",
+            "  termination_by n\n",
+            binding,
+        ])
\ No newline at end of file
@@ -1,6 +1,8 @@
 import ast
 from . import types
 from .translator import constants
+from .translator.pool import decimal_value
+from .translator.symbols import FunctionInfo
 
 class BaseHandler:
     """名前や定数などの基本要素のハンドラ"""
@@ -87,6 +89,10 @@ class ExpressionHandler:
 
     @staticmethod
     def handle_call(v, node):
+        # Decimal('0.05') は有理数のリテラル（定数プールにある値は名前で参照する）
+        value = decimal_value(node)
+        if value is not None:
+            return v.emitter.format_rat_constant(value)
         fn = v._v(node.func)
         # 組み込み関数やメソッドの特殊処理を確認
         h = BUILTIN_CALL_HANDLERS.get(fn) or (isinstance(node.func, ast.Attribute) and METHOD_CALL_HANDLERS.get(node.func.attr))
@@ -95,29 +101,15 @@ class ExpressionHandler:
             if res: return res
         args = [v._wrap(a, trigger_types=(ast.IfExp, ast.BinOp)) for a in node.args]
         
-        # 呼び出し対象関数のメタデータをチェックして事前条件証明を追加
-        target_meta = v.context.functions.get(fn, {})
-        target_preconds = target_meta.get("preconditions", [])
-        if target_preconds:
-            curr_fn = v.current_function
-            curr_preconds = []
-            if curr_fn:
-                curr_meta = v.context.functions.get(curr_fn, {})
-                curr_preconds = curr_meta.get("preconditions", [])
-                is_thm = curr_fn.startswith(("verify_", "theorem_"))
-                if is_thm:
-                    target_name = curr_fn.replace("verify_", "").replace("theorem_", "")
-                    target_meta_curr = v.context.functions.get(target_name, {})
-                    curr_preconds = target_meta_curr.get("preconditions", [])
-            
-            curr_precond_strs = [v._v(cond) for cond in curr_preconds]
-            for t_cond in target_preconds:
-                t_cond_str = v._v(t_cond)
-                try:
-                    idx = curr_precond_strs.index(t_cond_str)
-                    args.append(f"h_precond_{idx}")
-                except ValueError:
-                    args.append("(by sorry)")
+        # 呼び出し先の事前条件（仮引数を実引数で置き換えたもの）に一致する呼び出し元の仮定を索引から探す
+        index = v.context.preconditions
+        for i, key in enumerate(index.instantiate(fn, node.args)):
+            idx = index.lookup(v.current_function, key)
+            if idx is not None:
+                args.append(f"h_precond_{idx}")
+            else:
+                mark = v.record_call_obligation(node, fn, i)
+                args.append(f"({mark}by sorry)")
         
         return fn if not args else f"{fn} {' '.join(args)}"
 
@@ -174,23 +166,24 @@ class StatementHandler:
     def handle_function_def(v, node):
         args = v._format_args(node.args)
         is_thm = node.name.startswith(("verify_", "theorem_"))
-        meta = v.context.functions.get(node.name, {})
+        meta = v.context.functions.get(node.name) or FunctionInfo(node.name)
         return v._build_function_or_theorem(node, args, is_thm, meta)
 
     @staticmethod
     def handle_class_def(v, node):
-        kind = v.context.classes.get(node.name)
+        info = v.context.classes.get(node.name)
+        kind = info.kind if info else None
         if kind == "enum":
             variants = [t.id for s in node.body if isinstance(s, ast.Assign) for t in s.targets if isinstance(t, ast.Name)]
             return v.emitter.format_inductive(node.name, variants)
         if kind == "structure":
-            fields = [(s.target.id, types.translate_type(s.annotation)) for s in node.body if isinstance(s, ast.AnnAssign) and isinstance(s.target, ast.Name)]
+            fields = [(s.target.id, types.translate_type(s.annotation, v.context)) for s in node.body if isinstance(s, ast.AnnAssign) and isinstance(s.target, ast.Name)]
             return v.emitter.format_structure(node.name, fields)
         return v._unsupported(node, "Only Enums and @dataclass are supported")
 
 # 暫定的な組み込みハンドラ定義（必要に応じて core.py から移動）
 BUILTIN_CALL_HANDLERS = {
-    "sum": lambda n, v: f"py_sum {v._v(n.args[0])}",
+    "sum": lambda n, v: v.emitter.format_sum(v._v(n.args[0])),
     "len": lambda n, v: f"({v._v(n.args[0])}).length",
 }
 METHOD_CALL_HANDLERS = {
@@ -0,0 +1,277 @@
+import ast
+import hashlib
+from .translator.analysis import SafetyAnalyzer
+from .translator.callgraph import CallGraph, declaration_refs
+from .translator.context import TranslationContext
+from .translator.core import LeanTranslator
+from .translator.parsing import parse_module
+from .translator.pool import decimal_value
+from . import preamble
+
+class _SessionContext(TranslationContext):
+    """宣言ごとの診断を、重複の除去前に記録できるコンテキスト"""
+    def __init__(self, preamble=None, pool_threshold=None):
+        super().__init__(preamble=preamble, pool_threshold=pool_threshold)
+        self.recorder = None
+
+    def add_diagnostic(self, diagnostic):
+        if self.recorder is not None:
+            self.recorder.append(diagnostic)
+        return super().add_diagnostic(diagnostic)
+
+class _DeclEntry:
+    """トップレベル文1つ分の解析結果と変換結果"""
+    __slots__ = ("stmt", "base_line", "functions", "defined_vars", "diagnostics",
+                 "text", "assert_start", "assert_count", "pooled", "recursion", "helpers",
+                 "obligations")
+
+    def __init__(self, stmt, base_line):
+        self.stmt = stmt
+        self.base_line = base_line
+        self.functions = {}
+        self.defined_vars = set()
+        self.diagnostics = []
+        self.text = None
+        self.assert_start = None
+        self.assert_count = 0
+        # 変換時にプールされていたリテラルの値の集合
+        self.pooled = frozenset()
+        # 変換時の各関数の (名前, 再帰するか, 停止性の注釈)
+        self.recursion = ()
+        # 変換結果が使うプリアンブルのヘルパー名
+        self.helpers = frozenset()
+        # 変換時に記録した証明責務（行番号は base_line からの相対値）
+        self.obligations = []
+
+class _DeclNames:
+    """宣言が参照・定義する名前（依存関係の計算用）と、小数リテラルの出現回数・使う識別子（定数プール用）"""
+    __slots__ = ("refs", "defined", "assert_refs", "names", "literals", "identifiers", "decl")
+
+    def __init__(self, stmt):
+        # 依存グラフ (CallGraph) の節点としての (定義する名前, 参照する名前)
+        self.decl = declaration_refs(stmt)
+        self.refs, self.defined, self.assert_refs = set(), set(), set()
+        self.literals = {}
+        params = set()
+        for node in ast.walk(stmt):
+            if isinstance(node, ast.Constant) and isinstance(node.value, float):
+                self.literals[node.value] = self.literals.get(node.value, 0) + 1
+            elif isinstance(node, ast.Call) and decimal_value(node) is not None:
+                value = decimal_value(node)
+                self.literals[value] = self.literals.get(value, 0) + 1
+            elif isinstance(node, ast.arg):
+                params.add(node.arg)
+            elif isinstance(node, ast.Name):
+                self.refs.add(node.id)
+            elif isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+                self.defined.add(node.name)
+                # verify_X / theorem_X は X の事前条件を参照する
+                if node.name.startswith(("verify_", "theorem_")):
+                    self.refs.add(node.name.replace("verify_", "").replace("theorem_", ""))
+            elif isinstance(node, ast.Assert):
+                self.assert_refs.update(n.id for n in ast.walk(node.test) if isinstance(n, ast.Name))
+        self.names = self.refs | self.defined
+        self.identifiers = self.names | params
+
+class IncrementalSession:
+    """
+    ライブエディタ向けの差分コンパイルセッション。
+
+    役割:
+    - トップレベルの各文 (FunctionDef / ClassDef など) のソース断片から指紋を計算し、
+      解析結果と Lean ブロックを指紋＋依存先の指紋をキーとして保持する。
+    - 編集後は、変更された宣言と、それに依存する宣言（呼び出し先の事前条件など）だけを
+      再解析・再変換する。
+    - 出力は compile_python_to_lean による全体変換とバイト単位で一致する。
+    - preamble と pool_threshold は TranslatorSession と同じ（使うヘルパーは宣言ごとに記録して集計する）。
+    """
+    def __init__(self, preamble=None, pool_threshold=None):
+        self.preamble = preamble
+        self.pool_threshold = pool_threshold
+        self._entries = {}
+        self._obligations = None
+        self._names = {}
+        self.reanalyzed = 0
+        self.retranslated = 0
+        self.reused = 0
+
+    def compile(self, code: str, cache=None):
+        """ソースコードを変換し、(Leanコード, 警告リスト) を返す"""
+        from . import _cache_options, compile_python_to_lean
+        self._obligations = None
+        if cache is not None:
+            key = cache.make_key(code, _cache_options(self.preamble, self.pool_threshold))
+            hit = cache.get(key)
+            if hit is not None:
+                return hit
+        try:
+            tree = parse_module(code)
+            result = self._compile_tree(tree, _split_lines(code))
+        except Exception:
+            # 構文エラー等は全体変換と同じ形式で報告する
+            return compile_python_to_lean(code, cache=cache, preamble=self.preamble, pool_threshold=self.pool_threshold)
+        if cache is not None:
+            cache.put(key, *result)
+        return result
+
+    def obligations(self):
+        """
+        直近の compile の証明責務のリスト（全体変換の context.obligation_list() と同じもの）。
+        キャッシュから結果を返した場合や変換に失敗した場合は None。
+        """
+        return None if self._obligations is None else list(self._obligations)
+
+    def stats(self):
+        """直近までの再解析・再変換・再利用の回数を返す"""
+        return {"reanalyzed": self.reanalyzed, "retranslated": self.retranslated, "reused": self.reused}
+
+    def _compile_tree(self, tree, lines):
+        stmts = tree.body
+        fps = [_fingerprint(stmt, lines) for stmt in stmts]
+        names = []
+        for fp, stmt in zip(fps, stmts):
+            info = self._names.get(fp)
+            if info is None:
+                info = self._names[fp] = _DeclNames(stmt)
+            names.append(info)
+        providers = {}
+        for i, info in enumerate(names):
+            for name in info.defined:
+                providers.setdefault(name, []).append(i)
+
+        # 1. 解析フェーズ: 宣言ごとに、キャッシュ済みの結果を再生するか再解析する
+        context = _SessionContext(self.preamble, self.pool_threshold)
+        analyzer = SafetyAnalyzer(context)
+        entries, live = [], {}
+        for i, stmt in enumerate(stmts):
+            deps = self._dependency_signature(i, fps, names, providers)
+            module_vars = frozenset(analyzer.defined_vars & names[i].names)
+            key = (fps[i], deps, module_vars)
+            entry = live.get(key) or self._entries.get(key)
+            if entry is None:
+                entry = self._analyze(analyzer, context, stmt)
+                self.reanalyzed += 1
+            else:
+                self._replay(analyzer, context, entry, _decl_start(stmt))
+            live[key] = entry
+            entries.append(entry)
+        self._entries = live
+        self._names = {fp: self._names[fp] for fp in fps}
+
+        # 再生した宣言は解析器を通らないため、リテラルの出現回数は宣言ごとの集計から求める
+        literals = {}
+        for info in names:
+            for value, n in info.literals.items():
+                literals[value] = literals.get(value, 0) + n
+            context.identifiers |= info.identifiers
+        context.literals = literals
+        # 依存グラフは宣言ごとに保持した名前から作り直す（再帰の有無は他の宣言の編集でも変わる）
+        graph = context.call_graph = CallGraph([info.decl for info in names])
+        graph.annotate(stmts, context)
+
+        # 2. 変換フェーズ: 出力順に変換する。assert の通し番号の開始位置、使うリテラルのプールの有無、
+        #    関数の再帰の有無や停止性の注釈が変わった宣言も再変換する
+        translator = LeanTranslator(context)
+        pool = context.rat_pool
+        definitions = pool.definitions()
+        parts, count = [], 0
+        found = []
+        for c in graph.order():
+            texts = []
+            for i in graph.components[c]:
+                entry, info = entries[i], names[i]
+                pooled = pool.signature(info.literals)
+                recursion = tuple((name, context.functions[name].is_recursive, context.functions[name].hint)
+                                  for name in entry.functions)
+                if (entry.text is None or entry.assert_start != count or entry.pooled != pooled
+                        or entry.recursion != recursion):
+                    translator.assert_count = count
+                    context.helpers = set()
+                    context.obligations = {}
+                    entry.text = translator.translate(entry.stmt)
+                    entry.helpers = frozenset(context.helpers)
+                    entry.obligations = [o.shifted(-entry.base_line) for o in context.obligations.values()]
+                    entry.assert_start = count
+                    entry.assert_count = translator.assert_count - count
+                    entry.pooled = pooled
+                    entry.recursion = recursion
+                    self.retranslated += 1
+                else:
+                    self.reused += 1
+                count += entry.assert_count
+                texts.append(entry.text)
+                base_line = _decl_start(stmts[i])
+                found.extend(o.shifted(base_line) for o in entry.obligations)
+            if graph.is_mutual(c):
+                parts.append(context.emitter.format_mutual([t for t in texts if t]))
+            else:
+                parts.extend(texts)
+        helpers = set().union(*(entry.helpers for entry in entries))
+        if definitions:
+            helpers.add("Rat")
+        self._obligations = found
+        head = preamble.header(helpers, self.preamble)
+        return "\n\n".join(filter(None, [head, definitions] + parts)), context.warnings
+
+    def _dependency_signature(self, i, fps, names, providers):
+        """宣言 i が参照する名前の定義元（事前条件経由の参照を含む）の指紋と前後関係"""
+        pending = list(names[i].names)
+        seen = set(pending)
+        sig = []
+        while pending:
+            name = pending.pop()
+            provs = providers.get(name)
+            if not provs:
+                continue
+            sig.append((name, tuple((fps[j], j < i) for j in provs if j != i)))
+            for j in provs:
+                for ref in names[j].assert_refs:
+                    if ref not in seen:
+                        seen.add(ref)
+                        pending.append(ref)
+        return tuple(sorted(sig))
+
+    def _analyze(self, analyzer, context, stmt):
+        entry = _DeclEntry(stmt, _decl_start(stmt))
+        before = set(analyzer.defined_vars)
+        context.recorder = []
+        try:
+            analyzer.visit(stmt)
+        finally:
+            recorded, context.recorder = context.recorder, None
+        entry.diagnostics = [d.shifted(-entry.base_line) for d in recorded]
+        entry.defined_vars = analyzer.defined_vars - before
+        for name in self._names_defined(stmt):
+            if name in context.functions:
+                entry.functions[name] = context.functions[name].copy()
+        return entry
+
+    def _replay(self, analyzer, context, entry, base_line):
+        for name, info in entry.functions.items():
+            context.functions[name] = info.copy()
+            for loop in info.loops:
+                context.loops[loop.node] = loop
+        analyzer.defined_vars |= entry.defined_vars
+        for diagnostic in entry.diagnostics:
+            context.add_diagnostic(diagnostic.shifted(base_line))
+
+    @staticmethod
+    def _names_defined(stmt):
+        return [n.name for n in ast.walk(stmt) if isinstance(n, ast.FunctionDef)]
+
+def _split_lines(code):
+    """ast と同じ規則 (\\r\\n, \\r, \\n) で行に分割する"""
+    return code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+
+def _decl_start(stmt):
+    """デコレータを含めた宣言の開始行"""
+    decorators = getattr(stmt, "decorator_list", None)
+    return min([stmt.lineno] + [d.lineno for d in decorators]) if decorators else stmt.lineno
+
+def _fingerprint(stmt, lines):
+    """宣言のソース断片（相対的な行構成を含む）から指紋を計算する"""
+    start = _decl_start(stmt)
+    segment = "\n".join(lines[start - 1:stmt.end_lineno])
+    h = hashlib.sha1(segment.encode("utf-8"))
+    h.update(f"\0{stmt.lineno - start}:{stmt.col_offset}:{stmt.end_col_offset}".encode())
+    return h.hexdigest()
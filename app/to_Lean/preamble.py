@@ -1,37 +1,37 @@
-def generate(lean_code_body):
-    """
-    Leanコードの先頭に追加するヘルパー関数や定義（プリアンブル）を生成する
-    """
-    # 使用されている機能を判定
-    uses_date = "Date" in lean_code_body
-    uses_float = "Float" in lean_code_body
-    uses_div = "py_div" in lean_code_body
-    uses_floor = "py_floor" in lean_code_body
-    uses_ceil = "py_ceil" in lean_code_body
-    uses_round = "py_round" in lean_code_body
-    uses_sum = "py_sum" in lean_code_body
-    uses_half_up = "py_round_half_up" in lean_code_body
-    uses_rat = "Rat" in lean_code_body or uses_floor or uses_ceil or uses_round or uses_half_up
-
-    # インポート文の構築
-    imports = ["import Lean"]
-    if uses_rat:
-        imports.append("import Mathlib.Data.Rat.Basic")
-        imports.append("import Mathlib.Data.Rat.Floor")
-
-    # 定義本体の構築
-    sections = []
-
-    if uses_date:
-        sections.append("""-- Pythonのdatetime.date互換の構造体
+import os
+
+# 共有プレリュードのモジュール名と、各ファイルに書くインポート文
+PRELUDE_MODULE = "PyLean.Prelude"
+PRELUDE_IMPORT = f"import {PRELUDE_MODULE}"
+
+# ヘルパー名 -> (必要な import, 先に定義が必要なヘルパー, 定義本体)。出力はこの順に並べる
+SECTIONS = {
+    "Rat": (["Mathlib.Data.Rat.Defs"], [], """-- 有理数と整数の混在演算を許可するインスタンス
+instance : HAdd Int Rat Rat where hAdd n r := (n : Rat) + r
+instance : HAdd Rat Int Rat where hAdd r n := r + (n : Rat)
+instance : HSub Int Rat Rat where hSub n r := (n : Rat) - r
+instance : HSub Rat Int Rat where hSub r n := r - (n : Rat)
+instance : HMul Int Rat Rat where hMul n r := (n : Rat) * r
+instance : HMul Rat Int Rat where hMul r n := r * (n : Rat)"""),
+    "Float": ([], [], """-- 浮動小数点数と整数の混在演算を許可するインスタンス
+instance : HAdd Int Float Float where hAdd n f := Float.ofInt n + f
+instance : HAdd Float Int Float where hAdd f n := f + Float.ofInt n
+instance : HSub Int Float Float where hSub n f := Float.ofInt n - f
+instance : HSub Float Int Float where hSub f n := f - Float.ofInt n
+instance : HMul Int Float Float where hMul n f := Float.ofInt n * f
+instance : HMul Float Int Float where hMul f n := f * Float.ofInt n
+instance : HPow Float Int Float where hPow f n := f.pow (Float.ofInt n)
+instance : HPow Float Nat Float where hPow f n := f.pow (Float.ofInt n)
+instance : HPow Float Float Float where hPow f1 f2 := f1.pow f2
+instance : HPow Int Float Float where hPow n f := (Float.ofInt n).pow f"""),
+    "Date": ([], [], """-- Pythonのdatetime.date互換の構造体
 structure Date where
   year : Int
   month : Int
   day : Int
-deriving Repr, BEq, Inhabited""")
-
-    if uses_div:
-        sections.append("""-- Pythonの / 演算子ヘルパー
+deriving Repr, BEq, Inhabited"""),
+    "AssocList": (["Lean.Data.AssocList"], [], "open Lean (AssocList)"),
+    "py_div": ([], ["Rat"], """-- Pythonの / 演算子ヘルパー
 -- 金融計算の精度維持のため、Int同士やRatが絡む除算は有理数(Rat)を返すように定義
 class PyDiv (α : Type) (β : Type) (γ : outParam Type) where
   py_div : α -> β -> γ
@@ -54,61 +54,83 @@ instance : PyDiv Rat Rat Rat where
 instance : PyDiv Rat Int Rat where
   py_div a b := a / (b : Rat)
 
-def py_div {α β γ} [PyDiv α β γ] (a : α) (b : β) : γ := PyDiv.py_div a b""")
-
-    if uses_float:
-        sections.append("""-- 浮動小数点数と整数の混在演算を許可するインスタンス
-instance : HAdd Int Float Float where hAdd n f := Float.ofInt n + f
-instance : HAdd Float Int Float where hAdd f n := f + Float.ofInt n
-instance : HSub Int Float Float where hSub n f := Float.ofInt n - f
-instance : HSub Float Int Float where hSub f n := f - Float.ofInt n
-instance : HMul Int Float Float where hMul n f := Float.ofInt n * f
-instance : HMul Float Int Float where hMul f n := f * Float.ofInt n
-instance : HPow Float Int Float where hPow f n := f.pow (Float.ofInt n)
-instance : HPow Float Nat Float where hPow f n := f.pow (Float.ofInt n)
-instance : HPow Float Float Float where hPow f1 f2 := f1.pow f2
-instance : HPow Int Float Float where hPow n f := (Float.ofInt n).pow f""")
+def py_div {α β γ} [PyDiv α β γ] (a : α) (b : β) : γ := PyDiv.py_div a b"""),
+    "py_floor": (["Mathlib.Data.Rat.Floor"], ["Rat"], "def py_floor (x : Rat) : Int := x.floor"),
+    "py_ceil": (["Mathlib.Data.Rat.Floor"], ["Rat"], "def py_ceil (x : Rat) : Int := x.ceil"),
+    "py_round": (["Mathlib.Data.Rat.Floor"], ["Rat"], "def py_round (x : Rat) : Int := x.round"),
+    # 四捨五入: x + 1/2 を床関数に通す (xが正の場合)
+    "py_round_half_up": (["Mathlib.Data.Rat.Floor"], ["Rat"],
+                         "def py_round_half_up (x : Rat) : Int := (x + 1/2).floor"),
+    "py_sum": ([], [], "def py_sum [Add α] [OfNat α 0] (xs : List α) : α := xs.foldl (· + ·) 0"),
+}
+
+# 型名として現れたときにヘルパーが必要になる Lean の型 (types.translate_type が記録する)
+TYPE_HELPERS = {"Rat", "Float", "Date", "AssocList"}
+
+def resolve(helpers):
+    """使用するヘルパーに、それが依存するヘルパーを加えた集合を返す"""
+    pending = [h for h in helpers if h in SECTIONS]
+    resolved = set()
+    while pending:
+        name = pending.pop()
+        if name not in resolved:
+            resolved.add(name)
+            pending.extend(SECTIONS[name][1])
+    return resolved
+
+def generate(helpers):
+    """
+    変換中に記録したヘルパー名の集合から、Leanコードの先頭に置くプリアンブルを生成する。
+    使わないヘルパーと import は出力しない。ヘルパーを使わなければ空文字列を返す。
+    """
+    used = resolve(helpers)
+    if not used:
+        return ""
+    return _render([name for name in SECTIONS if name in used], banner=True)
 
-    if uses_rat:
-        sections.append("""-- 有理数と整数の混在演算を許可するインスタンス
-instance : HAdd Int Rat Rat where hAdd n r := (n : Rat) + r
-instance : HAdd Rat Int Rat where hAdd r n := r + (n : Rat)
-instance : HSub Int Rat Rat where hSub n r := (n : Rat) - r
-instance : HSub Rat Int Rat where hSub r n := r - (n : Rat)
-instance : HMul Int Rat Rat where hMul n r := (n : Rat) * r
-instance : HMul Rat Int Rat where hMul r n := r * (n : Rat)""")
-
-    math_helpers = []
-    if uses_floor:
-        math_helpers.append("def py_floor (x : Rat) : Int := x.floor")
-    if uses_ceil:
-        math_helpers.append("def py_ceil (x : Rat) : Int := x.ceil")
-    if uses_round:
-        math_helpers.append("def py_round (x : Rat) : Int := x.round")
-    if uses_half_up:
-        # 四捨五入: x + 1/2 を床関数に通す (xが正の場合)
-        math_helpers.append("def py_round_half_up (x : Rat) : Int := (x + 1/2).floor")
-    
-    if math_helpers:
-        sections.append("\n".join(math_helpers))
-
-    if uses_sum:
-        sections.append("def py_sum [Add α] [OfNat α 0] (xs : List α) : α := xs.foldl (· + ·) 0")
-
-    # 出力の組み立て
-    header = "\n".join(imports)
-    
-    if not sections:
-        return header + "\n"
-
-    body = "\n\n".join(sections)
-    return f"""{header}
-
--- ==========================================
--- PyLean Preamble
--- ==========================================
-
-{body}
-
--- ==========================================
-"""
\ No newline at end of file
+def header(helpers, mode):
+    """
+    出力の先頭に置く文字列。mode が "inline" ならプリアンブル本体、
+    "import" なら共有プレリュードのインポート文、None なら空文字列。
+    """
+    if mode == "inline":
+        return generate(helpers)
+    if mode == "import":
+        return PRELUDE_IMPORT
+    if mode is None:
+        return ""
+    raise ValueError(f"unknown preamble mode: {mode!r}")
+
+def prelude():
+    """すべてのヘルパーを定義する共有モジュール PyLean/Prelude.lean の内容"""
+    return _render(list(SECTIONS), banner=False) + "\n"
+
+def write_prelude(root):
+    """root/PyLean/Prelude.lean を書き出し、そのパスを返す（内容が同じなら書き換えない）"""
+    path = os.path.join(root, *PRELUDE_MODULE.split(".")) + ".lean"
+    text = prelude()
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return path
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+def _render(names, banner):
+    # 元のプリアンブルと同じく、使うヘルパーによらず Lean は常に import する
+    imports = ["Lean"]
+    for name in names:
+        for module in SECTIONS[name][0]:
+            if module not in imports:
+                imports.append(module)
+    head = "\n".join(f"import {module}" for module in imports)
+    body = "\n\n".join(SECTIONS[name][2] for name in names)
+    if banner:
+        body = ("-- ==========================================\n-- PyLean Preamble\n"
+                "-- ==========================================\n\n"
+                f"{body}\n\n-- ==========================================")
+    return f"{head}\n\n{body}" if head else body
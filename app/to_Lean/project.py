@@ -0,0 +1,269 @@
+import ast
+import os
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from . import preamble
+from .translator.callgraph import CallGraph
+
+ERROR_PREFIX = "-- Error during translation"
+
+# Lean のキーワードと衝突する名前は «» で囲む
+_LEAN_KEYWORDS = {
+    "abbrev", "at", "axiom", "by", "class", "def", "deriving", "do", "else", "end", "example", "export",
+    "fun", "have", "if", "import", "in", "inductive", "instance", "let", "local", "macro", "match", "mutual",
+    "namespace", "open", "partial", "private", "protected", "section", "show", "structure", "syntax",
+    "then", "theorem", "universe", "unsafe", "variable", "where", "with",
+}
+
+class ModuleInfo:
+    """Python モジュール1つ分の出力計画（Lean モジュール名、出力先、import と open）"""
+    __slots__ = ("name", "source", "lean_module", "output", "defined", "imports", "opens", "dropped")
+
+    def __init__(self, name, source, lean_module, output):
+        self.name = name
+        self.source = source
+        self.lean_module = lean_module
+        self.output = output
+        # トップレベルで定義する関数・クラス名（他のモジュールから open できる名前）
+        self.defined = set()
+        # import する Python モジュール名（このプロジェクト内のものだけ）
+        self.imports = []
+        # (Python モジュール名, 名前のリスト (None は全体)) の open
+        self.opens = []
+        # 循環 import のため出力しなかった import
+        self.dropped = []
+
+    def __repr__(self):
+        return f"ModuleInfo({self.name!r}, lean_module={self.lean_module!r}, imports={self.imports!r})"
+
+class LeanProject:
+    """
+    Python のソースツリーを、モジュールごとの Lean ファイルと lakefile.lean からなる Lake プロジェクトへ変換する。
+
+    役割:
+    - 各 .py ファイルを1つの Lean モジュール (<ライブラリ名>.<Python のモジュール名>) に対応させ、
+      本体はモジュール名の namespace に入れる（モジュール間で同名の宣言が衝突しないようにする）。
+    - Python の import / from ... import (相対 import を含む) のうちプロジェクト内のものを、
+      Lean の import と open に変換する。循環する import は Lean では書けないため出力せず報告する。
+    - 共有プレリュード (PyLean/Prelude.lean)、全モジュールを import するライブラリのルート、
+      lakefile.lean を生成する。`lake build` は互いに依存しないモジュールを並列にビルドし、
+      変更されたモジュールとその依存元だけを再ビルドする。
+    - 内容が変わらないファイルは書き換えない（変更の検出をファイルの更新時刻に頼るツールのため）。
+    """
+    def __init__(self, source_root, library=None, package=None, mathlib=True):
+        self.source_root = os.path.abspath(source_root)
+        base = os.path.basename(self.source_root)
+        self.library = library or _library_name(base)
+        self.package = package or base
+        self.mathlib = mathlib
+        # ルートが Python パッケージなら、モジュール名はその名前から始まる
+        self._prefix = [base] if os.path.exists(os.path.join(self.source_root, "__init__.py")) else []
+        self.modules = {}
+        self.cycles = []
+
+    def plan(self):
+        """ソースツリーを走査して各モジュールの ModuleInfo を作り、import を解決する"""
+        self.modules = {}
+        for source in _python_files(self.source_root):
+            name = self._module_name(source)
+            parts = [_lean_ident(p) for p in name.split(".")]
+            lean_module = ".".join([self.library] + parts)
+            output = os.path.join(self.library, *parts) + ".lean"
+            self.modules[name] = ModuleInfo(name, source, lean_module, output)
+        trees = {}
+        for name, info in self.modules.items():
+            try:
+                with open(info.source, encoding="utf-8") as f:
+                    tree = ast.parse(f.read())
+            except (SyntaxError, ValueError, UnicodeDecodeError):
+                continue
+            trees[name] = tree
+            info.defined = {s.name for s in tree.body if isinstance(s, (ast.FunctionDef, ast.ClassDef))}
+        for name, tree in trees.items():
+            self._resolve_imports(self.modules[name], tree)
+        self._break_cycles()
+        return list(self.modules.values())
+
+    def write(self, output_dir, jobs=1, cache=None):
+        """
+        Lean ファイル・プレリュード・ライブラリのルート・lakefile.lean を output_dir に書き出し、
+        レポート（モジュールごとの結果と循環 import）を返す。
+        jobs > 1 ではファイルの変換をプロセスプールに分散する（cache はプロセス内で変換するときだけ使う）。
+        """
+        modules = self.plan()
+        results = _translate_all([info.source for info in modules], jobs, cache)
+        report = {"library": self.library, "modules": [], "cycles": [list(c) for c in self.cycles], "written": 0}
+        for info, (lean_code, warnings) in zip(modules, results):
+            status = "error" if lean_code.startswith(ERROR_PREFIX) else "ok"
+            written = _write_if_changed(os.path.join(output_dir, info.output), self.render_module(info, lean_code))
+            report["written"] += written
+            report["modules"].append({
+                "module": info.name, "lean_module": info.lean_module, "source": info.source,
+                "output": info.output, "imports": [self.modules[m].lean_module for m in info.imports],
+                "dropped_imports": list(info.dropped), "status": status, "warnings": list(warnings),
+            })
+        preamble.write_prelude(output_dir)
+        report["written"] += _write_if_changed(os.path.join(output_dir, self.library + ".lean"), self.render_root())
+        report["written"] += _write_if_changed(os.path.join(output_dir, "lakefile.lean"), self.render_lakefile())
+        return report
+
+    def render_module(self, info, lean_code):
+        """変換結果に import・open・namespace を付けた Lean ファイルの内容"""
+        head = [preamble.PRELUDE_IMPORT] + [f"import {self.modules[m].lean_module}" for m in info.imports]
+        opens = []
+        for module, names in info.opens:
+            namespace = _namespace(module)
+            opens.append(f"open {namespace}" if names is None else f"open {namespace} ({' '.join(names)})")
+        sections = ["\n".join(head)]
+        if opens:
+            sections.append("\n".join(opens))
+        namespace = _namespace(info.name)
+        sections.append(f"namespace {namespace}\n\n{lean_code}\n\nend {namespace}" if lean_code
+                        else f"namespace {namespace}\nend {namespace}")
+        return "\n\n".join(sections) + "\n"
+
+    def render_root(self):
+        """すべてのモジュールを import するライブラリのルート（lake build の既定の対象）"""
+        lines = [f"import {info.lean_module}" for _, info in sorted(self.modules.items())]
+        return "\n".join(lines) + "\n"
+
+    def render_lakefile(self):
+        """Lake のビルド設定 lakefile.lean"""
+        lines = ["import Lake", "open Lake DSL", "", f"package «{self.package}» where", ""]
+        if self.mathlib:
+            lines += ['require mathlib from git', '  "https://github.com/leanprover-community/mathlib4"', ""]
+        lines += [
+            "lean_lib «PyLean» where",
+            f"  roots := #[`{preamble.PRELUDE_MODULE}]",
+            "",
+            "@[default_target]",
+            f"lean_lib «{self.library}» where",
+            "",
+        ]
+        return "\n".join(lines)
+
+    def _module_name(self, source):
+        relative = os.path.relpath(source, self.source_root)
+        parts = os.path.splitext(relative)[0].split(os.sep)
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+        return ".".join(self._prefix + parts)
+
+    def _resolve_imports(self, info, tree):
+        """プロジェクト内のモジュールへの import を info.imports / info.opens に記録する"""
+        is_package = os.path.basename(info.source) == "__init__.py"
+        package = info.name.split(".") if is_package else info.name.split(".")[:-1]
+        imports = []
+
+        def add(module):
+            if module in self.modules and module != info.name and module not in imports:
+                imports.append(module)
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    # import a.b は a と a.b の両方を読み込む
+                    parts = alias.name.split(".")
+                    for k in range(1, len(parts) + 1):
+                        add(".".join(parts[:k]))
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    base = package[:len(package) - node.level + 1] if node.level <= len(package) + 1 else []
+                    module = ".".join(base + ([node.module] if node.module else []))
+                else:
+                    module = node.module or ""
+                if any(alias.name == "*" for alias in node.names):
+                    if module in self.modules:
+                        add(module)
+                        info.opens.append((module, None))
+                    continue
+                names = []
+                for alias in node.names:
+                    # from pkg import submodule はサブモジュールの import
+                    submodule = f"{module}.{alias.name}" if module else alias.name
+                    if submodule in self.modules:
+                        add(submodule)
+                    elif module in self.modules and alias.name in self.modules[module].defined:
+                        names.append(alias.name)
+                if names:
+                    add(module)
+                    info.opens.append((module, names))
+        info.imports = imports
+
+    def _break_cycles(self):
+        """循環する import（強連結成分の内側の import）を取り除き、self.cycles に記録する"""
+        names = list(self.modules)
+        graph = CallGraph([({name}, set(self.modules[name].imports)) for name in names])
+        self.cycles = []
+        for members in graph.components:
+            if len(members) < 2:
+                continue
+            cycle = {names[i] for i in members}
+            self.cycles.append(sorted(cycle))
+            for module in cycle:
+                info = self.modules[module]
+                info.dropped = [m for m in info.imports if m in cycle]
+                info.imports = [m for m in info.imports if m not in cycle]
+                info.opens = [(m, ns) for m, ns in info.opens if m not in cycle]
+
+def write_project(source_root, output_dir, jobs=1, cache=None, library=None, mathlib=True):
+    """source_root 以下の Python ファイルを Lake プロジェクトとして output_dir に書き出し、レポートを返す"""
+    return LeanProject(source_root, library=library, mathlib=mathlib).write(output_dir, jobs=jobs, cache=cache)
+
+def run_lake(project_dir, lake="lake", args=("build",), timeout=None):
+    """
+    project_dir で lake を実行し、CompletedProcess を返す。
+    lake には実行ファイルのパスを渡せる（ツールチェインのない環境では代わりのスクリプトを使う）。
+    """
+    command = [lake] if isinstance(lake, str) else list(lake)
+    return subprocess.run(command + list(args), cwd=project_dir, capture_output=True, text=True, timeout=timeout)
+
+def _translate_source(source, cache=None):
+    """1ファイルを変換して (Leanコード, 警告リスト) を返す（ワーカープロセスでも実行される）"""
+    from . import compile_python_to_lean
+    try:
+        with open(source, encoding="utf-8") as f:
+            code = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return f"{ERROR_PREFIX}: {e}", [str(e)]
+    return compile_python_to_lean(code, cache=cache)
+
+def _translate_all(sources, jobs, cache):
+    if jobs <= 1 or len(sources) <= 1:
+        return [_translate_source(source, cache) for source in sources]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_translate_source, sources))
+
+def _python_files(root):
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(".py"):
+                yield os.path.join(directory, name)
+
+def _write_if_changed(path, text):
+    """内容が変わるときだけ書き込み、書き込んだら 1 を返す"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return 0
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return 1
+
+def _library_name(base):
+    """ディレクトリ名から Lean のライブラリ名を作る (app -> App)"""
+    name = re.sub(r"\W", "_", base) or "Project"
+    if name[0].isdigit():
+        name = "P" + name
+    return name[0].upper() + name[1:]
+
+def _lean_ident(name):
+    return f"«{name}»" if name in _LEAN_KEYWORDS else name
+
+def _namespace(module):
+    return ".".join(_lean_ident(p) for p in module.split("."))
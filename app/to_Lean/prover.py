@@ -0,0 +1,249 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from .verify import ERROR, OK, SORRY, LeanVerifier, split_declarations, unit_keys
+
+# 既定のタクティクのポートフォリオ（並べた順に起動する）
+DEFAULT_TACTICS = ("decide", "norm_num", "omega", "simp", "linarith")
+
+# TacticStore のファイル形式の版（異なる版のファイルは読まない）
+STORE_VERSION = 2
+
+class ProofSite:
+    """
+    検査単位の Leanコードに残った証明責務の `by sorry` 1箇所。
+
+    - unit: 検査単位の添字 / obligation: 証明責務 (obligations.Obligation。id はマニフェストと同じ)
+    - offset: 単位の Leanコードの中での `by sorry` の文字位置
+    - key: 検査単位のキー (unit_keys)。責務の前提（宣言の他の部分や依存先）が変わると変わる
+    """
+    __slots__ = ("unit", "obligation", "offset", "key")
+
+    def __init__(self, unit, obligation, offset, key):
+        self.unit = unit
+        self.obligation = obligation
+        self.offset = offset
+        self.key = key
+
+    def __repr__(self):
+        return f"ProofSite(unit={self.unit}, obligation={self.obligation.id!r}, offset={self.offset})"
+
+class TacticStore:
+    """
+    証明責務の ID ごとに勝ったタクティクの記録。path を渡すと JSON ファイルに保存し、次回の実行で使う。
+
+    - winners: 責務のラベル（スコープと責務の ID）-> {"tactic": タクティク, "key": 勝ったときの検査単位のキー}
+      キーが同じならそのタクティクだけを採用し、キーが変わった（宣言や依存先を編集した）ら最初に単独で試す。
+    - failures: 責務のラベル -> {"tactics": どれも成功しなかったタクティクのリスト, "key": 検査単位のキー}
+      （キーが同じ間は、同じ責務で同じタクティクを再び試さない）
+    責務の ID は Python ソース上の内容から決まるため、無関係な宣言の編集（それによる定数プールの変化を含む）や
+    行の移動、assert の番号の変化では記録が失われない。
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.winners = {}
+        self.failures = {}
+        self._lock = threading.Lock()
+        if path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == STORE_VERSION:
+                    self.winners = data.get("winners", {})
+                    self.failures = data.get("failures", {})
+            except (OSError, ValueError, AttributeError):
+                pass
+
+    def lookup(self, label, key):
+        """(キーが同じときに記録した勝ちタクティク, キーによらず前回勝ったタクティク) を返す。なければ None"""
+        with self._lock:
+            entry = self.winners.get(label)
+        if entry is None:
+            return None, None
+        return (entry["tactic"] if entry["key"] == key else None), entry["tactic"]
+
+    def record(self, label, key, tactic):
+        with self._lock:
+            self.winners[label] = {"tactic": tactic, "key": key}
+            self.failures.pop(label, None)
+
+    def failed(self, label, key):
+        """この責務で、検査単位のキーが同じ間に失敗したタクティクの集合"""
+        with self._lock:
+            entry = self.failures.get(label)
+        return set(entry["tactics"]) if entry and entry["key"] == key else set()
+
+    def record_failure(self, label, key, tactics):
+        with self._lock:
+            entry = self.failures.get(label)
+            previous = entry["tactics"] if entry and entry["key"] == key else ()
+            self.failures[label] = {"tactics": sorted(set(previous) | set(tactics)), "key": key}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {"version": STORE_VERSION, "winners": dict(self.winners), "failures": dict(self.failures)}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+class TacticPortfolio:
+    """
+    変換結果に残った `by sorry` を、タクティクのポートフォリオで自動的に埋める証明段階（任意）。
+
+    役割:
+    - 証明責務（マニフェストと同じ ID を持つ、変換時に記録した `by sorry` の位置）1つごとに、
+      その `by sorry` だけを各タクティクに置き換えたファイルを作り、tactics のすべてを別々の lean プロセスで同時に検査する。
+      最初に成功したタクティクを採用し、残りのプロセスは kill する。
+    - 勝ったタクティクを責務の ID ごとに TacticStore に記録し、次回は検査単位のキーが同じならそれだけを採用する。
+      宣言を編集してキーが変わった場合は、前回勝ったタクティクを先に単独で試し、失敗したら全体で競わせる。
+    - 同時に扱う責務の数は verifier.workers 個まで（lean のプロセスは最大で workers × len(tactics) 個）。
+    lean の起動・時間とメモリの上限・メッセージの解釈は LeanVerifier に任せる。
+    """
+    def __init__(self, verifier, tactics=DEFAULT_TACTICS, store=None):
+        self.verifier = verifier
+        self.tactics = tuple(tactics)
+        self.store = store if store is not None else TacticStore()
+
+    def prove(self, code, scope=None):
+        """
+        Pythonソースを変換し、`by sorry` を証明できたタクティクで置き換える。
+        レポート（責務ごとの結果・置き換えた Leanコード・集計）を返す。
+        """
+        started = time.perf_counter()
+        try:
+            prelude, units, warnings = split_declarations(code, self.verifier.preamble, self.verifier.pool_threshold)
+        except Exception as e:
+            return {"lean": None, "obligations": [], "warnings": [str(e)],
+                    "summary": {"obligations": 0, "proved": 0, "reused": 0, "seconds": time.perf_counter() - started}}
+        sites = self.sites(units)
+        directory = tempfile.mkdtemp(prefix="pylean_prove_")
+        try:
+            jobs = [(site, directory, prelude, units, scope) for site in sites]
+            if self.verifier.workers <= 1 or len(jobs) <= 1:
+                outcomes = [self._prove_site(*job) for job in jobs]
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.verifier.workers, len(jobs))) as pool:
+                    outcomes = list(pool.map(lambda job: self._prove_site(*job), jobs))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        self.store.save()
+
+        winners = [{} for _ in units]
+        entries = []
+        for site, (tactic, reused, tried) in zip(sites, outcomes):
+            obligation = site.obligation
+            if tactic is not None:
+                winners[site.unit][site.offset] = tactic
+            entries.append({
+                "id": obligation.id, "declaration": obligation.declaration, "kind": obligation.kind,
+                "line": obligation.line, "tactic": tactic, "reused": reused, "tried": tried,
+            })
+        texts = [self.fill(unit.text, found) for unit, found in zip(units, winners)]
+        proved = sum(1 for entry in entries if entry["tactic"] is not None)
+        return {
+            "lean": "\n\n".join(([prelude] if prelude else []) + texts),
+            "obligations": entries,
+            "warnings": list(warnings),
+            "summary": {"obligations": len(entries), "proved": proved,
+                        "reused": sum(1 for entry in entries if entry["reused"]),
+                        "seconds": time.perf_counter() - started},
+        }
+
+    def sites(self, units):
+        """検査単位に残った証明責務の `by sorry` を出現順に列挙する（`by sorry` を持たない停止性の責務は除く）"""
+        keys = unit_keys(units, {"lean": self.verifier.command, "preamble": self.verifier.preamble})
+        return [ProofSite(u, obligation, offset, keys[u])
+                for u, unit in enumerate(units) for obligation, offset in unit.obligations]
+
+    @staticmethod
+    def fill(text, tactics):
+        """text の文字位置 offset にある `by sorry` を tactics[offset] に置き換える（tactics は 文字位置 -> タクティク）"""
+        for offset in sorted(tactics, reverse=True):
+            if not text.startswith("by sorry", offset):
+                raise ValueError(f"no `by sorry` at offset {offset}")
+            text = f"{text[:offset]}by {tactics[offset]}{text[offset + len('by sorry'):]}"
+        return text
+
+    def _prove_site(self, site, directory, prelude, units, scope):
+        """(勝ったタクティクまたは None, 記録を再利用したか, 試したタクティクの数) を返す"""
+        label = f"{scope}::{site.obligation.id}" if scope else site.obligation.id
+        recorded, hint = self.store.lookup(label, site.key)
+        if recorded is not None:
+            # 前提の変わらない責務で前回勝ったタクティクは、そのまま採用する（lean を実行しない）
+            return recorded, True, 0
+        failed = self.store.failed(label, site.key)
+        tried = 0
+        if hint in self.tactics and hint not in failed:
+            tried += 1
+            winner, refuted = self._race(site, directory, prelude, units, (hint,))
+            if winner is not None:
+                self.store.record(label, site.key, hint)
+                return hint, True, tried
+            failed |= refuted
+            if refuted:
+                self.store.record_failure(label, site.key, refuted)
+        candidates = tuple(t for t in self.tactics if t not in failed and t != hint)
+        tried += len(candidates)
+        winner, refuted = self._race(site, directory, prelude, units, candidates) if candidates else (None, set())
+        if winner is not None:
+            self.store.record(label, site.key, winner)
+        elif refuted:
+            self.store.record_failure(label, site.key, refuted)
+        return winner, False, tried
+
+    def _race(self, site, directory, prelude, units, tactics):
+        """
+        tactics を同時に検査し、(最初に成功したタクティクまたは None, Lean がエラーを報告したタクティクの集合) を返す。
+        勝者が決まったら残りのプロセスは kill する。時間切れや起動の失敗は環境次第なので、エラーの集合に含めない。
+        """
+        verifier = self.verifier
+        running = {}
+        for n, tactic in enumerate(tactics):
+            candidate = list(units)
+            unit = units[site.unit]
+            candidate[site.unit] = unit.with_text(self.fill(unit.text, {site.offset: tactic}))
+            path, prelude_end, start = verifier.write_unit(directory, prelude, candidate, site.unit,
+                                                           suffix=f"_{site.offset}_{n}")
+            try:
+                process = verifier.start(path)
+            except OSError:
+                continue
+            running[tactic] = (process, candidate[site.unit], prelude_end, start)
+        winner, refuted = None, set()
+        if not running:
+            return winner, refuted
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(running)) as pool:
+            futures = {pool.submit(verifier.wait, process): tactic for tactic, (process, *_) in running.items()}
+            pending = set(futures)
+            while pending and winner is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tactic = futures[future]
+                    status, output = future.result()
+                    _, unit, prelude_end, start = running[tactic]
+                    result = verifier.interpret(unit, status, output, prelude_end, start,
+                                                time.perf_counter() - started)
+                    if result.status in (OK, SORRY):
+                        winner = tactic
+                        break
+                    if result.status == ERROR:
+                        refuted.add(tactic)
+            for tactic, (process, *_) in running.items():
+                if tactic != winner and process.poll() is None:
+                    process.kill()
+        return winner, refuted
+
+def prove_python(code, lean="lean", tactics=DEFAULT_TACTICS, workers=None, timeout=60.0, store=None,
+                 pool_threshold=None):
+    """Pythonソースを変換し、`by sorry` をタクティクのポートフォリオで埋めたレポートを返す"""
+    verifier = LeanVerifier(lean, workers=workers, timeout=timeout, pool_threshold=pool_threshold)
+    return TacticPortfolio(verifier, tactics, store).prove(code)
@@ -1,5 +1,8 @@
 # Marks the translator directory as a Python package.
 
-from .core import translate_to_lean
-from .analysis import analyze
+from .core import translate_to_lean, iter_declarations, iter_declaration_groups
+from .analysis import analyze, analyze_declarations
+from .session import TranslatorSession
+from .callgraph import CallGraph
+from .parsing import parse_module
 from . import constants
\ No newline at end of file
@@ -1,4 +1,9 @@
 import ast
+from .symbols import FunctionInfo, LoopInfo
+from .guards import GuardMap
+from .callgraph import CallGraph
+from .intervals import IntervalAnalysis, IntervalSet, condition_ranges, numeric_constant
+from .pool import decimal_value
 
 def analyze(node, context=None):
     """ASTの静的解析を行い、コンテキスト情報を構築する (Perform static analysis on AST and build context)"""
@@ -10,6 +15,56 @@ def analyze(node, context=None):
     analyzer.analyze(node)
     return context
 
+def analyze_declarations(module, context=None):
+    """トップレベルの文ごとに解析し、(context, 各文で発生した警告のリスト) を返す"""
+    if context is None:
+        from .context import TranslationContext
+        context = TranslationContext()
+
+    analyzer = SafetyAnalyzer(context)
+    per_stmt = []
+    for stmt in module.body:
+        start = len(context.diagnostics)
+        analyzer.visit(stmt)
+        per_stmt.append([str(d) for d in context.diagnostics[start:]])
+    analyzer.build_call_graph(module.body)
+    return context, per_stmt
+
+class _Facts:
+    """
+    走査中のノード1つ分の事実（部分木で代入・参照される変数）。
+    子の事実は終了時に親へ併合する（小さい集合を大きい集合へ入れるため、全体でほぼ線形）。
+    held は特定のフィールド（for の本体、assert の条件式）の事実を別に集めるための入れ物。
+    """
+    __slots__ = ("node", "field", "written", "read", "held", "held_field", "saved")
+
+    def __init__(self, node, field, held_field=None):
+        self.node = node
+        self.field = field
+        self.written = _EMPTY
+        self.read = _EMPTY
+        self.held_field = held_field
+        self.held = _Facts(None, None) if held_field else None
+        self.saved = None
+
+    def absorb(self, child):
+        target = self.held if (self.held is not None and child.field == self.held_field) else self
+        target.written = _merge(target.written, child.written)
+        target.read = _merge(target.read, child.read)
+
+_EMPTY = frozenset()
+
+def _merge(a, b):
+    """集合の和をとる。大きい方の集合を再利用し、小さい方の要素だけを追加する"""
+    if not b:
+        return a
+    if not a:
+        return b
+    if len(a) < len(b):
+        a, b = b, a
+    a |= b
+    return a
+
 class SafetyAnalyzer(ast.NodeVisitor):
     """
     Python ASTを走査し、形式検証（Leanへの変換）の前にコードの安全性を静的に解析するクラス。
@@ -18,103 +73,214 @@ class SafetyAnalyzer(ast.NodeVisitor):
     - ゼロ除算などの実行時エラーの可能性がある箇所を特定する。
     - ガード条件（if文など）がない危険な操作に対し、`TranslationContext`を通じて警告を発行する。
     - 将来的に、事前条件や不変条件の不備を指摘するためのフックとして機能する。
+
+    走査は1回だけ行う。各ノードに入るときに visit_XXX を、子をすべて処理した後に leave_XXX を呼び、
+    代入・参照される変数は子から親へ積み上げて求める（部分木を ast.walk で走査し直さない）。
     """
+    # 本体・条件式の事実を別に集めるフィールド
+    HELD_FIELDS = {ast.For: "body", ast.Assert: "test"}
+
     def __init__(self, context):
+        self.reset(context)
+
+    def reset(self, context):
+        """解析状態を初期化し、別のモジュールの解析に再利用できるようにする"""
         self.context = context
         self.current_guards = []
         self.current_function = None
         self.current_function_args = set()
         self.defined_vars = set()
+        # 現在の関数の GuardMap (最初の除算の検査時に作る) と区間解析の結果
+        self._function_node = None
+        self._guards = None
+        self._intervals = None
+        # 現在の関数に float の値が現れるか（オーバーフロー・精度の検査を行うかどうか）
+        self._uses_float = False
+        # 先頭の if から解析済みの elif (visit_If で再び解析しない)
+        self._chain_members = set()
+        self._stack = None
+        self._frames = None
 
     def analyze(self, node):
         """Starts the safety analysis on the provided AST node."""
         self.visit(node)
 
+    def visit(self, node):
+        """
+        明示的なスタックで部分木を走査する（Pythonの再帰を使わない）。
+        走査中に呼ばれた場合は、ノードを予約するだけで直ちに戻る。
+        """
+        if self._stack is not None:
+            self._stack.append((node, None))
+            return
+        self._stack = [(node, None)]
+        self._frames = [_Facts(None, None)]
+        try:
+            while self._stack:
+                item, field = self._stack.pop()
+                if isinstance(item, _Facts):
+                    self._leave(item)
+                    continue
+                frame = _Facts(item, field, self.HELD_FIELDS.get(type(item)))
+                self._frames.append(frame)
+                self._stack.append((frame, None))
+                method = getattr(self, "visit_" + item.__class__.__name__, None)
+                if method is None:
+                    self.generic_visit(item)
+                else:
+                    method(item)
+        finally:
+            self._stack = None
+            self._frames = None
+
+    def generic_visit(self, node):
+        """子ノードを (ノード, フィールド名) としてソース順に処理されるようスタックへ積む"""
+        children = []
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                children.extend((item, field) for item in value if isinstance(item, ast.AST))
+            elif isinstance(value, ast.AST):
+                children.append((value, field))
+        children.reverse()
+        self._stack.extend(children)
+
+    def _leave(self, frame):
+        """ノードの子をすべて処理し終えたときの処理。事実を親ノードへ併合する"""
+        self._frames.pop()
+        method = getattr(self, "leave_" + frame.node.__class__.__name__, None)
+        if method is not None:
+            method(frame)
+        if frame.held is not None:
+            frame.absorb(frame.held)
+        self._frames[-1].absorb(frame)
+
+    @property
+    def _frame(self):
+        """現在処理中のノードの事実"""
+        return self._frames[-1]
+
+    def leave_Module(self, frame):
+        """モジュール全体の解析が終わった時点で、宣言の依存グラフを作り再帰関数に印を付ける"""
+        self.build_call_graph(frame.node.body)
+
+    def build_call_graph(self, stmts):
+        """トップレベルの文から CallGraph を作り、context.call_graph に設定する"""
+        graph = CallGraph.from_module(stmts)
+        graph.annotate(stmts, self.context)
+        self.context.call_graph = graph
+        return graph
+
     def visit_FunctionDef(self, node):
         """関数のスコープを開始し、引数を定義済みリストに入れる"""
-        prev_func = self.current_function
-        prev_vars = self.defined_vars.copy()
-        prev_args = self.current_function_args.copy()
-        
+        self._frame.saved = (self.current_function, self.defined_vars.copy(), self.current_function_args.copy(),
+                             self._function_node, self._guards, self._intervals, self._uses_float)
+
         self.current_function = node.name
+        self._function_node, self._guards, self._intervals = node, None, None
+        self._uses_float = False
         self.current_function_args = {arg.arg for arg in node.args.args}
         
         # 引数を定義済みに追加
         for arg in node.args.args:
             self.defined_vars.add(arg.arg)
             
-        if node.name not in self.context.functions:
-            self.context.functions[node.name] = {}
-        self.context.functions[node.name]["loop_info"] = []
-        self.context.functions[node.name]["preconditions"] = []
+        self.context.functions[node.name] = FunctionInfo(node.name, [arg.arg for arg in node.args.args])
+        self.context.identifiers.add(node.name)
+        self.generic_visit(node)
 
+    def visit_ClassDef(self, node):
+        self.context.identifiers.add(node.name)
+        self.generic_visit(node)
+
+    def leave_FunctionDef(self, frame):
+        """本体の走査が終わった時点で区間解析の警告を出し、スコープを元に戻す"""
+        if self._uses_float and (self.context.wants("possible-overflow") or self.context.wants("precision-loss")):
+            findings = self._interval_analysis().findings
+            for node in sorted(findings, key=lambda n: (n.lineno, n.col_offset)):
+                self.context.report(findings[node], node, expr=_short_source(node))
+        (self.current_function, self.defined_vars, self.current_function_args,
+         self._function_node, self._guards, self._intervals, self._uses_float) = frame.saved
+
+    def visit_arg(self, node):
+        self.context.identifiers.add(node.arg)
         self.generic_visit(node)
-        
-        self.defined_vars = prev_vars
-        self.current_function = prev_func
-        self.current_function_args = prev_args
 
-    def visit_Assert(self, node):
+    def visit_Name(self, node):
+        self.context.identifiers.add(node.id)
+        if isinstance(node.ctx, ast.Load):
+            self._frame.read = {node.id}
+            if node.id == "float":
+                self._uses_float = True
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, float):
+            self._uses_float = True
+            literals = self.context.literals
+            literals[node.value] = literals.get(node.value, 0) + 1
+
+    def visit_Call(self, node):
+        """Decimal('0.05') も小数リテラルとして数える（定数プールの対象）"""
+        value = decimal_value(node)
+        if value is not None:
+            literals = self.context.literals
+            literals[value] = literals.get(value, 0) + 1
+        self.generic_visit(node)
+
+    def leave_Assert(self, frame):
         """assert文を解析し、事前条件としての適性を判定する"""
         if self.current_function:
-            # assertの条件式で使用されている変数を抽出
-            used_vars = {n.id for n in ast.walk(node.test) if isinstance(n, ast.Name)}
+            # assertの条件式で使用されている変数（子から積み上げた参照）
+            used_vars = frame.held.read
             # 使用されている変数がすべて関数の引数である場合、事前条件として登録
             if used_vars.issubset(self.current_function_args) and len(used_vars) > 0:
-                if "preconditions" not in self.context.functions[self.current_function]:
-                    self.context.functions[self.current_function]["preconditions"] = []
-                self.context.functions[self.current_function]["preconditions"].append(node.test)
-        self.generic_visit(node)
+                self.context.functions[self.current_function].preconditions.append(frame.node.test)
 
     def visit_Assign(self, node):
         """代入された変数を現在のスコープの定義済みリストに記録する"""
-        for t in node.targets:
-            if isinstance(t, ast.Name):
-                self.defined_vars.add(t.id)
+        written = {t.id for t in node.targets if isinstance(t, ast.Name)}
+        self.defined_vars |= written
+        self._frame.written = written
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node):
+        if isinstance(node.target, ast.Name):
+            self._frame.written = {node.target.id}
         self.generic_visit(node)
 
     def visit_For(self, node):
         """ループ内で更新され、かつループ外で定義済みの変数を『状態変数』として抽出する"""
-        # 1. ループ内で代入が行われている変数を特定
-        updated_in_loop = self._find_updated_variables(node.body)
-        
-        # 2. ループ開始時点で定義済みの変数との積集合をとる
-        state_vars = updated_in_loop.intersection(self.defined_vars)
-        
+        # 状態変数はループ本体の処理後に求まる。ループ開始時点の定義済み変数を保存しておく
+        info = None
         if self.current_function:
-            self.context.functions[self.current_function]["loop_info"].append({
-                "state_vars": list(state_vars),
-                "node": node
-            })
+            info = LoopInfo(node)
+            self.context.functions[self.current_function].loops.append(info)
+            self.context.loops[node] = info
+        self._frame.saved = (info, frozenset(self.defined_vars))
         
-        # 3. ループのインデックス変数も定義済みに追加
+        # ループのインデックス変数も定義済みに追加
         if isinstance(node.target, ast.Name):
             self.defined_vars.add(node.target.id)
             
         self.generic_visit(node)
 
-    def _find_updated_variables(self, body):
-        """ループのボディを走査し、代入対象となっている変数名のセットを返す"""
-        updated = set()
-        for stmt in body:
-            for sub_node in ast.walk(stmt):
-                if isinstance(sub_node, ast.Assign):
-                    for target in sub_node.targets:
-                        if isinstance(target, ast.Name):
-                            updated.add(target.id)
-                elif isinstance(sub_node, ast.AugAssign):
-                    if isinstance(sub_node.target, ast.Name):
-                        updated.add(sub_node.target.id)
-        return updated
+    def leave_For(self, frame):
+        info, defined_before = frame.saved
+        if info is not None:
+            # ループ内で代入が行われている変数と、ループ開始時点で定義済みの変数との積集合
+            info.state_vars = list(frame.held.written.intersection(defined_before))
 
     def visit_If(self, node):
         """分岐の網羅性と到達可能性を解析する"""
         # 1. 網羅性チェック: else ブロックの欠如を確認
         if not node.orelse:
-            self.context.add_warning(node, "Exhaustiveness: Missing 'else' block. In Lean, functions must be exhaustive.")
+            self.context.report("missing-else", node)
         
-        # 2. 到達可能性チェック: if-elif チェーンを辿って論理的矛盾を検知
-        self._analyze_if_chain_reachability(node)
+        # 2. 到達可能性チェック: if-elif チェーンを辿って論理的矛盾を検知（上限に達していれば省略）
+        #    チェーンは先頭の if でまとめて解析し、elif では繰り返さない
+        if node in self._chain_members:
+            self._chain_members.discard(node)
+        elif self.context.wants("unreachable-branch") or self.context.wants("unreachable-condition"):
+            self._analyze_if_chain_reachability(node)
         
         self.generic_visit(node)
 
@@ -122,59 +288,71 @@ class SafetyAnalyzer(ast.NodeVisitor):
         """
         if-elif チェーンを解析し、条件の重複や順序の誤りによる到達不能コードを検知する。
         例: if income <= 5000: ... elif income <= 2000: ... (2000のケースは絶対に来ない)
+
+        変数ごとに、それまでの条件が真になる範囲の和集合 (IntervalSet) を持つ。
+        後の分岐に来るのはそれらが偽のときだけなので、条件の範囲が和集合に含まれる分岐には到達しない。
+        各条件は二分探索で判定・追加するため、チェーン全体で O(k log k)。
         """
-        constraints = []
+        covered = {}
         curr = node
         while isinstance(curr, ast.If):
-            comp = self._try_extract_comparison(curr.test)
-            if comp:
-                var_name, op, val = comp
-                # 過去の条件と比較して論理的な矛盾をチェック
-                for prev_var, prev_op, prev_val in constraints:
-                    if prev_var == var_name:
-                        self._check_shadowing(curr, var_name, prev_op, prev_val, op, val)
-                constraints.append(comp)
+            if curr is not node:
+                self._chain_members.add(curr)
+            extracted = condition_ranges(curr.test)
+            if extracted is not None and not extracted[1].is_empty():
+                var_name, ranges = extracted
+                seen = covered.setdefault(var_name, IntervalSet())
+                indices = seen.covers(ranges)
+                if indices is not None:
+                    self._report_shadowed(curr, var_name, seen, indices)
+                else:
+                    simple = _simple_comparison(curr.test)
+                    for interval in ranges.intervals:
+                        seen.add(interval, simple if len(ranges.intervals) == 1 else None)
 
             # 次の elif (orelse 内の唯一の If) へ移動
             curr = curr.orelse[0] if (len(curr.orelse) == 1 and isinstance(curr.orelse[0], ast.If)) else None
 
-    def _try_extract_comparison(self, test):
-        """単純な '変数 op 定数' の比較式 (var op constant) を抽出する"""
-        if (isinstance(test, ast.Compare) and len(test.ops) == 1 and
-            isinstance(test.left, ast.Name) and isinstance(test.comparators[0], ast.Constant) and
-            isinstance(test.comparators[0].value, (int, float))):
-            return test.left.id, test.ops[0], test.comparators[0].value
-        return None
-
-    def _check_shadowing(self, node, var, prev_op, prev_val, curr_op, curr_val):
-        """特定の演算パターンにおける shadowing (条件の包含) を検知する"""
-        # パターン: if x <= 5000: ... elif x <= 2000: ...
-        if isinstance(prev_op, ast.LtE) and isinstance(curr_op, (ast.LtE, ast.Lt)):
-            if prev_val >= curr_val:
-                self.context.add_warning(node, f"Logic Inconsistency: condition '{var} {type(curr_op).__name__} {curr_val}' is unreachable because it is shadowed by a previous '{var} <= {prev_val}'")
-        
-        # パターン: if x >= 2000: ... elif x >= 5000: ...
-        elif isinstance(prev_op, ast.GtE) and isinstance(curr_op, (ast.GtE, ast.Gt)):
-            if prev_val <= curr_val:
-                self.context.add_warning(node, f"Logic Inconsistency: condition '{var} {type(curr_op).__name__} {curr_val}' is unreachable because it is shadowed by a previous '{var} >= {prev_val}'")
+    def _report_shadowed(self, node, var, seen, indices):
+        """到達しない分岐を報告する。1つの前の条件だけで覆われる場合はその条件を示す"""
+        simple = _simple_comparison(node.test)
+        source = seen.sources[indices[0]] if len(indices) == 1 else None
+        if simple is not None and source is not None:
+            op, value = simple
+            prev_op, prev_value = source
+            self.context.report("unreachable-branch", node, var=var, op=_OP_SYMBOLS[op], value=value,
+                                prev_op=_OP_SYMBOLS[prev_op], prev_value=prev_value)
+        else:
+            self.context.report("unreachable-condition", node, condition=_short_source(node.test),
+                                var=var, covered=seen.describe(indices))
+
+    def _guard_map(self):
+        """現在の関数の GuardMap。除算を含む関数についてだけ、1回だけ構築する"""
+        if self._guards is None:
+            self._guards = GuardMap(self._function_node)
+        return self._guards
+
+    def _interval_analysis(self):
+        """現在の関数の区間解析。除算の検査か関数の終わりで、関数ごとに1回だけ行う"""
+        if self._intervals is None:
+            self._intervals = IntervalAnalysis(self._function_node)
+        return self._intervals
 
     def visit_BinOp(self, node):
         """Heuristic to detect division operations and verify safety guards."""
+        if isinstance(node.op, ast.Div):
+            self._uses_float = True
         if isinstance(node.op, (ast.Div, ast.FloorDiv)):
+            if self.current_function:
+                self.context.functions[self.current_function].divisions.append(node)
             if isinstance(node.right, ast.Constant) and node.right.value == 0:
-                self.context.add_warning(node, "Potential division by zero detected.")
-            elif isinstance(node.right, ast.Name):
+                self.context.report("division-by-zero", node)
+            elif isinstance(node.right, ast.Name) and self.context.wants("unguarded-division"):
                 # ガード条件の有無（preconditions）を確認する
                 guarded = False
                 if self.current_function:
-                    meta = self.context.functions.get(self.current_function, {})
-                    preconds = meta.get("preconditions", [])
-                    # 定理の場合、被検証関数のpreconditionsも確認する
-                    if self.current_function.startswith(("verify_", "theorem_")):
-                        target_name = self.current_function.replace("verify_", "").replace("theorem_", "")
-                        target_meta = self.context.functions.get(target_name, {})
-                        preconds = target_meta.get("preconditions", [])
-                    
+                    # 定理の場合は被検証関数のpreconditionsを確認する
+                    preconds = self.context.preconditions.conditions(self.current_function)
                     for cond in preconds:
                         if isinstance(cond, ast.Compare) and len(cond.ops) == 1:
                             left = cond.left
@@ -186,6 +364,41 @@ class SafetyAnalyzer(ast.NodeVisitor):
                                     if isinstance(right, ast.Constant) and right.value == 0:
                                         guarded = True
                                         break
+                    # 分岐・早期 return・and / 三項演算子の条件で 0 でないことが分かるか
+                    if not guarded:
+                        guarded = self._guard_map().is_nonzero(node, node.right.id)
+                    # 代入・分岐・ループから求めた除数の範囲が 0 を含まないか
+                    if not guarded:
+                        intervals = self._interval_analysis()
+                        if intervals.definitely_zero(node):
+                            self.context.report("division-by-zero", node)
+                            guarded = True
+                        else:
+                            guarded = intervals.excludes_zero(node)
                 if not guarded:
-                    self.context.add_warning(node, f"Division by variable '{node.right.id}' requires safety proof.")
-        self.generic_visit(node)
\ No newline at end of file
+                    self.context.report("unguarded-division", node, divisor=node.right.id)
+            elif (self.current_function and not isinstance(node.right, (ast.Constant, ast.Name))
+                  and self.context.wants("division-by-zero")):
+                # 式の除数は、範囲から常に 0 になると分かる場合だけ警告する
+                if self._interval_analysis().definitely_zero(node):
+                    self.context.report("division-by-zero", node)
+        self.generic_visit(node)
+
+_OP_SYMBOLS = {ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">=", ast.Eq: "==", ast.NotEq: "!="}
+
+def _simple_comparison(test):
+    """'変数 op 定数' の比較式なら (演算子の型, 定数)"""
+    if (isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.left, ast.Name)
+            and type(test.ops[0]) in _OP_SYMBOLS):
+        value = numeric_constant(test.comparators[0])
+        if value is not None:
+            return type(test.ops[0]), value
+    return None
+
+def _short_source(node, limit=40):
+    """警告に表示する式のソース（長い場合は省略する）"""
+    try:
+        text = ast.unparse(node)
+    except RecursionError:
+        return "..."
+    return text if len(text) <= limit else text[:limit - 3] + "..."
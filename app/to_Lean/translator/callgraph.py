@@ -0,0 +1,243 @@
+import ast
+import heapq
+from .. import types
+
+class CallGraph:
+    """
+    モジュールのトップレベル宣言の依存グラフ（呼び出し・型注釈などによる名前の参照）。
+
+    役割:
+    - 各宣言が参照する関数・クラスから辺を張り、強連結成分 (Tarjan法) を求める。
+    - 自己再帰と相互再帰を判定する（相互再帰の成分は Lean の `mutual ... end` にまとめる）。
+    - 成分を依存先が先に来る順（トポロジカル順）に並べる。依存のない宣言同士はソース順を保つ。
+    - layers() で、互いに依存しない成分の層を返す（同じ層の成分は並列に検査できる）。
+    ASTノードは保持せず、名前と添字だけを持つ。
+    """
+    def __init__(self, declarations):
+        # declarations: トップレベルの文ごとの (定義する名前の集合, 参照する名前の集合)
+        n = len(declarations)
+        self.names = [None] * n
+        providers = {}
+        for i, (defined, _) in enumerate(declarations):
+            for name in defined:
+                providers.setdefault(name, []).append(i)
+                self.names[i] = name
+        self.edges = [[] for _ in range(n)]
+        self.self_loops = set()
+        for i, (defined, refs) in enumerate(declarations):
+            targets = set()
+            for name in refs:
+                j = i if name in defined else _provider(providers.get(name), i)
+                if j is not None:
+                    targets.add(j)
+            if i in targets:
+                self.self_loops.add(i)
+            self.edges[i] = sorted(targets)
+        self.components, self.component_of = _strongly_connected(self.edges)
+        self._order = None
+
+    @classmethod
+    def from_module(cls, stmts):
+        """トップレベルの文のリストからグラフを作る"""
+        return cls([declaration_refs(stmt) for stmt in stmts])
+
+    def is_recursive(self, i):
+        """宣言 i が自分自身へ戻る参照を持つか（自己再帰または相互再帰）"""
+        return i in self.self_loops or len(self.components[self.component_of[i]]) > 1
+
+    def is_mutual(self, component):
+        """成分が複数の宣言からなる（mutual ブロックにまとめる）か"""
+        return len(self.components[component]) > 1
+
+    def dependencies(self, component):
+        """成分が直接依存する他の成分の集合"""
+        members = self.components[component]
+        return {self.component_of[j] for i in members for j in self.edges[i]} - {component}
+
+    def order(self):
+        """
+        成分の添字を、依存先が先に来る順に並べたリスト。
+        同時に出力できる成分の中では、ソース上で先に現れるものを優先する。
+        """
+        if self._order is None:
+            count = len(self.components)
+            indegree = [0] * count
+            dependents = [[] for _ in range(count)]
+            for c in range(count):
+                for d in self.dependencies(c):
+                    indegree[c] += 1
+                    dependents[d].append(c)
+            ready = [(self.components[c][0], c) for c in range(count) if not indegree[c]]
+            heapq.heapify(ready)
+            order = []
+            while ready:
+                _, c = heapq.heappop(ready)
+                order.append(c)
+                for e in dependents[c]:
+                    indegree[e] -= 1
+                    if not indegree[e]:
+                        heapq.heappush(ready, (self.components[e][0], e))
+            self._order = order
+        return self._order
+
+    def layers(self):
+        """
+        成分を依存の深さごとにまとめたリスト。各層の成分は、それより前の層にだけ依存する。
+        同じ層の成分は互いに独立しているため、別々のプロセスで並列に検査できる。
+        """
+        depth = {}
+        layers = []
+        for c in self.order():
+            level = max((depth[d] + 1 for d in self.dependencies(c)), default=0)
+            depth[c] = level
+            if level == len(layers):
+                layers.append([])
+            layers[level].append(c)
+        return layers
+
+    def annotate(self, stmts, context):
+        """
+        再帰する関数の FunctionInfo に is_recursive と停止性の注釈 (hint) を設定する。
+        stmts はグラフを作ったトップレベルの文のリスト。
+        """
+        for members in self.components:
+            if len(members) == 1 and members[0] not in self.self_loops:
+                continue
+            funcs = [stmts[i] for i in members if isinstance(stmts[i], ast.FunctionDef)]
+            hints = termination_hints(funcs)
+            for func in funcs:
+                info = context.functions.get(func.name)
+                if info is not None:
+                    info.is_recursive = True
+                    info.hint = hints.get(func.name)
+
+def declaration_refs(stmt):
+    """トップレベルの文が定義する名前と、参照する名前（関数自身の仮引数を除く）"""
+    defined = {stmt.name} if isinstance(stmt, (ast.FunctionDef, ast.ClassDef)) else set()
+    refs = {node.id for node in ast.walk(stmt) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)}
+    if isinstance(stmt, ast.FunctionDef):
+        refs -= {arg.arg for arg in stmt.args.args}
+    return defined, refs
+
+def termination_hints(funcs):
+    """
+    同じ強連結成分の関数について、停止性の注釈 (termination_by の式) を推定する。
+    成分内への呼び出しの各引数を、同じ位置の仮引数と比べて「減る」(n - 1, n // 2, xs[1:]) か
+    「そのまま」か分類し、辞書式の順序で全呼び出しが減る位置の列を探す (ackermann(m - 1, ...), ackermann(m, n - 1))。
+    見つからなければ空の辞書を返す。
+    """
+    if not funcs:
+        return {}
+    members = {func.name for func in funcs}
+    calls = []
+    for func in funcs:
+        params = [arg.arg for arg in func.args.args]
+        for node in ast.walk(func):
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in members:
+                calls.append({k: _decrease(arg, params[k]) for k, arg in enumerate(node.args[:len(params)])})
+    arity = min(len(func.args.args) for func in funcs)
+    measure, kinds = [], {}
+    while calls:
+        for k in range(arity):
+            if k in kinds:
+                continue
+            marks = [call.get(k) for call in calls]
+            decreasing = {m for m in marks if m not in (None, "same")}
+            if len(decreasing) == 1 and None not in marks:
+                kinds[k] = decreasing.pop()
+                measure.append(k)
+                calls = [call for call in calls if call.get(k) == "same"]
+                break
+        else:
+            return {}
+    if not measure:
+        return {}
+    hints = {}
+    for func in funcs:
+        terms = [_measure(func.args.args[k], kinds[k]) for k in measure]
+        hints[func.name] = terms[0] if len(terms) == 1 else f"({', '.join(terms)})"
+    return hints
+
+def _decrease(expr, param):
+    """
+    expr が仮引数 param より真に小さい値なら減少の種類 ("int" / "list")、
+    param そのものなら "same"、どちらでもなければ None
+    """
+    if isinstance(expr, ast.Name) and expr.id == param:
+        return "same"
+    if isinstance(expr, ast.BinOp) and isinstance(expr.left, ast.Name) and expr.left.id == param:
+        right = expr.right
+        if isinstance(right, ast.Constant) and type(right.value) is int:
+            if isinstance(expr.op, ast.Sub) and right.value > 0:
+                return "int"
+            if isinstance(expr.op, ast.FloorDiv) and right.value > 1:
+                return "int"
+    if (isinstance(expr, ast.Subscript) and isinstance(expr.value, ast.Name) and expr.value.id == param
+            and isinstance(expr.slice, ast.Slice) and expr.slice.upper is None and expr.slice.step is None
+            and isinstance(expr.slice.lower, ast.Constant) and type(expr.slice.lower.value) is int
+            and expr.slice.lower.value > 0):
+        return "list"
+    return None
+
+def _measure(arg, kind):
+    """仮引数の型と減少の種類から、Nat の値になる停止性の尺度を作る"""
+    if kind == "list":
+        return f"{arg.arg}.length"
+    return arg.arg if types.translate_type(arg.annotation) == "Nat" else f"{arg.arg}.toNat"
+
+def _provider(candidates, i):
+    """名前の定義元: i より前の最後の定義、なければ i より後の最初の定義"""
+    if not candidates:
+        return None
+    before = [j for j in candidates if j < i]
+    return before[-1] if before else candidates[0]
+
+def _strongly_connected(edges):
+    """
+    Tarjan法（再帰を使わない版）で強連結成分を求める。
+    (成分のリスト（各成分は添字の昇順）, 添字 -> 成分番号) を返す。
+    """
+    n = len(edges)
+    index = [None] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack, components = [], []
+    component_of = [None] * n
+    counter = 0
+    for root in range(n):
+        if index[root] is not None:
+            continue
+        work = [(root, 0)]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            v, k = work[-1]
+            if k < len(edges[v]):
+                work[-1] = (v, k + 1)
+                w = edges[v][k]
+                if index[w] is None:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, 0))
+                elif on_stack[w]:
+                    low[v] = min(low[v], index[w])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+            if low[v] == index[v]:
+                members = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component_of[w] = len(components)
+                    members.append(w)
+                    if w == v:
+                        break
+                components.append(sorted(members))
+    return components, component_of
@@ -31,4 +31,7 @@ COMP_OPS = {
     ast.GtE: ">=",
 }
 
-DOC_TEMPLATE = "/-- {doc} -/"
\ No newline at end of file
+DOC_TEMPLATE = "/-- {doc} -/"
+
+# 翻訳器の出力形式のバージョン（キャッシュキーに含め、変換ロジック変更時に古い結果を無効化する）
+TRANSLATOR_VERSION = "0.9.2"
@@ -1,5 +1,10 @@
 import ast
-from ..emitter import LeanEmitter
+from ..emitter import LeanEmitter, BufferedLeanEmitter
+from .preconditions import PreconditionIndex
+from .diagnostics import Diagnostic, WARNING
+from .pool import RatPool
+from .obligations import Obligation
+from . import marks
 
 class TranslationContext:
     """
@@ -11,13 +16,114 @@ class TranslationContext:
     - 解析フェーズ(SafetyAnalyzer)と生成フェーズ(LeanTranslator)の間での情報共有。
     - LeanEmitterのインスタンスを保持し、コード生成の土台を提供する。
     """
-    def __init__(self):
-        self.warnings = []
+    def __init__(self, buffered=False, max_per_code=None, pool_threshold=None, preamble=None):
+        # LeanEmitter は context を必要とする。buffered=True ではブロックを断片として組み立てる
+        self.emitter = BufferedLeanEmitter(self) if buffered else LeanEmitter(self)
+        # 同じ種類の診断を1ファイルで記録する上限（None は無制限）
+        self.max_per_code = max_per_code
+        # 繰り返し現れる小数リテラルをまとめる定数プール（変換の開始時に literals から決める。pool_threshold が None なら使わない）
+        self.rat_pool = RatPool(pool_threshold)
+        # 出力の先頭に置くもの: None (なし) / "inline" (使うヘルパーの定義) / "import" (共有プレリュードの import)
+        self.preamble = preamble
+        # 真なら、変換結果に文と証明責務の位置の目印 (marks.py) を埋め込む（検査・証明の段階が使う）
+        self.marks = False
+        self.reset()
+        # 今後、型情報、変数スコープ、ユーザー定義型などの情報をここに追加する
+
+    def reset(self):
+        """モジュール単位の情報を破棄する。以前に返した warnings リストは変更しない"""
+        self.diagnostics = []
+        # 上限を超えて記録しなかった診断の件数 (コード -> 件数)
+        self.suppressed = {}
+        self._warnings = []
+        self._seen = set()
+        self._counts = {}
         self.errors = []
         self.functions = {}
         self.classes = {}
-        self.emitter = LeanEmitter(self) # LeanEmitter は context を必要とする
-        # 今後、型情報、変数スコープ、ユーザー定義型などの情報をここに追加する
+        # 関数名 -> FunctionInfo, クラス名 -> ClassInfo (symbols.py)
+        # for ループのノード -> LoopInfo (functions[...].loops の要素と同じオブジェクト)
+        self.loops = {}
+        # 正規化した事前条件の索引（呼び出し箇所での仮定の照合などに使う）
+        self.preconditions = PreconditionIndex(self)
+        # 小数リテラルの値 -> 出現回数（定数プールの対象を決める）
+        self.literals = {}
+        # モジュールで使われている識別子（定数プールの名前と衝突させない）
+        self.identifiers = set()
+        # 変換結果が使う preamble のヘルパー名 (py_div, Rat など)。ハンドラが変換時に記録する
+        self.helpers = set()
+        # 証明責務 ((種類, id(ノード), 部分) -> Obligation)。変換時に記録し、同じノードの再変換では上書きする
+        self.obligations = {}
+        # 目印を置いた証明責務のキー（目印の番号が添字）
+        self.marked = []
+        # トップレベル宣言の依存グラフ (callgraph.CallGraph)。モジュール全体の解析後に作る
+        self.call_graph = None
+
+    def release_ast(self):
+        """
+        解析結果が保持する ASTノードへの参照を手放す（変換後に呼ぶ）。
+        関数名・引数・警告は残るが、事前条件やループの情報は失われる。
+        """
+        for info in self.functions.values():
+            info.release_ast()
+        self.loops = {}
+        self.preconditions = PreconditionIndex(self)
+
+    @property
+    def warnings(self):
+        """従来の警告文字列のリスト。診断の文字列化はここで初めて行う"""
+        formatted = self._warnings
+        if len(formatted) < len(self.diagnostics):
+            formatted.extend(str(d) for d in self.diagnostics[len(formatted):])
+        return formatted
+
+    def use_helper(self, name):
+        """変換結果がプリアンブルのヘルパー name を必要とすることを記録する"""
+        self.helpers.add(name)
+
+    def add_obligation(self, kind, node, declaration, goal, detail=(), part=None, source=None):
+        """
+        変換結果に残した証明責務 (by sorry など) を記録する。source は ID の元にする命題の Python の式（省略時は goal）。
+        marks が真なら、その責務の `by sorry` の直前に置く目印を返す（偽なら空文字列）
+        """
+        key = (kind, id(node), part)
+        self.obligations[key] = Obligation.at_node(kind, node, declaration, str(goal), detail, source)
+        if not self.marks:
+            return ""
+        self.marked.append(key)
+        return marks.obligation(len(self.marked) - 1)
+
+    def obligation_list(self):
+        """記録した証明責務を出力順に返す"""
+        return list(self.obligations.values())
+
+    def wants(self, code):
+        """code の診断をまだ記録できるか。上限に達した種類の検査は省略してよい"""
+        return self.max_per_code is None or self._counts.get(code, 0) < self.max_per_code
+
+    def add_diagnostic(self, diagnostic: Diagnostic):
+        """診断を追加する。同じ位置・内容の重複と、上限を超えた分は記録しない"""
+        key = diagnostic.key()
+        if key in self._seen:
+            return False
+        code = diagnostic.code
+        if not self.wants(code):
+            self.suppressed[code] = self.suppressed.get(code, 0) + 1
+            return False
+        self._seen.add(key)
+        self._counts[code] = self._counts.get(code, 0) + 1
+        self.diagnostics.append(diagnostic)
+        return True
+
+    def report(self, code: str, node: ast.AST, **args):
+        """diagnostics.MESSAGES に登録された種類の診断をノードの位置で追加する"""
+        return self.add_diagnostic(Diagnostic.at_node(code, node, **args))
 
     def add_warning(self, node: ast.AST, message: str):
-        self.warnings.append(f"Warning at line {node.lineno}: {message}")
\ No newline at end of file
+        self.add_diagnostic(Diagnostic(None, WARNING, node.lineno, getattr(node, "col_offset", None),
+                                       getattr(node, "end_lineno", None), getattr(node, "end_col_offset", None),
+                                       message))
+
+    def add_warning_at(self, lineno: int, message: str):
+        """行番号を直接指定して警告を追加する"""
+        self.add_diagnostic(Diagnostic(None, WARNING, lineno, template=message))
\ No newline at end of file
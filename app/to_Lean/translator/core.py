@@ -1,6 +1,11 @@
 import ast
-from .. import types, handlers
+from .. import types, handlers, preamble
 from . import constants
+from .callgraph import CallGraph
+from . import marks, obligations
+from ..emitter import LeanFragment
+
+_MISSING = object()
 
 class LeanTranslator(ast.NodeVisitor):
     """
@@ -11,60 +16,203 @@ class LeanTranslator(ast.NodeVisitor):
     - 制御構造（If, Forなど）や関数定義の構造をLeanの構文へと再構成する。
     - 型変換や演算子のマッピングを統合し、最終的なLeanコードの断片を組み立てる。
     """
+    # ASTノードタイプとハンドラの対応表（クラス定義時に一度だけ構築し、全インスタンスで共有する）
+    DISPATCH = {
+        ast.Constant: lambda n, v: (
+            v.emitter.format_rat_constant(n.value)
+            if isinstance(n.value, float)
+            else v.emitter.format_constant(n.value)
+        ),
+        ast.Name: lambda n, v: n.id,
+        ast.Attribute: lambda n, v: v.emitter.format_attribute(v._v(n.value), n.attr),
+        ast.Return: lambda n, v: v._v(n.value),
+        ast.Expr: lambda n, v: v._v(n.value),
+        ast.Assign: lambda n, v: v.emitter.format_assign(v._v(n.targets[0]), v._v(n.value)),
+        ast.AugAssign: lambda n, v: handlers.StatementHandler.handle_aug_assign(v, n),
+        ast.Assert: lambda n, v: v.visit_Assert(n),
+        ast.Pass: lambda n, v: "()",
+        ast.IfExp: lambda n, v: v.emitter.format_if_exp(v._v(n.test), v._v(n.body), v._v(n.orelse)),
+        ast.List: lambda n, v: v.emitter.format_collection([v._v(e) for e in n.elts]),
+        ast.Tuple: lambda n, v: v.emitter.format_collection([v._v(e) for e in n.elts], "(", ")"),
+        ast.BinOp: lambda n, v: handlers.ExpressionHandler.handle_op(v, n),
+        ast.UnaryOp: lambda n, v: handlers.ExpressionHandler.handle_op(v, n),
+        ast.BoolOp: lambda n, v: handlers.ExpressionHandler.handle_op(v, n),
+        ast.Compare: lambda n, v: handlers.ExpressionHandler.handle_op(v, n),
+        ast.If: lambda n, v: handlers.StatementHandler.handle_if(v, n),
+        ast.FunctionDef: lambda n, v: v.visit_FunctionDef(n, v),
+        ast.For: lambda n, v: v.visit_For(n, v),
+        ast.ClassDef: lambda n, v: handlers.StatementHandler.handle_class_def(v, n),
+        ast.Call: lambda n, v: handlers.ExpressionHandler.handle_call(v, n),
+        ast.ListComp: lambda n, v: handlers.ExpressionHandler.handle_list_comp(v, n),
+    }
+
+    # 事前の後順変換で内側へ降りないノード
+    BARRIER_TYPES = (ast.FunctionDef, ast.ClassDef, ast.For)
+    # 変換結果が翻訳器の状態に依存しない式（Call は呼び出し元の事前条件に依存するため含めない）
+    PURE_TYPES = (ast.Constant, ast.Name, ast.Attribute, ast.BinOp, ast.UnaryOp, ast.BoolOp,
+                  ast.Compare, ast.IfExp, ast.List, ast.Tuple, ast.ListComp)
+
     def __init__(self, context):
+        self.dispatch = self.DISPATCH
+        self.reset(context)
+
+    def reset(self, context):
+        """モジュール単位の状態を初期化し、別のモジュールの変換に再利用できるようにする"""
         self.context = context
+        # LeanEmitter は Lean の構文を文字列フォーマットするクラス（context が保持するものを共有する）
+        self.emitter = context.emitter
         self.current_function = None
         self.assert_count = 0
-        # LeanEmitter は Lean の構文を文字列フォーマットするクラス
-        from ..emitter import LeanEmitter
-        self.emitter = LeanEmitter(context)
-        
-        # ASTノードタイプとハンドラの対応表
-        self.dispatch = {
-            ast.Constant: lambda n, v: (
-                v.emitter.format_rat_constant(n.value) 
-                if isinstance(n.value, float) 
-                else v.emitter.format_constant(n.value)
-            ),
-            ast.Name: lambda n, v: n.id,
-            ast.Attribute: lambda n, v: v.emitter.format_attribute(v._v(n.value), n.attr),
-            ast.Return: lambda n, v: v._v(n.value),
-            ast.Expr: lambda n, v: v._v(n.value),
-            ast.Assign: lambda n, v: v.emitter.format_assign(v._v(n.targets[0]), v._v(n.value)),
-            ast.AugAssign: lambda n, v: handlers.StatementHandler.handle_aug_assign(v, n),
-            ast.Assert: lambda n, v: v.visit_Assert(n),
-            ast.Pass: lambda n, v: "()",
-            ast.IfExp: lambda n, v: v.emitter.format_if_exp(v._v(n.test), v._v(n.body), v._v(n.orelse)),
-            ast.List: lambda n, v: v.emitter.format_collection([v._v(e) for e in n.elts]),
-            ast.Tuple: lambda n, v: v.emitter.format_collection([v._v(e) for e in n.elts], "(", ")"),
-            ast.BinOp: lambda n, v: handlers.ExpressionHandler.handle_op(v, n),
-            ast.UnaryOp: lambda n, v: handlers.ExpressionHandler.handle_op(v, n),
-            ast.BoolOp: lambda n, v: handlers.ExpressionHandler.handle_op(v, n),
-            ast.Compare: lambda n, v: handlers.ExpressionHandler.handle_op(v, n),
-            ast.If: lambda n, v: handlers.StatementHandler.handle_if(v, n),
-            ast.FunctionDef: self.visit_FunctionDef,
-            ast.For: self.visit_For,
-            ast.ClassDef: lambda n, v: handlers.StatementHandler.handle_class_def(v, n),
-            ast.Call: lambda n, v: handlers.ExpressionHandler.handle_call(v, n),
-            ast.ListComp: lambda n, v: handlers.ExpressionHandler.handle_list_comp(v, n),
-        }
+        self._rendered = {}
+        self._memo = {}
+        # 解析で数えたリテラルの出現回数から、定数プールにまとめる値を決める
+        context.rat_pool.plan(context.literals, context.identifiers)
+
+    def release_ast(self):
+        """変換結果のメモが保持する ASTノードへの参照を手放す"""
+        self._rendered = {}
+        self._memo = {}
 
     def visit_Module(self, node):
         """ルートノード: 全てのステートメントを変換して結合する"""
-        return "\n\n".join(filter(None, [self.visit(stmt) for stmt in node.body]))
+        return "\n\n".join(text for _, text in self.iter_module(node))
+
+    def iter_module(self, node):
+        """
+        トップレベルの文を1つずつ変換し、(文, Leanコード) を生成順に返す。空の結果は除く。
+        定数プールの定義があれば、最初に (None, 定義) として返す。
+        文は依存先が先に来る順に並べ、相互再帰の宣言は (文のタプル, mutual ブロック) として1つにまとめる。
+        """
+        for stmts, text in self.iter_groups(node):
+            if text:
+                yield (None if not stmts else stmts[0] if len(stmts) == 1 else tuple(stmts)), text
+
+    def iter_groups(self, node):
+        """
+        依存グラフの成分ごとに、(文のリスト（ソース順）, Leanコード) を出力順に返す。空の結果も返す。
+        プリアンブル (context.preamble) と定数プールの定義があれば、最初に ([], 定義) として返す。
+        解析済みのグラフ (context.call_graph) がこのモジュールのものでなければ、ここで作り直す。
+        """
+        context = self.context
+        definitions = context.rat_pool.definitions()
+        if definitions:
+            context.use_helper("Rat")
+        components = self._iter_components(node)
+        if context.preamble == "inline":
+            # 使うヘルパーは変換し終えるまで分からないため、先にすべての宣言を変換する
+            components = list(components)
+        head = preamble.header(context.helpers, context.preamble)
+        if head:
+            yield [], head
+        if definitions:
+            yield [], definitions
+        yield from components
+
+    def _iter_components(self, node):
+        body = node.body
+        graph = self.context.call_graph
+        if graph is None or len(graph.names) != len(body):
+            graph = CallGraph.from_module(body)
+        for c in graph.order():
+            stmts = [body[i] for i in graph.components[c]]
+            if not graph.is_mutual(c):
+                yield stmts, self.translate(stmts[0])
+                continue
+            texts = [self.translate(stmt) for stmt in stmts]
+            yield stmts, self.emitter.format_mutual([t for t in texts if t])
+
+    def translate(self, node):
+        """ノードを変換する。BufferedLeanEmitter の断片はここで一度だけ文字列に平坦化する"""
+        res = self.visit(node)
+        return str(res) if isinstance(res, LeanFragment) else res
 
     def visit(self, node):
-        """ノードの種類に応じてハンドラを呼び出す"""
+        """
+        ノードの種類に応じてハンドラを呼び出す。
+        深い式（長い a + b + ...）や長い elif の連鎖で再帰が深くならないよう、
+        子孫ノードを先に後順で変換しておき、ハンドラからの再帰呼び出しは結果の参照で済ませる。
+        副作用のない式の変換結果はモジュールの変換が終わるまで保持し、同じ部分木を2度変換しない。
+        """
+        rendered = self._rendered.pop(node, _MISSING)
+        if rendered is _MISSING:
+            rendered = self._memo.get(node, _MISSING)
+        if rendered is not _MISSING:
+            return rendered
+        if not isinstance(node, (ast.expr, ast.stmt)) or isinstance(node, self.BARRIER_TYPES):
+            return self._dispatch(node)
+        added = []
+        try:
+            self._prerender(node, added)
+            rendered = self._rendered.pop(node, _MISSING)
+            return self._memo[node] if rendered is _MISSING else rendered
+        finally:
+            for key in added:
+                self._rendered.pop(key, None)
+
+    def _dispatch(self, node):
         handler = self.dispatch.get(type(node))
-        if handler:
-            return handler(node, self)
-        return super().visit(node)
+        res = handler(node, self) if handler else super().visit(node)
+        if (self.context.marks and isinstance(node, ast.stmt)
+                and (isinstance(res, LeanFragment) or isinstance(res, str) and res.strip())):
+            # 文の変換結果の先頭に Python の行の目印を置く（検査で Lean の行を Python の行に対応づける）
+            res = marks.statement(node.lineno) + res
+        return res
+
+    def _prerender(self, root, added):
+        """
+        root を含む部分木の式・文を後順（ソース順）に変換する。
+        純粋な式（PURE_TYPES のみからなる部分木）の結果は self._memo に、それ以外は self._rendered に格納し、
+        self._rendered に格納したキーを added に追加する。
+        関数・クラス・ループの内側は変換時の状態（current_function など）に依存するため、
+        そのノード自体は変換するが内側へは降りない。
+        """
+        impure = set()
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not expanded:
+                if node in self._memo:
+                    continue
+                if node is not root and isinstance(node, self.BARRIER_TYPES):
+                    self._rendered[node] = self._dispatch(node)
+                    added.append(node)
+                    impure.add(node)
+                    continue
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(list(ast.iter_child_nodes(node))))
+                continue
+            pure = not isinstance(node, ast.stmt) and (not isinstance(node, ast.expr) or isinstance(node, self.PURE_TYPES))
+            if pure:
+                pure = not any(child in impure for child in ast.iter_child_nodes(node))
+            if not pure:
+                impure.add(node)
+            if isinstance(node, (ast.expr, ast.stmt)):
+                text = self._dispatch(node)
+                if pure:
+                    self._memo[node] = text
+                else:
+                    self._rendered[node] = text
+                    added.append(node)
 
     def visit_Assert(self, node):
         """一般のアサーションの変換"""
         label = f"h_assert_{self.assert_count}"
         self.assert_count += 1
-        return self.emitter.format_assert(self._v(node.test), label)
+        test = self._v(node.test)
+        mark = self.context.add_obligation(obligations.ASSERT, node, self.current_function, test,
+                                           source=_source(node.test))
+        return self.emitter.format_assert(test, label, proof=f"{mark}by sorry")
+
+    def record_call_obligation(self, node, callee, index):
+        """
+        呼び出し先 callee の index 番目の事前条件を (by sorry) で渡したことを証明責務として記録し、
+        `by sorry` の直前に置く目印を返す
+        """
+        cond = self.context.functions[callee].preconditions[index]
+        params = self.context.functions[callee].params
+        bindings = ", ".join(f"{p} := {_source(a)}" for p, a in zip(params, node.args))
+        return self.context.add_obligation(obligations.PRECONDITION, node, self.current_function, _source(cond),
+                                           (("callee", callee), ("arguments", bindings)), part=index)
 
     def _v(self, node):
         """再帰的な visit のエイリアス"""
@@ -88,20 +236,16 @@ class LeanTranslator(ast.NodeVisitor):
             return self._unsupported(node, "Loop outside of function scope")
 
         # 1. 解析フェーズで取得した状態変数の情報を引き出す
-        loop_info = None
-        func_meta = self.context.functions.get(self.current_function, {})
-        for info in func_meta.get("loop_info", []):
-            if info["node"] == node:
-                loop_info = info
-                break
+        loop_info = self.context.loops.get(node)
 
         if not loop_info or not (isinstance(node.iter, ast.Call) and getattr(node.iter.func, 'id', '') == 'range'):
             return self._unsupported(node, "Only simple 'for i in range(n)' loops are supported for recursion conversion")
 
-        state_vars = loop_info["state_vars"]  # ['balance'] など
+        state_vars = loop_info.state_vars  # ['balance'] など
         limit_expr = self._v(node.iter.args[0])
         
         # 2. 引数リスト、戻り値の型、およびベースケースの戻り値を構築
+        self.context.use_helper("Rat")
         typed_args = " ".join([f"({var} : Rat)" for var in state_vars])
         current_state_args = " ".join(state_vars)
         
@@ -116,17 +260,6 @@ class LeanTranslator(ast.NodeVisitor):
         # Pythonの副作用（代入）は、Leanでは let 式の連続として表現される
         body_lines = [self._v(stmt) for stmt in node.body]
         
-        # 4. Lean 4 の let rec 構文を組み立てる
-        # ステップ 4: ベースケース（終了条件）の設定
-        res = [
-            f"let rec loop (n : Nat) {typed_args} : {ret_type} :=",
-            f"  if n = 0 then {base_return}",
-            f"  else",
-            f"    {chr(10).join(['    ' + line for line in body_lines])}",
-            f"    loop (n - 1) {current_state_args}",
-            f"  termination_by n"
-        ]
-        
         # 初期呼び出しと状態のバインド
         # ステップ 5: 停止性の保証と型の整合性 (Int -> Nat)
         res_call = f"loop ({limit_expr}).toNat {current_state_args}"
@@ -135,7 +268,9 @@ class LeanTranslator(ast.NodeVisitor):
         else:
             binding = f"let ({', '.join(state_vars)}) := {res_call};"
 
-        return "\n".join(res) + "\n" + binding
+        # 4. Lean 4 の let rec 構文を組み立てる
+        # ステップ 4: ベースケース（終了条件）の設定は emitter 側で行う
+        return self.emitter.format_loop(typed_args, ret_type, base_return, body_lines, current_state_args, binding)
 
     def _wrap(self, node, trigger_types=(ast.IfExp, ast.BinOp)):
         """必要に応じて括弧で囲む補助関数"""
@@ -160,15 +295,7 @@ class LeanTranslator(ast.NodeVisitor):
 
     def _format_preconditions(self, func_name):
         """関数の事前条件（定理の場合は被検証関数の事前条件）を Lean の引数形式で結合する"""
-        meta = self.context.functions.get(func_name, {})
-        preconds = meta.get("preconditions", [])
-        
-        is_thm = func_name.startswith(("verify_", "theorem_"))
-        if is_thm:
-            target_name = func_name.replace("verify_", "").replace("theorem_", "")
-            target_meta = self.context.functions.get(target_name, {})
-            preconds = target_meta.get("preconditions", [])
-
+        preconds = self.context.preconditions.conditions(func_name)
         formatted = []
         for i, cond_node in enumerate(preconds):
             cond_str = self._v(cond_node)
@@ -184,7 +311,7 @@ class LeanTranslator(ast.NodeVisitor):
         if precond_args:
             args = f"{args} {precond_args}".strip()
 
-        preconds = meta.get("preconditions", [])
+        preconds = meta.preconditions
         # 事前条件に該当する assert は本体の変換対象から除外する
         body_stmts = [s for s in stmts if not (isinstance(s, ast.Assert) and s.test in preconds)]
         body_lines = [self._v(s) for s in body_stmts] or ["sorry"]
@@ -194,29 +321,57 @@ class LeanTranslator(ast.NodeVisitor):
             if body_stmts:
                 is_ret = isinstance(body_stmts[-1], ast.Return)
                 prop = self._v(body_stmts[-1].value) if is_ret else "True"
+                prop_source = _source(body_stmts[-1].value) if is_ret else "True"
                 if is_ret:
                     body_lines = body_lines[:-1]
             else:
                 is_ret = False
-                prop = "True"
+                prop = prop_source = "True"
 
             # 証明の本体が空になった場合（Returnしかなかった場合など）、デフォルトとして "rfl" を補う
             if not body_lines:
                 body_lines = ["rfl"]
+            proof = [line for line in body_lines if not (isinstance(line, str) and not line.strip())]
+            mark = ""
+            if proof != ["rfl"]:
+                mark = self.context.add_obligation(obligations.THEOREM, node, node.name, prop, source=prop_source)
 
-            return self.emitter.format_theorem(node.name, args, prop, body_lines, doc)
+            return self.emitter.format_theorem(node.name, args, prop, body_lines, doc, proof=f"{mark}by sorry")
         else:
+            if meta.is_recursive:
+                self.context.add_obligation(obligations.TERMINATION, node, node.name, meta.hint or "")
             return self.emitter.format_function(
                 node.name, args, types.translate_type(node.returns, self.context), body_lines,
                 doc=doc,
-                termination_hint=meta.get("hint"),
-                is_recursive=meta.get("is_recursive", False)
+                termination_hint=meta.hint,
+                is_recursive=meta.is_recursive
             )
 
+def iter_declaration_groups(node, context=None):
+    """モジュールを依存グラフの成分ごとに変換しながら (文のリスト, Leanコード) を出力順に返すジェネレータ"""
+    if context is None:
+        from .context import TranslationContext
+        context = TranslationContext()
+    return LeanTranslator(context).iter_groups(node)
+
+def iter_declarations(node, context=None):
+    """モジュールの各宣言を変換しながら (文, Leanコード) を順に返すジェネレータ"""
+    if context is None:
+        from .context import TranslationContext
+        context = TranslationContext()
+    return LeanTranslator(context).iter_module(node)
+
 def translate_to_lean(node, context=None):
     """ASTノードをLeanコード文字列に変換する"""
     if context is None:
         from .context import TranslationContext
         context = TranslationContext()
     visitor = LeanTranslator(context)
-    return visitor.visit(node)
\ No newline at end of file
+    return visitor.translate(node)
+
+def _source(node):
+    """責務の命題に使う Python の式の文字列"""
+    try:
+        return ast.unparse(node)
+    except RecursionError:
+        return "..."
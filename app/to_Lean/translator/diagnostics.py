@@ -0,0 +1,71 @@
+WARNING = "warning"
+ERROR = "error"
+
+# 診断コード -> (重大度, メッセージのテンプレート)
+MESSAGES = {
+    "missing-else": (WARNING, "Exhaustiveness: Missing 'else' block. In Lean, functions must be exhaustive."),
+    "unreachable-branch": (WARNING, "Logic Inconsistency: condition '{var} {op} {value}' is unreachable "
+                                    "because it is shadowed by a previous '{var} {prev_op} {prev_value}'"),
+    "unreachable-condition": (WARNING, "Logic Inconsistency: condition '{condition}' is unreachable "
+                                       "because earlier branches already cover {var} in {covered}"),
+    "division-by-zero": (WARNING, "Potential division by zero detected."),
+    "unguarded-division": (WARNING, "Division by variable '{divisor}' requires safety proof."),
+    "possible-overflow": (WARNING, "Overflow: '{expr}' may exceed the float range (about 1.8e308)."),
+    "precision-loss": (WARNING, "Precision: '{expr}' may exceed 2**53 in magnitude, "
+                                "where float can no longer represent every integer."),
+}
+
+class Diagnostic:
+    """
+    解析で見つかった問題1件。メッセージは文字列が必要になった時点で組み立てる。
+
+    - code: 診断の種類 (MESSAGES のキー。任意のメッセージの場合は None)
+    - line / col / end_line / end_col: 位置（列は 0 始まり）
+    - args: メッセージのテンプレートに埋め込む値 ((名前, 値) のタプル)
+    """
+    __slots__ = ("code", "severity", "line", "col", "end_line", "end_col", "template", "args")
+
+    def __init__(self, code, severity, line, col=None, end_line=None, end_col=None, template="", args=()):
+        self.code = code
+        self.severity = severity
+        self.line = line
+        self.col = col
+        self.end_line = end_line
+        self.end_col = end_col
+        self.template = template
+        self.args = args
+
+    @classmethod
+    def at_node(cls, code, node, **args):
+        """MESSAGES に登録された診断を、ノードの位置で作る"""
+        severity, template = MESSAGES[code]
+        return cls(code, severity, node.lineno, getattr(node, "col_offset", None),
+                   getattr(node, "end_lineno", None), getattr(node, "end_col_offset", None),
+                   template, tuple(args.items()))
+
+    @property
+    def message(self):
+        return self.template.format(**dict(self.args)) if self.args else self.template
+
+    def key(self):
+        """重複の判定に使うキー"""
+        return (self.code, self.line, self.col, self.end_line, self.end_col, self.template, self.args)
+
+    def shifted(self, offset):
+        """行番号を offset だけずらした複製（差分コンパイルでの再生用）"""
+        return Diagnostic(self.code, self.severity, self.line + offset, self.col,
+                          None if self.end_line is None else self.end_line + offset, self.end_col,
+                          self.template, self.args)
+
+    def to_dict(self):
+        return {
+            "code": self.code, "severity": self.severity, "message": self.message,
+            "line": self.line, "col": self.col, "end_line": self.end_line, "end_col": self.end_col,
+        }
+
+    def __str__(self):
+        """従来の警告文字列の形式"""
+        return f"{self.severity.capitalize()} at line {self.line}: {self.message}"
+
+    def __repr__(self):
+        return f"Diagnostic({self.code!r}, line={self.line}, col={self.col})"
@@ -0,0 +1,244 @@
+import ast
+
+# 比較の左右を入れ替えたときの演算子 (0 < b は b > 0)
+_SWAPPED = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE, ast.Eq: ast.Eq, ast.NotEq: ast.NotEq}
+# 比較を否定したときの演算子 (not (b == 0) は b != 0)
+_NEGATED = {ast.Lt: ast.GtE, ast.LtE: ast.Gt, ast.Gt: ast.LtE, ast.GtE: ast.Lt, ast.Eq: ast.NotEq, ast.NotEq: ast.Eq}
+# 「変数 op 定数」が成り立つとき変数が 0 でないと言える定数の条件
+_EXCLUDES_ZERO = {
+    ast.NotEq: lambda c: c == 0,
+    ast.Eq: lambda c: c != 0,
+    ast.Gt: lambda c: c >= 0,
+    ast.GtE: lambda c: c > 0,
+    ast.Lt: lambda c: c <= 0,
+    ast.LtE: lambda c: c < 0,
+}
+# ブロックの残りを実行せずに抜ける文
+_EXITS = (ast.Return, ast.Raise, ast.Continue, ast.Break)
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)
+_MAX_CONDITION_DEPTH = 50
+
+class GuardMap:
+    """
+    関数1つ分の「親ノード」と「その位置で成り立つ条件」の表。構築は関数の大きさに比例する。
+
+    役割:
+    - 各ノードの親と、親のどのフィールドにあるか (if の本体 / else、and の何番目か) を記録する。
+    - ブロック内の各文について、それより前の文から分かる条件（早期 return した if の否定、assert）を連結リストで持つ。
+    - 変数ごとに最後に代入された位置を記録し、条件の後で書き換えられる変数についての条件は使わない。
+    - is_nonzero(node, var) は node から関数の先頭まで親を辿って判定し、途中のノードと条件のリストごとの結果を
+      変数ごとに覚える。同じ関数の除算をすべて判定しても、各ノード・各条件を調べるのは変数ごとに1回だけで済む。
+    - 内側の関数・クラスの中へは降りない（それらは別の GuardMap で扱う）。
+    """
+    def __init__(self, root):
+        self.root = root
+        self.parents = {}
+        self.facts_before = {}
+        self.last_write = {}
+        # 変数名 -> {ノード: 0 でないと分かるか} / {id(条件のリスト): 0 でないと分かるか}
+        #          / {and / or の項: それより前の項から 0 でないと分かるか}
+        self._nonzero = {}
+        self._facts_nonzero = {}
+        self._priors_nonzero = {}
+        self._build(root)
+
+    def parent_of(self, node):
+        entry = self.parents.get(node)
+        return entry[0] if entry else None
+
+    def enclosing_if(self, node):
+        """node を本体または else に含む最も内側の if 文"""
+        curr = node
+        while curr in self.parents:
+            parent, field, _ = self.parents[curr]
+            if isinstance(parent, ast.If) and field in ("body", "orelse"):
+                return parent
+            curr = parent
+        return None
+
+    def conditions(self, node):
+        """node の実行時に成り立つ条件を (条件式, 真偽) として内側から順に返す"""
+        curr = node
+        while curr in self.parents and not isinstance(curr, _SCOPES):
+            parent, field, index = self.parents[curr]
+            facts = self.facts_before.get(curr)
+            while facts is not None:
+                cond, positive, facts = facts
+                yield cond, positive
+            if isinstance(parent, (ast.If, ast.IfExp)):
+                if field == "body":
+                    yield parent.test, True
+                elif field == "orelse":
+                    yield parent.test, False
+            elif isinstance(parent, ast.BoolOp):
+                # a and b: b の評価時には a が真。a or b: b の評価時には a が偽
+                positive = isinstance(parent.op, ast.And)
+                for prior in parent.values[:index]:
+                    yield prior, positive
+            curr = parent
+
+    def is_nonzero(self, node, var):
+        """node の実行時に変数 var が 0 でないことが条件から分かるか"""
+        memo = self._nonzero.setdefault(var, {})
+        path = []
+        curr = node
+        result = False
+        # 親を辿り、結果の分かっているノードか、0 でないと分かる条件に着いたところで止める
+        while curr in self.parents and not isinstance(curr, _SCOPES):
+            if curr in memo:
+                result = memo[curr]
+                break
+            path.append(curr)
+            if self._decides_nonzero(curr, var):
+                result = True
+                break
+            curr = self.parents[curr][0]
+        # 辿ったノードはどれも、その先の結果と同じになる
+        for curr in path:
+            memo[curr] = result
+        return result
+
+    def _decides_nonzero(self, node, var):
+        """node と親の間で加わる条件（前の文・if の条件・and / or の前の項）から var が 0 でないと分かるか"""
+        if self._facts_exclude_zero(self.facts_before.get(node), var):
+            return True
+        parent, field, index = self.parents[node]
+        if isinstance(parent, (ast.If, ast.IfExp)) and field in ("body", "orelse"):
+            return self._excludes_zero(parent.test, field == "body", var)
+        if isinstance(parent, ast.BoolOp):
+            return self._priors_exclude_zero(parent, index, var)
+        return False
+
+    def _priors_exclude_zero(self, boolop, index, var):
+        """boolop の index 番目より前の項から var が 0 でないと分かるか（a and b: b の評価時には a が真、or では偽）"""
+        memo = self._priors_nonzero.setdefault(var, {})
+        positive = isinstance(boolop.op, ast.And)
+        path = []
+        result = False
+        while index > 0:
+            value = boolop.values[index]
+            if value in memo:
+                result = memo[value]
+                break
+            path.append(value)
+            index -= 1
+            if self._excludes_zero(boolop.values[index], positive, var):
+                result = True
+                break
+        for value in path:
+            memo[value] = result
+        return result
+
+    def _facts_exclude_zero(self, facts, var):
+        """条件のリスト facts のどれかから var が 0 でないと分かるか（リストの末尾は他の文と共有するので結果を覚える）"""
+        memo = self._facts_nonzero.setdefault(var, {})
+        path = []
+        result = False
+        while facts is not None:
+            if id(facts) in memo:
+                result = memo[id(facts)]
+                break
+            path.append(id(facts))
+            cond, positive, facts = facts
+            if self._excludes_zero(cond, positive, var):
+                result = True
+                break
+        for key in path:
+            memo[key] = result
+        return result
+
+    def _excludes_zero(self, cond, positive, var):
+        # 条件の評価より後に var が代入されている場合、その条件は var について何も保証しない
+        last = self.last_write.get(var)
+        if last is not None and last >= (cond.lineno, cond.col_offset):
+            return False
+        return _excludes_zero(cond, positive, var, 0)
+
+    def _build(self, root):
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for field, value in ast.iter_fields(node):
+                if isinstance(value, list):
+                    facts = None
+                    for index, child in enumerate(value):
+                        if not isinstance(child, ast.AST):
+                            continue
+                        self._add(child, node, field, index, stack)
+                        if isinstance(child, ast.stmt):
+                            if facts is not None:
+                                self.facts_before[child] = facts
+                            facts = _after_statement(child, facts)
+                elif isinstance(value, ast.AST):
+                    self._add(value, node, field, 0, stack)
+
+    def _add(self, child, parent, field, index, stack):
+        self.parents[child] = (parent, field, index)
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+            position = (child.lineno, child.col_offset)
+            if position > self.last_write.get(child.id, (0, -1)):
+                self.last_write[child.id] = position
+        # 内側の関数・クラスは別のスコープとして扱う
+        if not isinstance(child, _SCOPES):
+            stack.append(child)
+
+def _after_statement(stmt, facts):
+    """stmt の後に続く文で成り立つ条件を facts に加える"""
+    if isinstance(stmt, ast.Assert):
+        return (stmt.test, True, facts)
+    if isinstance(stmt, ast.If):
+        body_exits = _exits(stmt.body)
+        else_exits = bool(stmt.orelse) and _exits(stmt.orelse)
+        if body_exits and not else_exits:
+            return (stmt.test, False, facts)
+        if else_exits and not body_exits:
+            return (stmt.test, True, facts)
+    return facts
+
+def _exits(block):
+    return bool(block) and isinstance(block[-1], _EXITS)
+
+def _excludes_zero(cond, positive, var, depth):
+    """条件 cond の真偽が positive であるとき、var が 0 でないと言えるか"""
+    if depth > _MAX_CONDITION_DEPTH:
+        return False
+    if isinstance(cond, ast.UnaryOp) and isinstance(cond.op, ast.Not):
+        return _excludes_zero(cond.operand, not positive, var, depth + 1)
+    if isinstance(cond, ast.Name):
+        # if b: の本体では b は 0 でない
+        return positive and cond.id == var
+    if isinstance(cond, ast.BoolOp):
+        conjunction = isinstance(cond.op, ast.And) == positive
+        results = (_excludes_zero(value, positive, var, depth + 1) for value in cond.values)
+        # 真の and / 偽の or はどれか1つ、真の or / 偽の and はすべての項が示せればよい
+        return any(results) if conjunction else all(results)
+    if isinstance(cond, ast.Compare):
+        operands = [cond.left, *cond.comparators]
+        pairs = list(zip(operands, cond.ops, operands[1:]))
+        if positive:
+            # 比較の連鎖は各比較の and
+            return any(_pair_excludes_zero(left, op, right, True, var) for left, op, right in pairs)
+        return len(pairs) == 1 and _pair_excludes_zero(*pairs[0], False, var)
+    return False
+
+def _pair_excludes_zero(left, op, right, positive, var):
+    op_type = type(op)
+    if isinstance(right, ast.Name) and right.id == var:
+        left, right = right, left
+        op_type = _SWAPPED.get(op_type)
+    if not (isinstance(left, ast.Name) and left.id == var):
+        return False
+    if not positive:
+        op_type = _NEGATED.get(op_type)
+    check = _EXCLUDES_ZERO.get(op_type)
+    value = _constant_value(right)
+    return check is not None and value is not None and check(value)
+
+def _constant_value(node):
+    """数値定数 (負の数を含む) の値。定数でなければ None"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _constant_value(node.operand)
+        return -value if value is not None else None
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return node.value
+    return None
@@ -2,11 +2,11 @@ import ast
 import fractions
 
 def _handle_decimal_call(node, visitor):
-    """Decimal('0.1') などのリテラルを (1/10 : Rat) に変換する"""
+    """Decimal('0.1') などのリテラルを (1/10 : Rat) に変換する（定数プールにある値は名前で参照する）"""
     if len(node.args) == 1 and isinstance(node.args[0], ast.Constant):
         try:
             f = fractions.Fraction(node.args[0].value)
-            return f"({f.numerator}/{f.denominator} : Rat)"
+            return visitor.emitter.format_rat_constant(f)
         except Exception: pass
     return None
 
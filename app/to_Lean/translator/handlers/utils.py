@@ -1,20 +1,21 @@
 import ast
 
-def get_parent_if(node, tree):
+def get_parent_if(node, guards):
     """
-    指定されたノードを包んでいる ast.If ノードを探して返す（ガード条件の特定に使用）
+    指定されたノードを包んでいる ast.If ノードを探して返す（ガード条件の特定に使用）。
+    guards には node を含む関数の GuardMap（解析器が関数ごとに1つ作るもの）を渡す
     """
-    # 簡易的な実装: 実際には NodeVisitor や parent 指向の解析が必要
-    return None
+    return guards.enclosing_if(node)
 
-def is_guarded_by_zero_check(node, var_name):
+def is_guarded_by_zero_check(node, var_name, guards=None):
     """
-    変数 var_name が 0 でないことを確認する if 文の中で node が実行されているか判定する
+    変数 var_name が 0 でないことを確認する条件（if / elif / 三項演算子 / 早期 return / and）の下で
+    node が実行されているか判定する。guards には node を含む関数の GuardMap を渡す
+    （判定結果は GuardMap に蓄積され、同じ関数の他のノードの判定で再利用される）
     """
-    # 今後の実装予定:
-    # 1. node の親を遡り ast.If を見つける
-    # 2. その test 属性が 'var_name != 0' や 'var_name > 0' であるかを確認する
-    return False
+    if guards is None:
+        return False
+    return guards.is_nonzero(node, var_name)
 
 def get_full_name(node):
     """ast.Name や ast.Attribute から完全な変数名を取得する"""
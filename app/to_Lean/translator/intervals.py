@@ -0,0 +1,1061 @@
+import ast
+import bisect
+import heapq
+import math
+import sys
+
+INF = math.inf
+FLOAT_MAX = sys.float_info.max
+# これを超える大きさの整数は float で正確に表せない
+EXACT_FLOAT_INTEGER = 2.0 ** 53
+# ループの先頭で、この回数だけ状態が変わったら拡大 (widening) する
+WIDEN_AFTER = 1
+# 条件式の絞り込みを行う入れ子の深さの上限（超えた部分は絞り込まない）
+_MAX_REFINE_DEPTH = 50
+# 再帰で直接評価する式の深さの上限（超えたら明示的なスタックで評価する）
+_MAX_QUICK_DEPTH = 16
+_SLOW = object()
+
+class Interval:
+    """
+    数値の範囲 [lo, hi]。端点ごとに開閉 (lo_open / hi_open) を持ち、kind は "int" / "float" / None (不明)。
+    整数の区間では開いた端点を閉じた端点に直す (x > 0 は x >= 1)。
+    """
+    __slots__ = ("lo", "hi", "lo_open", "hi_open", "kind")
+
+    def __init__(self, lo=-INF, hi=INF, lo_open=False, hi_open=False, kind=None):
+        if kind == "int":
+            if math.isfinite(lo):
+                lo, lo_open = (math.floor(lo) + 1, False) if lo_open or lo != math.floor(lo) else (lo, False)
+            if math.isfinite(hi):
+                hi, hi_open = (math.ceil(hi) - 1, False) if hi_open or hi != math.ceil(hi) else (hi, False)
+        self.lo = lo
+        self.hi = hi
+        # 無限大の端点は取らない値として扱う
+        self.lo_open = lo_open or lo == -INF
+        self.hi_open = hi_open or hi == INF
+        self.kind = kind
+
+    @classmethod
+    def point(cls, value, kind=None):
+        return cls(value, value, kind=kind)
+
+    def is_empty(self):
+        return self.lo > self.hi or (self.lo == self.hi and (self.lo_open or self.hi_open))
+
+    def contains_zero(self):
+        above = self.lo < 0 or (self.lo == 0 and not self.lo_open)
+        below = self.hi > 0 or (self.hi == 0 and not self.hi_open)
+        return above and below
+
+    def is_zero(self):
+        return self.lo == 0 and self.hi == 0 and not self.lo_open and not self.hi_open
+
+    def is_bounded(self):
+        return math.isfinite(self.lo) and math.isfinite(self.hi)
+
+    def magnitude(self):
+        return max(abs(self.lo), abs(self.hi))
+
+    def with_kind(self, kind):
+        return Interval(self.lo, self.hi, self.lo_open, self.hi_open, kind)
+
+    def __eq__(self, other):
+        return (isinstance(other, Interval) and self.lo == other.lo and self.hi == other.hi and
+                self.lo_open == other.lo_open and self.hi_open == other.hi_open and self.kind == other.kind)
+
+    def __hash__(self):
+        return hash((self.lo, self.hi, self.lo_open, self.hi_open, self.kind))
+
+    def __repr__(self):
+        left = "(" if self.lo_open else "["
+        right = ")" if self.hi_open else "]"
+        return f"{left}{self.lo}, {self.hi}{right}" + (f":{self.kind}" if self.kind else "")
+
+def top(kind=None):
+    return Interval(kind=kind) if kind else _TOP
+
+_TOP = Interval()
+
+def join(a, b):
+    """a と b の両方を含む最小の区間 (None は到達しないことを表す)"""
+    if a is None:
+        return b
+    if b is None or a is b or _contains(a, b):
+        return a
+    if _contains(b, a):
+        return b
+    lo, lo_open = min((a.lo, a.lo_open), (b.lo, b.lo_open))
+    hi, hi_open = max((a.hi, not a.hi_open), (b.hi, not b.hi_open))
+    return Interval(lo, hi, lo_open, not hi_open, _join_kind(a.kind, b.kind))
+
+def meet(a, b):
+    """a と b の共通部分。空なら None"""
+    lo, lo_closed = max((a.lo, not a.lo_open), (b.lo, not b.lo_open))
+    hi, hi_open = min((a.hi, a.hi_open), (b.hi, b.hi_open))
+    result = Interval(lo, hi, not lo_closed, hi_open, a.kind or b.kind)
+    return None if result.is_empty() else result
+
+def widen(old, new):
+    """old から広がった端点を無限大にする（ループの不動点計算を有限回で止めるため）"""
+    if old is None:
+        return new
+    if new is None or new is old or _contains(old, new):
+        return old
+    lo, lo_open = (old.lo, old.lo_open) if (new.lo, new.lo_open) >= (old.lo, old.lo_open) else (-INF, True)
+    hi, hi_open = (old.hi, old.hi_open) if (new.hi, not new.hi_open) <= (old.hi, not old.hi_open) else (INF, True)
+    return Interval(lo, hi, lo_open, hi_open, _join_kind(old.kind, new.kind))
+
+def _contains(a, b):
+    """a が b を含むか（kind も含めて、結合しても a のままか）"""
+    return ((a.lo, a.lo_open) <= (b.lo, b.lo_open) and (a.hi, not a.hi_open) >= (b.hi, not b.hi_open)
+            and a.kind == _join_kind(a.kind, b.kind))
+
+def _join_kind(a, b):
+    if a == b:
+        return a
+    return "float" if "float" in (a, b) else None
+
+def _arith_kind(a, b):
+    if "float" in (a.kind, b.kind):
+        return "float"
+    return "int" if a.kind == b.kind == "int" else None
+
+def _safe(op, x, y):
+    try:
+        value = op(x, y)
+    except OverflowError:
+        return INF
+    except (ZeroDivisionError, ValueError):
+        return math.nan
+    return value
+
+def _mul_bound(x, y):
+    # 区間演算では 0 × ∞ を 0 とする
+    if x == 0 or y == 0:
+        return 0.0
+    return _safe(lambda p, q: p * q, x, y)
+
+class _State:
+    """
+    変数名 -> Interval の写像（書いていない変数は範囲不明）。
+    複数の状態で共有する base と小さな差分 changes で表し、代入のたびに全体を複製しない。
+    差分が base の大きさの平方根を超えたら base に畳み込む。
+    """
+    __slots__ = ("base", "changes")
+
+    def __init__(self, base, changes=None):
+        self.base = base
+        self.changes = {} if changes is None else changes
+
+    def get(self, name):
+        value = self.changes.get(name)
+        return self.base.get(name) if value is None else value
+
+    def lookup(self, name):
+        value = self.get(name)
+        return _TOP if value is None else value
+
+    def updated(self, values):
+        changes = dict(self.changes)
+        changes.update(values)
+        if len(changes) > max(16, math.isqrt(len(self.base))):
+            return _State(self.flat(changes))
+        return _State(self.base, changes)
+
+    def flat(self, changes=None):
+        result = dict(self.base)
+        result.update(self.changes if changes is None else changes)
+        return result
+
+    def combine(self, other, op):
+        """変数ごとに op (join / widen) を取った状態。片方で不明な変数は不明のまま"""
+        if self is other:
+            return self
+        if self.base is other.base:
+            changes, same = {}, True
+            for name in self.changes.keys() | other.changes.keys():
+                a, b = self.get(name), other.get(name)
+                value = _TOP if a is None or b is None else op(a, b)
+                changes[name] = value
+                same = same and value is a
+            return self if same else _State(self.base, changes)
+        mine, theirs = self.flat(), other.flat()
+        result = {name: op(value, theirs[name]) for name, value in mine.items() if name in theirs}
+        if len(result) == len(mine) and all(result[name] is value for name, value in mine.items()):
+            return self
+        return _State(result)
+
+def neg(a):
+    return Interval(-a.hi, -a.lo, a.hi_open, a.lo_open, a.kind)
+
+def add(a, b):
+    lo = _safe(lambda p, q: p + q, a.lo, b.lo)
+    hi = _safe(lambda p, q: p + q, a.hi, b.hi)
+    if math.isnan(lo):
+        lo = -INF
+    if math.isnan(hi):
+        hi = INF
+    return Interval(lo, hi, a.lo_open or b.lo_open, a.hi_open or b.hi_open, _arith_kind(a, b))
+
+def sub(a, b):
+    return add(a, neg(b))
+
+def mul(a, b, kind=None):
+    candidates = []
+    for x, x_open in ((a.lo, a.lo_open), (a.hi, a.hi_open)):
+        for y, y_open in ((b.lo, b.lo_open), (b.hi, b.hi_open)):
+            value = _mul_bound(x, y)
+            # 閉じた端点の 0 を掛けた場合、積の 0 は実際に取る値になる
+            attained = (not x_open and not y_open) or (x == 0 and not x_open) or (y == 0 and not y_open)
+            candidates.append((value, not attained))
+    lo, lo_open = min(candidates)
+    hi, hi_closed = max((value, not is_open) for value, is_open in candidates)
+    return Interval(lo, hi, lo_open, not hi_closed, kind or _arith_kind(a, b))
+
+def reciprocal(b):
+    """0 を含まない区間の逆数"""
+    def inv(value):
+        return 0.0 if math.isinf(value) else (INF if value == 0 else 1 / value)
+    lo, lo_open = inv(b.hi), b.hi_open or math.isinf(b.hi)
+    hi, hi_open = inv(b.lo), b.lo_open or math.isinf(b.lo)
+    if b.hi == 0:
+        lo, lo_open = -INF, True
+    if b.lo == 0:
+        hi, hi_open = INF, True
+    return Interval(lo, hi, lo_open, hi_open, "float")
+
+def div(a, b):
+    if b.contains_zero():
+        return top("float")
+    return mul(a, reciprocal(b), "float")
+
+def floordiv(a, b):
+    if b.contains_zero():
+        return top(_arith_kind(a, b))
+    kind = _arith_kind(a, b)
+    if kind == "int" and a.is_bounded() and b.is_bounded():
+        # 整数の端点では // で正確に求める（x // y は y の符号が一定なら x と y のそれぞれについて単調）
+        quotients = [int(x) // int(y) for x in (a.lo, a.hi) for y in (b.lo, b.hi)]
+        return Interval(min(quotients), max(quotients), kind=kind)
+    # 浮動小数点の商は丸め誤差 (49 * (1/49) = 0.999...) があるため、床関数の前に外側へ 1 広げる
+    q = mul(a, reciprocal(b), "float")
+    lo = math.floor(q.lo - 1) if math.isfinite(q.lo) else q.lo
+    hi = math.floor(q.hi + 1) if math.isfinite(q.hi) else q.hi
+    return Interval(lo, hi, kind=kind)
+
+def mod(a, b):
+    kind = _arith_kind(a, b)
+    if b.lo > 0 or (b.lo == 0 and b.lo_open):
+        return Interval(0, b.hi, False, True, kind)
+    if b.hi < 0 or (b.hi == 0 and b.hi_open):
+        return Interval(b.lo, 0, True, False, kind)
+    return top(kind)
+
+def power(a, b):
+    kind = _arith_kind(a, b)
+    if not (b.lo == b.hi and not b.lo_open and float(b.lo).is_integer() and 0 <= b.lo <= 64):
+        return top(kind)
+    k = int(b.lo)
+    if k == 0:
+        return Interval.point(1, kind)
+    lo = _safe(lambda p, q: p ** q, a.lo, k)
+    hi = _safe(lambda p, q: p ** q, a.hi, k)
+    if k % 2 == 1 or a.lo >= 0:
+        return Interval(lo, hi, a.lo_open, a.hi_open, kind)
+    if a.hi <= 0:
+        return Interval(hi, lo, a.hi_open, a.lo_open, kind)
+    return Interval(0, max(lo, hi), False, False, kind)
+
+_BINOPS = {
+    ast.Add: add, ast.Sub: sub, ast.Mult: mul, ast.Div: div,
+    ast.FloorDiv: floordiv, ast.Mod: mod, ast.Pow: power,
+}
+_DIVISIONS = (ast.Div, ast.FloorDiv, ast.Mod)
+_SWAPPED = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE, ast.Eq: ast.Eq, ast.NotEq: ast.NotEq}
+_NEGATED = {ast.Lt: ast.GtE, ast.LtE: ast.Gt, ast.Gt: ast.LtE, ast.GtE: ast.Lt, ast.Eq: ast.NotEq, ast.NotEq: ast.Eq}
+_KINDS = {"int": "int", "bool": "int", "float": "float"}
+_BOOL = Interval(0, 1, kind="int")
+
+def annotation_kind(annotation):
+    """型注釈 (int / float / bool) から区間の kind を決める"""
+    return _KINDS.get(annotation.id) if isinstance(annotation, ast.Name) else None
+
+class _Instr:
+    """線形化した関数本体の命令1つ。target / alt は分岐先の命令番号"""
+    __slots__ = ("kind", "node", "target", "alt")
+
+    def __init__(self, kind, node=None, target=None, alt=None):
+        self.kind = kind
+        self.node = node
+        self.target = target
+        self.alt = alt
+
+class IntervalAnalysis:
+    """
+    関数1つ分の区間抽象解釈。
+
+    役割:
+    - 関数本体を分岐・ジャンプを持つ命令列に線形化し（再帰を使わない）、
+      ワークリストで各命令の直前の状態（変数名 -> Interval）の不動点を求める。
+    - 代入・累積代入・代入式 (:=)・if / while の条件による絞り込み・for i in range(...) のループ変数を扱い、
+      ループの先頭では一定回数の後に widening して有限回で収束させる。
+    - 不動点から各除算の除数の範囲と、オーバーフロー・精度低下の可能性がある演算を求める。
+      widening で端点が無限大になった変数を自分自身から更新する float の演算も、オーバーフローの可能性として報告する。
+    """
+    def __init__(self, func_node, max_visits=None):
+        self.func_node = func_node
+        self.divisors = {}
+        self.findings = {}
+        self.visits = 0
+        self._code = []
+        self._loops = []
+        self._headers = set()
+        self._constants = {}
+        self._widened = set()
+        self._linearize(func_node.body)
+        self._solve(self._entry_state(func_node), max_visits)
+
+    def divisor_range(self, node):
+        """除算ノード node の除数が取りうる範囲（到達しない・解析対象外なら None）"""
+        return self.divisors.get(node)
+
+    def excludes_zero(self, node):
+        interval = self.divisors.get(node)
+        return interval is not None and not interval.contains_zero()
+
+    def definitely_zero(self, node):
+        interval = self.divisors.get(node)
+        return interval is not None and interval.is_zero()
+
+    # --- 線形化 ---
+
+    def _emit(self, kind, node=None):
+        self._code.append(_Instr(kind, node))
+        return self._code[-1]
+
+    def _linearize(self, body):
+        """文の列を命令列にする。入れ子の文は (ブロック, 位置) と後処理のクロージャを積むスタックで処理する"""
+        stack = [(body, 0)]
+        while stack:
+            item = stack.pop()
+            if callable(item):
+                item()
+                continue
+            stmts, index = item
+            if index >= len(stmts):
+                continue
+            stack.append((stmts, index + 1))
+            self._linearize_stmt(stmts[index], stack)
+        self._emit("return")
+
+    def _linearize_stmt(self, stmt, stack):
+        code = self._code
+        if isinstance(stmt, (ast.Assign, ast.AugAssign, ast.AnnAssign, ast.Expr, ast.Pass)):
+            self._emit("exec", stmt)
+        elif isinstance(stmt, ast.Assert):
+            self._emit("assume", stmt)
+        elif isinstance(stmt, ast.Return):
+            self._emit("return", stmt)
+        elif isinstance(stmt, ast.Raise):
+            self._emit("stop", stmt)
+        elif isinstance(stmt, ast.If):
+            branch = self._emit("branch", stmt)
+            branch.target = len(code)
+
+            def after_body():
+                jump = self._emit("jump")
+                branch.alt = len(code)
+                stack.append(lambda: setattr(jump, "target", len(code)))
+                stack.append((stmt.orelse, 0))
+            stack.append(after_body)
+            stack.append((stmt.body, 0))
+        elif isinstance(stmt, (ast.For, ast.While)):
+            header = self._emit("for" if isinstance(stmt, ast.For) else "branch", stmt)
+            header_index = len(code) - 1
+            self._headers.add(header_index)
+            header.target = len(code)
+            breaks = []
+            self._loops.append((header_index, breaks))
+
+            def after_body():
+                self._emit("jump").target = header_index
+                self._loops.pop()
+                header.alt = len(code)
+
+                def after_else():
+                    for jump in breaks:
+                        jump.target = len(code)
+                stack.append(after_else)
+                stack.append((stmt.orelse, 0))
+            stack.append(after_body)
+            stack.append((stmt.body, 0))
+        elif isinstance(stmt, ast.Break) and self._loops:
+            self._loops[-1][1].append(self._emit("jump"))
+        elif isinstance(stmt, ast.Continue) and self._loops:
+            self._emit("jump").target = self._loops[-1][0]
+        elif isinstance(stmt, ast.With):
+            self._emit("havoc", stmt)
+            stack.append((stmt.body, 0))
+        else:
+            # try / match / 内側の関数定義などは、代入される変数を不明にするだけにする
+            self._emit("havoc", stmt)
+
+    # --- 不動点計算 ---
+
+    def _entry_state(self, func_node):
+        state = {}
+        for arg in func_node.args.args:
+            state[arg.arg] = top(annotation_kind(arg.annotation))
+        return _State(state)
+
+    def _solve(self, entry, max_visits):
+        code = self._code
+        states = [None] * len(code)
+        updates = [0] * len(code)
+        states[0] = entry
+        queue, queued = [0], {0}
+        while queue:
+            index = heapq.heappop(queue)
+            queued.discard(index)
+            self.visits += 1
+            if max_visits is not None and self.visits > max_visits:
+                break
+            for target, state in self._transfer(index, states[index], record=False):
+                if target >= len(code) or state is None:
+                    continue
+                old = states[target]
+                new = state if old is None else old.combine(state, join)
+                if target in self._headers and old is not None:
+                    updates[target] += 1
+                    if updates[target] > WIDEN_AFTER:
+                        new = old.combine(new, widen)
+                        self._note_widened(old, new)
+                if new is not old:
+                    states[target] = new
+                    if target not in queued:
+                        queued.add(target)
+                        heapq.heappush(queue, target)
+        # 不動点の状態で各命令をもう一度評価し、除数の範囲などを記録する
+        for index, state in enumerate(states):
+            if state is not None:
+                self._transfer(index, state, record=True)
+
+    def _note_widened(self, old, new):
+        """widening で有限の端点が無限大になった変数を覚える"""
+        for name, value in new.flat().items():
+            before = old.get(name)
+            if before is None or value is before:
+                continue
+            if (math.isfinite(before.lo) and not math.isfinite(value.lo)
+                    or math.isfinite(before.hi) and not math.isfinite(value.hi)):
+                self._widened.add(name)
+
+    def _transfer(self, index, state, record):
+        """命令 index を状態 state で実行し、(次の命令番号, 状態) のリストを返す"""
+        instr = self._code[index]
+        kind, node = instr.kind, instr.node
+        following = index + 1
+        state, bound = self._bind(instr, state)
+        if kind == "exec":
+            return [(following, self._exec(node, state, record, bound))]
+        if kind == "assume":
+            self._eval(node.test, state, record)
+            return [(following, self._refine(_bind_values(state, bound), node.test, True))]
+        if kind == "branch":
+            self._eval(node.test, state, record)
+            after = _bind_values(state, bound)
+            return [(instr.target, self._refine(after, node.test, True)),
+                    (instr.alt, self._refine(after, node.test, False))]
+        if kind == "for":
+            self._eval(node.iter, state, record)
+            after = _bind_values(state, bound)
+            return [(instr.target, self._enter_loop(node, after)), (instr.alt, after)]
+        if kind == "jump":
+            return [(instr.target, state)]
+        if kind == "havoc":
+            if isinstance(node, ast.With):
+                for item in node.items:
+                    self._eval(item.context_expr, state, record)
+            return [(following, _havoc(state, node))]
+        if kind == "return" and node is not None and node.value is not None:
+            self._eval(node.value, state, record)
+        return []
+
+    def _exec(self, stmt, state, record, bound=None):
+        """代入文などを実行した後の状態。bound は文の中の代入式 (:=) で対象に入る値"""
+        if isinstance(stmt, ast.Assign):
+            value = self._eval(stmt.value, state, record)
+            state = _bind_values(state, bound)
+            for target in stmt.targets:
+                state = _assign(state, target, value)
+                if record and isinstance(target, ast.Name) and _reads(stmt.value, target.id):
+                    self._observe_growth(stmt.value, target.id, value)
+            return state
+        if isinstance(stmt, ast.AugAssign):
+            value = self._eval(stmt.value, state, record)
+            if isinstance(stmt.target, ast.Name):
+                current = state.lookup(stmt.target.id)
+                op = _BINOPS.get(type(stmt.op))
+                result = op(current, value) if op and value is not None else _TOP
+                if record:
+                    self._observe_growth(stmt, stmt.target.id, result)
+                return _bind_values(state, bound).updated({stmt.target.id: result})
+            return _assign(_bind_values(state, bound), stmt.target, None)
+        if isinstance(stmt, ast.AnnAssign):
+            if stmt.value is None:
+                return state
+            value = self._eval(stmt.value, state, record)
+            kind = annotation_kind(stmt.annotation)
+            return _assign(_bind_values(state, bound), stmt.target,
+                           value.with_kind(kind or value.kind) if value is not None else None)
+        if isinstance(stmt, ast.Expr):
+            self._eval(stmt.value, state, record)
+        return _bind_values(state, bound)
+
+    def _bind(self, instr, state):
+        """
+        命令が評価する式の中の代入式 (:=) を扱い、(式の評価に使う状態, 評価後に対象へ入れる値) を返す。
+        式の中の評価順は追わず、評価中は対象を不明とする。評価後は代入した値にし、
+        and / or の右辺や条件式の枝で評価されないことがあれば元の値と結合し、内包表記の中なら不明にする。
+        """
+        named = _named(_evaluated(instr))
+        if state is None or not named:
+            return state, None
+        before = state
+        state = state.updated({node.target.id: _TOP for node, _, _ in named})
+        bound = {}
+        for node, conditional, nested in named:
+            name = node.target.id
+            value = _TOP if nested else self._eval(node.value, state, False) or _TOP
+            if conditional and not nested:
+                value = join(value, before.lookup(name))
+            bound[name] = join(bound[name], value) if name in bound else value
+        return state, bound
+
+    def _enter_loop(self, loop, state):
+        """for ループの本体に入るときの状態（ループ変数に range の範囲を入れる）"""
+        if state is None:
+            return None
+        value = None
+        it = loop.iter
+        if isinstance(it, ast.Call) and isinstance(it.func, ast.Name) and it.func.id == "range" and 1 <= len(it.args) <= 3:
+            bounds = [self._eval(arg, state, False) for arg in it.args]
+            if None in bounds:
+                return None
+            start, stop = (Interval.point(0, "int"), bounds[0]) if len(bounds) == 1 else (bounds[0], bounds[1])
+            step = bounds[2] if len(bounds) == 3 else Interval.point(1, "int")
+            if step.lo > 0:
+                value = Interval(start.lo, stop.hi, start.lo_open, True, "int")
+            elif step.hi < 0:
+                value = Interval(stop.lo, start.hi, True, start.hi_open, "int")
+            else:
+                value = top("int")
+            if value.is_empty():
+                # 1回も実行されないループ
+                return None
+        return _assign(state, loop.target, value)
+
+    # --- 式の評価 ---
+
+    def _eval(self, root, state, record):
+        """式の範囲を求める（後順の明示的なスタックで評価する）。到達しない場合は None"""
+        if state is None:
+            return None
+        if isinstance(root, ast.Name):
+            return state.lookup(root.id)
+        result = self._quick(root, state, record, 0)
+        if result is not _SLOW:
+            return result
+        values = {}
+        stack = [(root, state, False)]
+        while stack:
+            node, st, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, st, True))
+                stack.extend(reversed(self._operands(node, st)))
+                continue
+            values[node] = None if st is None else self._combine(node, st, values, record)
+        return values[root]
+
+    def _quick(self, node, state, record, depth):
+        """定数・変数・算術だけの浅い式を直接評価する。それ以外は _SLOW"""
+        if isinstance(node, ast.Name):
+            return state.lookup(node.id)
+        if isinstance(node, ast.Constant):
+            return self._constant(node)
+        if depth > _MAX_QUICK_DEPTH:
+            return _SLOW
+        if isinstance(node, ast.BinOp):
+            left = self._quick(node.left, state, record, depth + 1)
+            if left is _SLOW:
+                return _SLOW
+            right = self._quick(node.right, state, record, depth + 1)
+            if right is _SLOW:
+                return _SLOW
+            return self._binop(node, left, right, record)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            operand = self._quick(node.operand, state, record, depth + 1)
+            return operand if operand is _SLOW or operand is None else neg(operand)
+        if isinstance(node, ast.Compare):
+            for operand in (node.left, *node.comparators):
+                if self._quick(operand, state, record, depth + 1) is _SLOW:
+                    return _SLOW
+            return _BOOL
+        return _SLOW
+
+    def _constant(self, node):
+        interval = self._constants.get(node)
+        if interval is None:
+            value = node.value
+            if isinstance(value, bool):
+                interval = Interval.point(int(value), "int")
+            elif isinstance(value, int):
+                interval = Interval.point(_to_float(value), "int")
+            elif isinstance(value, float):
+                interval = Interval.point(value, "float")
+            else:
+                interval = _TOP
+            self._constants[node] = interval
+        return interval
+
+    def _binop(self, node, left, right, record):
+        if left is None or right is None:
+            return None
+        op = _BINOPS.get(type(node.op))
+        result = op(left, right) if op else top()
+        if record:
+            self._observe(node, left, right, result)
+        return result
+
+    def _operands(self, node, state):
+        """子の式と、それを評価するときの状態"""
+        if isinstance(node, (ast.Name, ast.Constant)):
+            return ()
+        if isinstance(node, ast.BinOp):
+            return ((node.left, state, False), (node.right, state, False))
+        if isinstance(node, ast.Call):
+            return [(arg, state, False) for arg in node.args] + [(kw.value, state, False) for kw in node.keywords]
+        if isinstance(node, ast.IfExp):
+            return [(node.test, state, False), (node.body, self._refine(state, node.test, True), False),
+                    (node.orelse, self._refine(state, node.test, False), False)]
+        if isinstance(node, ast.BoolOp):
+            operands, st = [], state
+            positive = isinstance(node.op, ast.And)
+            for value in node.values:
+                operands.append((value, st, False))
+                # and の右辺は左辺が真のとき、or の右辺は左辺が偽のときだけ評価される
+                st = self._refine(st, value, positive) if st is not None else None
+            return operands
+        if isinstance(node, (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+            return []
+        return [(child, state, False) for child in ast.iter_child_nodes(node) if isinstance(child, ast.expr)]
+
+    def _combine(self, node, state, values, record):
+        if isinstance(node, ast.Constant):
+            return self._constant(node)
+        if isinstance(node, ast.Name):
+            return state.lookup(node.id)
+        if isinstance(node, ast.BinOp):
+            return self._binop(node, values[node.left], values[node.right], record)
+        if isinstance(node, ast.UnaryOp):
+            operand = values[node.operand]
+            if operand is None:
+                return None
+            if isinstance(node.op, ast.USub):
+                return neg(operand)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            return _BOOL
+        if isinstance(node, ast.BoolOp):
+            result = None
+            for value in node.values:
+                result = join(result, values[value])
+            return result
+        if isinstance(node, ast.Compare):
+            return _BOOL
+        if isinstance(node, ast.IfExp):
+            return join(values[node.body], values[node.orelse])
+        if isinstance(node, ast.Call):
+            return _call(node, values)
+        if isinstance(node, ast.NamedExpr):
+            return values[node.value]
+        return top()
+
+    def _observe_growth(self, node, name, result):
+        """widening で無限大に広げた変数 name を自分自身から更新する float の演算を、オーバーフローの可能性として記録する"""
+        if (name in self._widened and result is not None and result.kind == "float"
+                and not result.is_bounded() and node not in self.findings):
+            self.findings[node] = "possible-overflow"
+
+    def _observe(self, node, left, right, result):
+        if isinstance(node.op, _DIVISIONS):
+            self.divisors[node] = join(self.divisors.get(node), right)
+        if result.kind != "float" or node in self.findings:
+            return
+        if left.is_bounded() and right.is_bounded():
+            if not result.is_bounded() and not isinstance(node.op, _DIVISIONS):
+                self.findings[node] = "possible-overflow"
+            elif result.is_bounded() and result.magnitude() > EXACT_FLOAT_INTEGER:
+                self.findings[node] = "precision-loss"
+
+    # --- 条件による絞り込み ---
+
+    def _refine(self, state, cond, positive, depth=0):
+        """条件 cond の真偽が positive であるときの状態。成り立ち得なければ None"""
+        if state is None or depth > _MAX_REFINE_DEPTH:
+            return state
+        if isinstance(cond, ast.NamedExpr):
+            # (x := e) の真偽は代入後の x の真偽
+            cond = cond.target
+        if isinstance(cond, ast.UnaryOp) and isinstance(cond.op, ast.Not):
+            return self._refine(state, cond.operand, not positive, depth + 1)
+        if isinstance(cond, ast.BoolOp):
+            if isinstance(cond.op, ast.And) == positive:
+                for value in cond.values:
+                    state = self._refine(state, value, positive, depth + 1)
+                return state
+            result = None
+            for value in cond.values:
+                refined = self._refine(state, value, positive, depth + 1)
+                if result is None or refined is None:
+                    result = result or refined
+                else:
+                    result = result.combine(refined, join)
+            return result
+        if isinstance(cond, ast.Name):
+            current = state.lookup(cond.id)
+            zero = Interval.point(0, current.kind)
+            refined = _exclude(current, 0) if positive else meet(current, zero)
+            return _with(state, cond.id, refined)
+        if isinstance(cond, ast.Compare):
+            operands = [cond.left, *cond.comparators]
+            pairs = list(zip(operands, cond.ops, operands[1:]))
+            if not positive and len(pairs) != 1:
+                return state
+            for left, op, right in pairs:
+                op_type = type(op) if positive else _NEGATED.get(type(op))
+                if op_type is None:
+                    continue
+                state = self._refine_pair(state, left, op_type, right)
+                state = self._refine_pair(state, right, _SWAPPED[op_type], left)
+                if state is None:
+                    return None
+        return state
+
+    def _refine_pair(self, state, left, op_type, right):
+        """left op right のうち、left が変数（または代入式の対象）の場合にその範囲を絞る"""
+        if isinstance(left, ast.NamedExpr):
+            left = left.target
+        if state is None or not isinstance(left, ast.Name):
+            return state
+        other = self._eval(right, state, False)
+        if other is None:
+            return None
+        current = state.lookup(left.id)
+        if op_type is ast.Lt:
+            bound = Interval(-INF, other.hi, True, True, current.kind)
+        elif op_type is ast.LtE:
+            bound = Interval(-INF, other.hi, True, other.hi_open, current.kind)
+        elif op_type is ast.Gt:
+            bound = Interval(other.lo, INF, True, True, current.kind)
+        elif op_type is ast.GtE:
+            bound = Interval(other.lo, INF, other.lo_open, True, current.kind)
+        elif op_type is ast.Eq:
+            bound = other.with_kind(current.kind)
+        elif op_type is ast.NotEq and other.lo == other.hi:
+            return _with(state, left.id, _exclude(current, other.lo))
+        else:
+            return state
+        return _with(state, left.id, meet(current, bound))
+
+def _to_float(value):
+    try:
+        return float(value)
+    except OverflowError:
+        return INF if value > 0 else -INF
+
+def _exclude(interval, value):
+    """区間から端点の値 value を除く（内側の値は区間では表せないのでそのまま）"""
+    if interval.lo == value and not interval.lo_open:
+        interval = Interval(interval.lo, interval.hi, True, interval.hi_open, interval.kind)
+    if interval.hi == value and not interval.hi_open:
+        interval = Interval(interval.lo, interval.hi, interval.lo_open, True, interval.kind)
+    return None if interval.is_empty() else interval
+
+def _with(state, name, interval):
+    return None if interval is None else state.updated({name: interval})
+
+def _assign(state, target, value):
+    if isinstance(target, ast.Name):
+        return state.updated({target.id: _TOP if value is None else value})
+    names = [node.id for node in ast.walk(target) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)]
+    return state.updated(dict.fromkeys(names, _TOP))
+
+def _bind_values(state, bound):
+    return state.updated(bound) if state is not None and bound else state
+
+def _evaluated(instr):
+    """命令が評価する式（代入式を探す範囲）"""
+    node = instr.kind in ("exec", "assume", "return") and instr.node
+    if node:
+        return [node]
+    if instr.kind == "branch":
+        return [instr.node.test]
+    if instr.kind == "for":
+        return [instr.node.iter]
+    if instr.kind == "havoc" and isinstance(instr.node, ast.With):
+        return [item.context_expr for item in instr.node.items]
+    # それ以外の havoc は _havoc が代入式の対象も不明にする
+    return []
+
+def _named(roots):
+    """
+    式の中の代入式 (:=) を (ノード, 評価されないことがあるか, 内包表記の中か) のリストで返す。
+    lambda の本体は別のスコープなので探さない。
+    """
+    found = []
+    stack = [(root, False, False) for root in roots]
+    while stack:
+        node, conditional, nested = stack.pop()
+        if isinstance(node, ast.Lambda):
+            continue
+        if isinstance(node, ast.NamedExpr):
+            found.append((node, conditional, nested))
+        if isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+            stack.extend((child, conditional, True) for child in ast.iter_child_nodes(node))
+        elif isinstance(node, ast.BoolOp):
+            stack.append((node.values[0], conditional, nested))
+            stack.extend((value, True, nested) for value in node.values[1:])
+        elif isinstance(node, ast.IfExp):
+            stack.append((node.test, conditional, nested))
+            stack.extend((branch, True, nested) for branch in (node.body, node.orelse))
+        else:
+            stack.extend((child, conditional, nested) for child in ast.iter_child_nodes(node))
+    return found
+
+def _reads(expr, name):
+    return any(isinstance(node, ast.Name) and node.id == name and isinstance(node.ctx, ast.Load)
+               for node in ast.walk(expr))
+
+def _havoc(state, stmt):
+    names = {n.id for n in ast.walk(stmt) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)}
+    if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        names.add(stmt.name)
+    return state.updated(dict.fromkeys(names, _TOP)) if names else state
+
+def _call(node, values):
+    """よく使う組み込み関数の結果の範囲"""
+    func = node.func.id if isinstance(node.func, ast.Name) else None
+    args = [values.get(arg) for arg in node.args]
+    if None in args or node.keywords:
+        return top()
+    if func == "abs" and len(args) == 1:
+        a = args[0]
+        if a.lo >= 0:
+            return a
+        if a.hi <= 0:
+            return neg(a)
+        return Interval(0, max(-a.lo, a.hi), kind=a.kind)
+    if func in ("min", "max") and len(args) >= 2:
+        pick = min if func == "min" else max
+        lo = pick(a.lo for a in args)
+        hi = pick(a.hi for a in args)
+        kind = args[0].kind if all(a.kind == args[0].kind for a in args) else None
+        return Interval(lo, hi, kind=kind)
+    if func == "len":
+        return Interval(0, INF, kind="int")
+    if func == "float" and len(args) == 1:
+        return args[0].with_kind("float")
+    if func in ("int", "round") and len(args) == 1:
+        a = args[0]
+        return Interval(math.floor(a.lo) if math.isfinite(a.lo) else a.lo,
+                        math.ceil(a.hi) if math.isfinite(a.hi) else a.hi, kind="int")
+    return top()
+
+class IntervalSet:
+    """
+    互いに重ならない区間の和集合。区間は開始位置の順に並べ、重なる・接する区間は1つにまとめる。
+    各区間には、それを単独で覆う条件 (source) があれば記録する。
+    包含の判定は二分探索、追加は二分探索と併合で行う。
+    """
+    __slots__ = ("intervals", "sources", "_starts")
+
+    def __init__(self, intervals=()):
+        self.intervals = []
+        self.sources = []
+        self._starts = []
+        for interval in intervals:
+            self.add(interval)
+
+    def is_empty(self):
+        return not self.intervals
+
+    def _locate(self, interval):
+        """interval の開始位置以前に始まる最後の区間の番号 (なければ -1)"""
+        return bisect.bisect_right(self._starts, (interval.lo, interval.lo_open)) - 1
+
+    def covering(self, interval):
+        """interval を含む区間の番号。どの区間にも含まれなければ -1"""
+        index = self._locate(interval)
+        return index if index >= 0 and _contains(self.intervals[index], interval) else -1
+
+    def covers(self, other):
+        """other のすべての区間がこの集合に含まれるとき、それらを含む区間の番号のリスト。含まれなければ None"""
+        indices = []
+        for interval in other.intervals:
+            index = self.covering(interval)
+            if index < 0:
+                return None
+            if index not in indices:
+                indices.append(index)
+        return indices
+
+    def add(self, interval, source=None):
+        """区間を加え、重なる・接する区間とまとめる"""
+        start = max(self._locate(interval), 0)
+        if start < len(self.intervals) and _separated(self.intervals[start], interval):
+            start += 1
+        end, merged, merged_source = start, interval, source
+        while end < len(self.intervals) and not _separated(merged, self.intervals[end]):
+            existing = self.intervals[end]
+            merged = join(merged, existing)
+            if not _contains(interval, existing):
+                # 既存の区間が新しい区間をすべて含むなら、その条件をそのまま使う
+                merged_source = self.sources[end] if _contains(existing, interval) and end == start else None
+            end += 1
+        if merged_source is None and source is not None and _contains(interval, merged):
+            merged_source = source
+        self.intervals[start:end] = [merged]
+        self.sources[start:end] = [merged_source]
+        self._starts[start:end] = [(merged.lo, merged.lo_open)]
+
+    def union(self, other):
+        result = IntervalSet(self.intervals)
+        for interval in other.intervals:
+            result.add(interval)
+        return result
+
+    def intersection(self, other):
+        result = IntervalSet()
+        for a in self.intervals:
+            for b in other.intervals:
+                common = meet(a, b)
+                if common is not None:
+                    result.add(common)
+        return result
+
+    def complement(self):
+        result = IntervalSet()
+        lo, lo_open = -INF, True
+        for interval in self.intervals:
+            gap = Interval(lo, interval.lo, lo_open, not interval.lo_open)
+            if not gap.is_empty():
+                result.add(gap)
+            lo, lo_open = interval.hi, not interval.hi_open
+        tail = Interval(lo, INF, lo_open, True)
+        if not tail.is_empty():
+            result.add(tail)
+        return result
+
+    def describe(self, indices=None):
+        """区間の表記 (例: "(-inf, 10] or [20, inf)")"""
+        chosen = self.intervals if indices is None else [self.intervals[i] for i in sorted(indices)]
+        return " or ".join(_format_interval(interval) for interval in chosen)
+
+def _separated(a, b):
+    """a と b が重ならず、接してもいないか"""
+    def before(x, y):
+        return x.hi < y.lo or (x.hi == y.lo and x.hi_open and y.lo_open)
+    return before(a, b) or before(b, a)
+
+def _format_interval(interval):
+    if interval.lo == interval.hi:
+        return f"{{{_format_bound(interval.lo)}}}"
+    left = "(" if interval.lo_open else "["
+    right = ")" if interval.hi_open else "]"
+    return f"{left}{_format_bound(interval.lo)}, {_format_bound(interval.hi)}{right}"
+
+def _format_bound(value):
+    if math.isinf(value):
+        return "-inf" if value < 0 else "inf"
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+def numeric_constant(node):
+    """数値定数 (負の数を含む、bool を除く) の値。定数でなければ None"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = numeric_constant(node.operand)
+        if value is None:
+            return None
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return node.value
+    return None
+
+def _comparison_interval(op_type, value):
+    value = _to_float(value)
+    if op_type is ast.Lt:
+        return IntervalSet([Interval(-INF, value, True, True)])
+    if op_type is ast.LtE:
+        return IntervalSet([Interval(-INF, value, True, False)])
+    if op_type is ast.Gt:
+        return IntervalSet([Interval(value, INF, True, True)])
+    if op_type is ast.GtE:
+        return IntervalSet([Interval(value, INF, False, True)])
+    if op_type is ast.Eq:
+        return IntervalSet([Interval.point(value)])
+    if op_type is ast.NotEq:
+        return IntervalSet([Interval.point(value)]).complement()
+    return None
+
+def condition_ranges(test, depth=0):
+    """
+    1つの変数についての条件式が真になる値の集合を (変数名, IntervalSet) で返す。
+    比較 (連鎖を含む)・in / not in の定数の並び・and / or / not に対応し、それ以外は None。
+    """
+    if depth > _MAX_REFINE_DEPTH:
+        return None
+    if isinstance(test, ast.UnaryOp) and isinstance(test.op, ast.Not):
+        inner = condition_ranges(test.operand, depth + 1)
+        return (inner[0], inner[1].complement()) if inner else None
+    if isinstance(test, ast.BoolOp):
+        var, result = None, None
+        for value in test.values:
+            part = condition_ranges(value, depth + 1)
+            if part is None or (var is not None and part[0] != var):
+                return None
+            var = part[0]
+            if result is None:
+                result = part[1]
+            else:
+                result = result.intersection(part[1]) if isinstance(test.op, ast.And) else result.union(part[1])
+        return var, result
+    if not isinstance(test, ast.Compare):
+        return None
+    var, result = None, None
+    operands = [test.left, *test.comparators]
+    for left, op, right in zip(operands, test.ops, operands[1:]):
+        op_type = type(op)
+        if isinstance(right, ast.Name) and not isinstance(left, ast.Name):
+            left, right = right, left
+            op_type = _SWAPPED.get(op_type)
+        if not isinstance(left, ast.Name) or (var is not None and left.id != var):
+            return None
+        if op_type in (ast.In, ast.NotIn):
+            if not isinstance(right, (ast.Tuple, ast.List, ast.Set)):
+                return None
+            values = [numeric_constant(element) for element in right.elts]
+            if None in values:
+                return None
+            ranges = IntervalSet([Interval.point(_to_float(value)) for value in values])
+            if op_type is ast.NotIn:
+                ranges = ranges.complement()
+        else:
+            value = numeric_constant(right)
+            ranges = _comparison_interval(op_type, value) if value is not None else None
+            if ranges is None:
+                return None
+        var = left.id
+        # 比較の連鎖は各比較の and
+        result = ranges if result is None else result.intersection(ranges)
+    return var, result
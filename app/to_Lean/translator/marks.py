@@ -0,0 +1,38 @@
+import re
+
+# 変換結果に埋め込む位置の目印（私用領域の文字で番号を囲む。出力前に strip で取り除く）
+# - 文の目印: 文の変換結果の先頭に置き、Python ソース上の行を持つ
+# - 証明責務の目印: その責務の `by sorry` の直前に置き、context.marked の添字を持つ
+_STATEMENT = "\ue000"
+_OBLIGATION = "\ue001"
+_END = "\ue002"
+_MARK = re.compile("([\ue000\ue001])(\\d+)\ue002")
+
+def statement(line):
+    return f"{_STATEMENT}{line}{_END}"
+
+def obligation(number):
+    return f"{_OBLIGATION}{number}{_END}"
+
+def strip(text):
+    """
+    text から目印を取り除き、(目印のない text, [(Leanの行, Pythonの行)], [(責務の番号, 文字位置)]) を返す。
+    Lean の行は text の先頭を 1 とし、文字位置は目印を取り除いた後の `by sorry` の位置。
+    """
+    if _STATEMENT not in text and _OBLIGATION not in text:
+        return text, [], []
+    out, lines, sorries = [], [], []
+    pos = length = 0
+    line = 1
+    for match in _MARK.finditer(text):
+        chunk = text[pos:match.start()]
+        out.append(chunk)
+        length += len(chunk)
+        line += chunk.count("\n")
+        if match.group(1) == _STATEMENT:
+            lines.append((line, int(match.group(2))))
+        else:
+            sorries.append((int(match.group(2)), length))
+        pos = match.end()
+    out.append(text[pos:])
+    return "".join(out), lines, sorries
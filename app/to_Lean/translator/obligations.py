@@ -0,0 +1,103 @@
+import hashlib
+import json
+from . import constants
+
+# 証明責務の種類
+PRECONDITION = "precondition"   # 呼び出し箇所で (by sorry) を渡した呼び出し先の事前条件
+ASSERT = "assert"               # have h_assert_N : ... := by sorry
+THEOREM = "theorem"             # 定理の本体の by sorry
+TERMINATION = "termination"     # 再帰関数の停止性 (termination_by の尺度が減ること)
+
+MANIFEST_VERSION = 1
+
+class Obligation:
+    """
+    変換結果に残った、証明が必要な箇所1件。
+
+    - kind: 種類 (PRECONDITION / ASSERT / THEOREM / TERMINATION)
+    - declaration: 含まれるトップレベルの宣言名
+    - goal: 証明すべき命題（assert・定理は Lean の式、事前条件は Python の式、停止性は尺度）
+    - source: ID の元にする命題の Python の式。Lean の式は定数プールの有無など他の宣言で変わるため、
+      assert・定理では Python の式を使う（省略時は goal）
+    - detail: 種類ごとの補足 ((名前, 値) のタプル。事前条件では呼び出し先と実引数の対応)
+    - line / col / end_line / end_col: Python ソース上の位置
+    - id: 内容から決まる識別子 (assign_ids で設定する)。行番号や h_assert_N の番号、他の宣言には依存しない
+    """
+    __slots__ = ("kind", "declaration", "goal", "source", "detail", "line", "col", "end_line", "end_col", "id")
+
+    def __init__(self, kind, declaration, goal, detail=(), line=None, col=None, end_line=None, end_col=None,
+                 source=None):
+        self.kind = kind
+        self.declaration = declaration
+        self.goal = goal
+        self.source = goal if source is None else source
+        self.detail = detail
+        self.line = line
+        self.col = col
+        self.end_line = end_line
+        self.end_col = end_col
+        self.id = None
+
+    @classmethod
+    def at_node(cls, kind, node, declaration, goal, detail=(), source=None):
+        return cls(kind, declaration, goal, detail, node.lineno, getattr(node, "col_offset", None),
+                   getattr(node, "end_lineno", None), getattr(node, "end_col_offset", None), source)
+
+    def shifted(self, offset):
+        """行番号を offset だけずらした複製（差分コンパイルでの再生用）"""
+        return Obligation(self.kind, self.declaration, self.goal, self.detail, self.line + offset, self.col,
+                          None if self.end_line is None else self.end_line + offset, self.end_col, self.source)
+
+    def content_key(self):
+        """識別子の元になる内容（位置と Lean の式を含まない）"""
+        return (self.kind, self.declaration, self.source, self.detail)
+
+    def to_dict(self):
+        return {
+            "id": self.id, "kind": self.kind, "declaration": self.declaration, "goal": self.goal,
+            "detail": dict(self.detail),
+            "span": {"line": self.line, "col": self.col, "end_line": self.end_line, "end_col": self.end_col},
+        }
+
+    def __repr__(self):
+        return f"Obligation({self.kind!r}, {self.declaration!r}, line={self.line}, id={self.id!r})"
+
+def assign_ids(obligations):
+    """
+    各責務に、内容 (種類・宣言名・命題・補足) と、同じ内容の責務の中での出現順から識別子を設定する。
+    無関係な宣言の編集や行の移動では変わらない。
+    """
+    seen = {}
+    for obligation in obligations:
+        key = obligation.content_key()
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        payload = json.dumps([*key[:3], [list(item) for item in key[3]], occurrence], ensure_ascii=False)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+        obligation.id = f"{obligation.kind}-{digest}"
+    return obligations
+
+def manifest(obligations, source=None):
+    """責務のリストから JSON に書き出せるマニフェストを作る"""
+    assign_ids(obligations)
+    counts = {}
+    for obligation in obligations:
+        counts[obligation.kind] = counts.get(obligation.kind, 0) + 1
+    return {
+        "version": MANIFEST_VERSION,
+        "translator": constants.TRANSLATOR_VERSION,
+        "source": source,
+        "counts": counts,
+        "obligations": [obligation.to_dict() for obligation in obligations],
+    }
+
+def write_manifest(path, obligations, source=None):
+    """マニフェストを path に書き出す"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest(obligations, source), f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+def manifest_path(lean_path):
+    """Lean ファイルの隣に置くマニフェストのパス (x.lean -> x.obligations.json)"""
+    base = lean_path[:-5] if lean_path.endswith(".lean") else lean_path
+    return base + ".obligations.json"
@@ -0,0 +1,30 @@
+import ast
+import sys
+import threading
+
+# ast.parse は AST オブジェクトの構築時に Python の再帰上限を参照するため、
+# 機械生成された深い入力 (数千項の和) では、その ast.parse の間だけ上限を引き上げる。
+# C スタックを使い切らない範囲の値にとどめる。
+PARSE_RECURSION_LIMIT = 30000
+
+_limit_lock = threading.Lock()
+
+def parse_module(code: str):
+    """
+    ソースコードを ast.Module に変換する。深い入力でも再帰上限で失敗しない。
+    再帰上限はプロセス全体の設定なので、引き上げるのは上限のままでは構築できなかった入力の再試行の間だけとし、
+    戻るとき（例外を含む）には元の値に戻す。その間に他から上限が変更された場合は、その値を残す。
+    """
+    try:
+        return ast.parse(code)
+    except RecursionError:
+        pass
+    with _limit_lock:
+        old = sys.getrecursionlimit()
+        raised = max(old, PARSE_RECURSION_LIMIT)
+        sys.setrecursionlimit(raised)
+        try:
+            return ast.parse(code)
+        finally:
+            if sys.getrecursionlimit() == raised:
+                sys.setrecursionlimit(old)
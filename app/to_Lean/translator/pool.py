@@ -0,0 +1,79 @@
+import ast
+import decimal
+from fractions import Fraction
+
+class RatPool:
+    """
+    モジュール内で繰り返し現れる小数リテラル (0.05 や Decimal('0.05')) を、共有の Rat 定義にまとめる定数プール。
+
+    役割:
+    - 解析フェーズで数えたリテラルの出現回数 (context.literals) から、threshold 回以上現れる値を選ぶ。
+    - 選んだ値はモジュールの先頭で `@[reducible] def rat_7_100 : Rat := 7/100` として1度だけ定義し、
+      使用箇所では名前で参照する（Lean が同じ値を何度も elaborate しないようにする）。
+      reducible にするのは、タクティク (decide / norm_num など) が名前を展開して値を使えるようにするため。
+    - 名前は値だけから決まるため、他の宣言を編集しても変わらない（差分コンパイルで変換結果を再利用できる）。
+      モジュールの識別子と同じ名前になる値はプールせず、(n/d : Rat) を埋め込む。
+    - threshold が None（既定）または 0 以下ではプールを使わず、(n/d : Rat) を埋め込む。
+    """
+    def __init__(self, threshold=None):
+        self.threshold = threshold
+        self.names = {}
+
+    def plan(self, literals, reserved=()):
+        """
+        リテラルの出現回数 (値 -> 回数) から、プールする値と名前を決める。
+        reserved はモジュールで使われている識別子で、これと同じ名前になる値はプールしない。
+        """
+        self.names = {}
+        if not self.threshold or self.threshold <= 0:
+            return
+        totals = {}
+        for value, count in literals.items():
+            fraction = to_fraction(value)
+            totals[fraction] = totals.get(fraction, 0) + count
+        for f, count in totals.items():
+            name = rat_name(f)
+            if count >= self.threshold and name not in reserved:
+                self.names[f] = name
+
+    def reference(self, fraction):
+        """プールした値ならその名前、そうでなければ None"""
+        return self.names.get(fraction)
+
+    def signature(self, literals):
+        """literals のうちプールされる値の集合（宣言の変換結果がプールに依存する部分）"""
+        if not self.names:
+            return frozenset()
+        return frozenset(f for f in map(to_fraction, literals) if f in self.names)
+
+    def definitions(self):
+        """プールした値の定義（値の順）。プールが空なら空文字列"""
+        return "\n".join(f"@[reducible] def {name} : Rat := {f.numerator}/{f.denominator}"
+                         for f, name in sorted(self.names.items()))
+
+def to_fraction(value):
+    """小数リテラルの値を、変換結果と同じ規則で有理数にする"""
+    return value if isinstance(value, Fraction) else Fraction(value).limit_denominator()
+
+def decimal_value(node):
+    """Decimal('0.05') / Decimal(2) のように定数1つから作る Decimal の値（有理数）。それ以外の式は None"""
+    if not isinstance(node, ast.Call) or len(node.args) != 1 or node.keywords:
+        return None
+    func = node.func
+    if not (isinstance(func, ast.Name) and func.id == "Decimal"
+            or isinstance(func, ast.Attribute) and func.attr == "Decimal"
+            and isinstance(func.value, ast.Name) and func.value.id == "decimal"):
+        return None
+    arg = node.args[0]
+    if not isinstance(arg, ast.Constant) or isinstance(arg.value, bool) or not isinstance(arg.value, (str, int)):
+        return None
+    try:
+        return Fraction(decimal.Decimal(arg.value))
+    except (decimal.InvalidOperation, ValueError, OverflowError):
+        return None
+
+def rat_name(fraction):
+    """値から決まる定義名 (7/100 -> rat_7_100, 2 -> rat_2)"""
+    sign = "neg_" if fraction < 0 else ""
+    numerator, denominator = abs(fraction.numerator), fraction.denominator
+    return f"rat_{sign}{numerator}" if denominator == 1 else f"rat_{sign}{numerator}_{denominator}"
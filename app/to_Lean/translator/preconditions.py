@@ -0,0 +1,132 @@
+import ast
+
+# 比較の向きを揃えるための対応表: a < b は b > a として扱う（Lean では定義上同じ命題）
+_FLIPPED = {ast.Lt: ast.Gt, ast.LtE: ast.GtE}
+
+def target_function(func_name):
+    """verify_X / theorem_X は X の事前条件を仮定として使う。それ以外は自身の名前を返す"""
+    if func_name and func_name.startswith(("verify_", "theorem_")):
+        return func_name.replace("verify_", "").replace("theorem_", "")
+    return func_name
+
+def condition_key(node, env=None):
+    """
+    条件式の構造を表すハッシュ可能なキーを返す。
+    - 比較は向きを揃える (0 < b と b > 0 は同じキー)。
+    - 比較の連鎖 (0 < a < 10) は各比較の and と同じキーになる。
+    - env (変数名 -> キー) が与えられた場合、変数を置き換える（呼び出し箇所での引数の代入）。
+    対応していない構文を含む場合は None を返す。
+    """
+    keys = {}
+    stack = [(node, False)]
+    while stack:
+        curr, expanded = stack.pop()
+        if not expanded:
+            stack.append((curr, True))
+            stack.extend((child, False) for child in _operands(curr))
+            continue
+        keys[curr] = _make_key(curr, keys, env)
+    return keys[node]
+
+def _operands(node):
+    if isinstance(node, ast.BinOp):
+        return [node.left, node.right]
+    if isinstance(node, ast.UnaryOp):
+        return [node.operand]
+    if isinstance(node, ast.BoolOp):
+        return node.values
+    if isinstance(node, ast.Compare):
+        return [node.left, *node.comparators]
+    if isinstance(node, ast.Attribute):
+        return [node.value]
+    return []
+
+def _make_key(node, keys, env):
+    children = [keys[child] for child in _operands(node)]
+    if None in children:
+        return None
+    if isinstance(node, ast.Name):
+        if env is not None and node.id in env:
+            return env[node.id]
+        return ("Name", node.id)
+    if isinstance(node, ast.Constant):
+        return ("Constant", type(node.value).__name__, node.value)
+    if isinstance(node, ast.Attribute):
+        return ("Attribute", children[0], node.attr)
+    if isinstance(node, ast.BinOp):
+        return ("BinOp", type(node.op).__name__, *children)
+    if isinstance(node, ast.UnaryOp):
+        return ("UnaryOp", type(node.op).__name__, *children)
+    if isinstance(node, ast.BoolOp):
+        return ("BoolOp", type(node.op).__name__, *children)
+    if isinstance(node, ast.Compare):
+        pairs = [_compare_key(op, left, right) for op, left, right in zip(node.ops, children, children[1:])]
+        # 連鎖は and の連結として Lean に変換されるため、同じ構造のキーにする
+        return pairs[0] if len(pairs) == 1 else ("BoolOp", "And", *pairs)
+    return None
+
+def _compare_key(op, left, right):
+    flipped = _FLIPPED.get(type(op))
+    if flipped is not None:
+        return ("Compare", flipped.__name__, right, left)
+    return ("Compare", type(op).__name__, left, right)
+
+class PreconditionIndex:
+    """
+    モジュール内の関数の事前条件を、正規化した構造キーで引ける索引。
+
+    役割:
+    - 関数ごとに 条件キー -> 事前条件の番号 (h_precond_i の i) の表を持つ。
+    - 呼び出し箇所では、呼び出し先の事前条件の仮引数を実引数で置き換えたキーを作り、
+      呼び出し元の表を1回引くだけで対応する仮定を見つける。
+    - 表は context.functions の事前条件から必要になった時点で作り、件数が変わったら作り直す。
+    """
+    def __init__(self, context):
+        self.context = context
+        self._tables = {}
+        self._instances = {}
+
+    def conditions(self, func_name):
+        """関数（定理の場合は被検証関数）の事前条件の条件式のリスト"""
+        return self._preconditions(target_function(func_name))
+
+    def lookup(self, func_name, key):
+        """func_name の仮定として使える事前条件のうち、キーが一致する最初のものの番号。なければ None"""
+        if key is None or not func_name:
+            return None
+        name = target_function(func_name)
+        preconds = self._preconditions(name)
+        source, count, table = self._tables.get(name, (None, 0, None))
+        if source is not preconds or count != len(preconds):
+            table = {}
+            for i, cond in enumerate(preconds):
+                table.setdefault(condition_key(cond), i)
+            table.pop(None, None)
+            self._tables[name] = (preconds, len(preconds), table)
+        return table.get(key)
+
+    def instantiate(self, func_name, args):
+        """
+        呼び出し先 func_name の事前条件を、実引数 args (ASTノードのリスト) で置き換えたキーのリストを返す。
+        置き換えられない条件（対応する実引数がない、対応していない構文を含むなど）のキーは None になる。
+        """
+        preconds = self._preconditions(func_name)
+        if not preconds:
+            return []
+        info = self.context.functions.get(func_name)
+        params = info.params if info else []
+        arg_keys = tuple(condition_key(arg) for arg in args[:len(params)])
+        # 同じ実引数での呼び出しは置き換え結果を再利用する
+        cache_key = (func_name, arg_keys)
+        cached = self._instances.get(cache_key)
+        if cached is not None and cached[0] is preconds and cached[1] == len(preconds):
+            return cached[2]
+        env = {param: None for param in params}
+        env.update(zip(params, arg_keys))
+        keys = [condition_key(cond, env) for cond in preconds]
+        self._instances[cache_key] = (preconds, len(preconds), keys)
+        return keys
+
+    def _preconditions(self, func_name):
+        info = self.context.functions.get(func_name)
+        return info.preconditions if info else []
@@ -0,0 +1,59 @@
+from .analysis import SafetyAnalyzer
+from .context import TranslationContext
+from .core import LeanTranslator
+from .parsing import parse_module
+
+class TranslatorSession:
+    """
+    解析器・翻訳器・コンテキストを使い回して、複数のモジュールを続けて変換するセッション。
+
+    役割:
+    - ディスパッチ表 (LeanTranslator.DISPATCH) はクラス単位で共有し、インスタンスごとに作り直さない。
+    - コンパイルの間でリセットするのはモジュール単位の状態 (assert_count, current_function, context) のみ。
+    - buffered=True では BufferedLeanEmitter を使い、深いネストでも文字列の再コピーを避ける。
+    - keep_ast=False では compile の後に ASTノードへの参照を手放し、次のコンパイルまで木を保持しない。
+    - max_per_code を指定すると、同じ種類の診断は1ファイルあたりその件数までしか記録・検査しない。
+    - pool_threshold 回以上現れる小数リテラルは共有の Rat 定義にまとめる (既定の None では使わない)。
+    - preamble="inline" では使うヘルパーの定義を、"import" では共有プレリュードの import を先頭に置く。
+    - 1つのセッションは1スレッドから使うこと（状態を共有するため）。
+    """
+    def __init__(self, buffered=False, keep_ast=False, max_per_code=None, pool_threshold=None,
+                 preamble=None):
+        self.keep_ast = keep_ast
+        self.context = TranslationContext(buffered=buffered, max_per_code=max_per_code, pool_threshold=pool_threshold,
+                                          preamble=preamble)
+        self.analyzer = SafetyAnalyzer(self.context)
+        self.translator = LeanTranslator(self.context)
+        self.compiles = 0
+
+    def analyze(self, tree):
+        """ASTを解析し、リセット済みのコンテキストに結果を構築して返す"""
+        self.context.reset()
+        self.analyzer.reset(self.context)
+        self.analyzer.analyze(tree)
+        return self.context
+
+    def translate(self, tree):
+        """直前に analyze したコンテキストを使ってASTをLeanコードに変換する"""
+        self.translator.reset(self.context)
+        return self.translator.translate(tree)
+
+    def compile(self, code: str):
+        """compile_python_to_lean と同じ (Leanコード, 警告リスト) を返す"""
+        self.compiles += 1
+        try:
+            tree = parse_module(code)
+            context = self.analyze(tree)
+            lean_code = self.translate(tree)
+            return lean_code, context.warnings
+        except Exception as e:
+            # パースエラー等の致命的なエラー時のハンドリング
+            return f"-- Error during translation: {str(e)}", [str(e)]
+        finally:
+            if not self.keep_ast:
+                self.release_ast()
+
+    def release_ast(self):
+        """コンテキストと翻訳器が保持する ASTノードへの参照を手放す"""
+        self.context.release_ast()
+        self.translator.release_ast()
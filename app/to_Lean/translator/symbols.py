@@ -0,0 +1,62 @@
+class LoopInfo:
+    """for ループ1つ分の解析結果（再帰関数へ変換する際の状態変数）"""
+    __slots__ = ("node", "state_vars")
+
+    def __init__(self, node, state_vars=()):
+        self.node = node
+        self.state_vars = list(state_vars)
+
+    def __repr__(self):
+        return f"LoopInfo(state_vars={self.state_vars!r})"
+
+class FunctionInfo:
+    """
+    関数1つ分の解析結果。
+
+    - params: 仮引数の名前
+    - preconditions: 事前条件として扱う assert の条件式 (ASTノード)
+    - loops: 関数内の for ループの LoopInfo
+    - divisions: 関数内の除算 (BinOp ノード)
+    - hint / is_recursive: 停止性の注釈と再帰関数かどうか
+    """
+    __slots__ = ("name", "params", "preconditions", "loops", "divisions", "hint", "is_recursive")
+
+    def __init__(self, name, params=()):
+        self.name = name
+        self.params = list(params)
+        self.preconditions = []
+        self.loops = []
+        self.divisions = []
+        self.hint = None
+        self.is_recursive = False
+
+    def copy(self):
+        """リストを複製した浅いコピー（差分コンパイルでの再利用用）"""
+        info = FunctionInfo(self.name, self.params)
+        info.preconditions = list(self.preconditions)
+        info.loops = list(self.loops)
+        info.divisions = list(self.divisions)
+        info.hint = self.hint
+        info.is_recursive = self.is_recursive
+        return info
+
+    def release_ast(self):
+        """ASTノードへの参照を手放す。事前条件とループ・除算の情報は失われる"""
+        self.preconditions = []
+        self.loops = []
+        self.divisions = []
+
+    def __repr__(self):
+        return (f"FunctionInfo({self.name!r}, params={self.params!r}, preconditions={len(self.preconditions)}, "
+                f"loops={len(self.loops)}, divisions={len(self.divisions)})")
+
+class ClassInfo:
+    """クラス1つ分の情報。kind は "enum" / "structure" のいずれか"""
+    __slots__ = ("name", "kind")
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+
+    def __repr__(self):
+        return f"ClassInfo({self.name!r}, kind={self.kind!r})"
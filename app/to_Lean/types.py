@@ -1,4 +1,5 @@
 import ast
+from .preamble import TYPE_HELPERS
 
 # Lean 4 標準型へのマッピング
 TYPE_MAP = {
@@ -37,6 +38,7 @@ def translate_type(node, context=None):
         name = node.id
         if name in TYPE_MAP:
             lean_type = TYPE_MAP[name]
+            _record(lean_type, context)
             # List や AssocList 単体で使われた場合のデフォルト補完
             if lean_type == "List": return "List Int"
             if lean_type == "AssocList": return "AssocList Int Int"
@@ -63,6 +65,13 @@ def translate_type(node, context=None):
 
     # 3. 属性アクセス (datetime.date 等)
     if isinstance(node, ast.Attribute):
-        return TYPE_MAP.get(node.attr, node.attr)
+        lean_type = TYPE_MAP.get(node.attr, node.attr)
+        _record(lean_type, context)
+        return lean_type
 
-    return "Int"
\ No newline at end of file
+    return "Int"
+
+def _record(lean_type, context):
+    """プリアンブルの定義が必要な型 (Rat, Date など) の使用をコンテキストに記録する"""
+    if context is not None and lean_type in TYPE_HELPERS:
+        context.use_helper(lean_type)
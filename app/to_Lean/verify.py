@@ -0,0 +1,455 @@
+import bisect
+import errno
+import hashlib
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import preamble as preamble_module, translator
+from .translator import constants, marks, obligations
+from .translator.context import TranslationContext
+
+try:
+    import resource
+except ImportError:  # Windows ではメモリ上限を設定しない
+    resource = None
+
+# 検査結果の状態
+OK = "ok"               # エラーなし
+SORRY = "sorry"         # エラーはないが sorry が残っている（証明責務が未証明）
+ERROR = "error"         # Lean がエラーを報告した
+TIMEOUT = "timeout"     # 時間上限を超えた
+MEMORY = "memory"       # メモリ上限を超えた（上限を設定したときの SIGKILL と ENOMEM）
+CRASHED = "crashed"     # lean を起動できなかったか、シグナルで異常終了した
+
+# 検査結果のキャッシュに保存する状態（時間・メモリの上限による失敗は環境次第なので保存しない）
+CACHEABLE = (OK, SORRY, ERROR)
+
+# 定数プールの名前 (translator/pool.py の rat_name)
+_POOLED_NAME = re.compile(r"\brat_(?:neg_)?\d+(?:_\d+)?\b")
+
+# Lean のメッセージの先頭行: <ファイル>:<行>:<列>: <重大度>: <本文>
+_MESSAGE = re.compile(r"^(?P<file>.+?):(?P<line>\d+):(?P<col>\d+): (?P<severity>error|warning|info)(?:\(\S+\))?: ?(?P<text>.*)$")
+
+class VerificationUnit:
+    """
+    単独で Lean に渡せる検査単位1つ分（トップレベルの宣言、相互再帰では mutual ブロック）。
+
+    - name: 宣言名（mutual ブロックではメンバー名のタプル、関数・クラス以外の文では None）
+    - text: その宣言の Leanコード
+    - depends: 先に定義が必要な検査単位の添字（推移的な依存先を出力順に並べたもの）
+    - requires: 直接参照する検査単位の添字（depends の部分集合。キャッシュのキーに使う）
+    - helpers: 使うプリアンブルのヘルパー名（依存するヘルパーを含む）
+    - span: Python ソース上の (開始行, 終了行)
+    - lines: (text の行, Python の行) の行順のリスト。各文の変換結果の先頭行を、その文の行に対応づける
+    - obligations: (証明責務 Obligation, text の中の `by sorry` の文字位置) の出現順のリスト
+    - constants: text が参照する定数プールの名前 -> その値の Lean の式 ((n/d : Rat))
+    """
+    __slots__ = ("name", "text", "depends", "requires", "helpers", "span", "lines", "obligations", "constants")
+
+    def __init__(self, name, text, depends, span, requires=(), helpers=frozenset(), lines=(), obligations=(),
+                 constants=None):
+        self.name = name
+        self.text = text
+        self.depends = depends
+        self.requires = requires
+        self.helpers = helpers
+        self.span = span
+        self.lines = lines
+        self.obligations = obligations
+        self.constants = constants or {}
+
+    def with_text(self, text):
+        """text だけを置き換えた複製（行数の変わらない置き換え用。行と責務の位置はそのまま使う）"""
+        return VerificationUnit(self.name, text, self.depends, self.span, self.requires, self.helpers,
+                                self.lines, self.obligations, self.constants)
+
+    def key_text(self):
+        """キャッシュのキーに使う text。定数プールの名前を値の式に展開し、プールの有無に依存しないようにする"""
+        if not self.constants:
+            return self.text
+        return _POOLED_NAME.sub(lambda m: self.constants.get(m.group(0), m.group(0)), self.text)
+
+    def python_line(self, line):
+        """text の行 line (1始まり) に対応する Python の行。前に文がなければ宣言の開始行"""
+        index = bisect.bisect_right(self.lines, (line, float("inf")))
+        return self.lines[index - 1][1] if index else self.span[0]
+
+    def __repr__(self):
+        return f"VerificationUnit({self.name!r}, span={self.span!r}, depends={self.depends!r})"
+
+class VerificationResult:
+    """
+    検査単位1つの結果。messages は Lean のメッセージを Python の行に対応づけた辞書のリスト。
+    cached はキャッシュから得た結果か。
+    """
+    __slots__ = ("name", "status", "messages", "seconds", "span", "cached")
+
+    def __init__(self, name, status, messages, seconds, span, cached=False):
+        self.name = name
+        self.status = status
+        self.messages = messages
+        self.seconds = seconds
+        self.span = span
+        self.cached = cached
+
+    def to_dict(self):
+        name = list(self.name) if isinstance(self.name, tuple) else self.name
+        return {"declaration": name, "status": self.status, "seconds": self.seconds, "cached": self.cached,
+                "span": {"line": self.span[0], "end_line": self.span[1]}, "messages": self.messages}
+
+    def __repr__(self):
+        return f"VerificationResult({self.name!r}, {self.status!r}, messages={len(self.messages)})"
+
+def split_declarations(code, preamble="inline", pool_threshold=None):
+    """
+    Pythonソースを変換し、(共通の前置き, 検査単位のリスト, 警告リスト) を返す。
+    前置きはプリアンブルと定数プールの定義で、すべての検査単位の先頭に置く。
+    単独で検査できるよう、既定では使うヘルパーの定義を前置きに含める (preamble="inline")。
+    前置きと各単位の Leanコードを出力順に空行で区切って並べると、compile_python_to_lean の結果と同じになる。
+    各単位には、変換時に埋め込んだ目印から求めた Lean の行と Python の行の対応と、証明責務の位置を持たせる
+    （責務の ID はマニフェスト (compile_python_to_lean_with_obligations) と同じ）。
+    pool_threshold は compile_python_to_lean と同じ（定数プールの定義も前置きに入る）。
+    変換に失敗したら SyntaxError などの例外をそのまま送出する。
+    """
+    # 宣言ごとに使うヘルパーを記録するため、プリアンブルは変換し終えてから作る
+    context = TranslationContext(pool_threshold=pool_threshold)
+    context.marks = True
+    tree = translator.parse_module(code)
+    context, stmt_warnings = translator.analyze_declarations(tree, context)
+    positions = {id(stmt): i for i, stmt in enumerate(tree.body)}
+    head, units, warnings = [], [], []
+    unit_of = {}
+    pooled = None
+    helpers = context.helpers
+    for stmts, lean_code in translator.iter_declaration_groups(tree, context):
+        used, context.helpers = context.helpers, set()
+        helpers |= used
+        for stmt in stmts:
+            warnings.extend(stmt_warnings[positions[id(stmt)]])
+        if not lean_code:
+            continue
+        lean_code, lines, sorries = marks.strip(lean_code)
+        if not stmts:
+            head.append(lean_code)
+            continue
+        indices = [positions[id(stmt)] for stmt in stmts]
+        names = [getattr(stmt, "name", None) for stmt in stmts]
+        name = tuple(names) if len(names) > 1 else names[0]
+        span = (min(stmt.lineno for stmt in stmts), max(stmt.end_lineno for stmt in stmts))
+        graph = context.call_graph
+        requires = sorted({unit_of[j] for i in indices for j in graph.edges[i] if j in unit_of})
+        for i in indices:
+            unit_of[i] = len(units)
+        found = {}
+        for number, offset in sorries:
+            found.setdefault(context.marked[number], offset)
+        if pooled is None:
+            # 定数プールは変換の開始時に決まる
+            pooled = {name: f"({f.numerator}/{f.denominator} : Rat)" for f, name in context.rat_pool.names.items()}
+        constants = {m: pooled[m] for m in _POOLED_NAME.findall(lean_code) if m in pooled} if pooled else None
+        units.append(VerificationUnit(name, lean_code, _dependencies(graph, indices, unit_of), span,
+                                      requires, frozenset(preamble_module.resolve(used)), lines,
+                                      [(context.obligations[key], offset) for key, offset in found.items()],
+                                      constants))
+    obligations.assign_ids(context.obligation_list())
+    header = preamble_module.header(helpers, preamble)
+    return "\n\n".join(([header] if header else []) + head), units, warnings
+
+def _dependencies(graph, indices, unit_of):
+    """宣言（添字のリスト）が推移的に依存する検査単位を出力順に返す（依存先は出力済み）"""
+    seen, stack = set(indices), list(indices)
+    found = set()
+    while stack:
+        for j in graph.edges[stack.pop()]:
+            if j not in seen:
+                seen.add(j)
+                stack.append(j)
+                if j in unit_of:
+                    found.add(unit_of[j])
+    return sorted(found)
+
+def unit_keys(units, options=None):
+    """
+    各検査単位のキャッシュキー（Merkle 風のハッシュ）を units と同じ順で返す。
+    キーは 宣言の Leanコード・直接参照する検査単位のキー・使うヘルパーの定義・検査のオプション から作るため、
+    ある宣言を編集すると、それを推移的に参照する宣言のキーだけが変わる。
+    Leanコードの定数プールの名前は値の式に展開してからハッシュする。他の宣言の編集でリテラルが
+    プールに入ったり外れたりしても、宣言のキーは変わらない。
+    """
+    keys = []
+    for unit in units:
+        h = hashlib.sha256()
+        h.update(constants.TRANSLATOR_VERSION.encode("utf-8"))
+        h.update(b"\0")
+        h.update(json.dumps(options or {}, sort_keys=True, default=str).encode("utf-8"))
+        h.update(b"\0")
+        h.update(unit.key_text().encode("utf-8"))
+        for name in sorted(unit.helpers):
+            h.update(b"\0helper\0")
+            h.update(json.dumps(preamble_module.SECTIONS[name], ensure_ascii=False).encode("utf-8"))
+        for d in unit.requires:
+            h.update(b"\0requires\0")
+            h.update(keys[d].encode("ascii"))
+        keys.append(h.hexdigest())
+    return keys
+
+class LeanVerifier:
+    """
+    変換結果を宣言ごとに Lean で検査する。
+
+    役割:
+    - 変換結果を宣言単位 (VerificationUnit) に分け、前置き・依存先の宣言・対象の宣言からなる
+      ファイルを作って lean に渡す。1つの宣言のエラーや時間切れが他の宣言の結果に影響しない。
+    - workers 個の lean プロセスを並行に動かす（プロセスの起動と待機だけなのでスレッドで管理する）。
+    - 宣言ごとに時間 (timeout 秒) とメモリ (memory_mb MiB, アドレス空間の上限) を制限する。
+      メモリの上限は起動した lean に prlimit で設定する（prlimit のない環境ではシェルの ulimit を経由して起動する）。
+    - Lean のメッセージの位置を、対象の宣言の Python ソース上の行（メッセージの出た文の行）に対応づける。
+      依存先の宣言の部分で出たメッセージは、その宣言自身の結果として報告されるため除く。
+    lean には実行ファイルのパスかコマンドのリストを渡せる (["lake", "env", "lean"] や、テスト用の代わりのスクリプト)。
+    cache に VerificationCache を渡すと、キー (unit_keys) が変わらない宣言は lean を実行せずに結果を返す。
+    pool_threshold は変換に渡す（compile_python_to_lean と同じ）。
+    """
+    def __init__(self, lean="lean", workers=None, timeout=60.0, memory_mb=None, cwd=None, preamble="inline",
+                 cache=None, pool_threshold=None):
+        self.command = [lean] if isinstance(lean, str) else list(lean)
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.cwd = cwd
+        self.preamble = preamble
+        self.cache = cache
+        self.pool_threshold = pool_threshold
+
+    def verify(self, code, scope=None):
+        """
+        Pythonソースを変換して宣言ごとに検査し、レポート（宣言ごとの結果と集計）を返す。
+        scope はキャッシュで宣言名を区別する名前（ファイルのパスなど）。
+        キャッシュを使う場合、集計の "cache" にヒット数と無効化された宣言（と理由）を加える。
+        変換に失敗した場合は status "error" で宣言のないレポートを返す。
+        """
+        started = time.perf_counter()
+        try:
+            prelude, units, warnings = split_declarations(code, self.preamble, self.pool_threshold)
+        except Exception as e:
+            return _report([], [str(e)], time.perf_counter() - started, failed=True)
+        results, invalidated = self._verify_units(prelude, units, scope)
+        report = _report(results, warnings, time.perf_counter() - started)
+        if self.cache is not None:
+            hits = sum(1 for r in results if r.cached)
+            report["summary"]["cache"] = {"hits": hits, "misses": len(results) - hits, "invalidated": invalidated}
+        return report
+
+    def verify_units(self, prelude, units, scope=None):
+        """検査単位を並行に検査し、units と同じ順の VerificationResult のリストを返す"""
+        return self._verify_units(prelude, units, scope)[0]
+
+    def _verify_units(self, prelude, units, scope):
+        results = [None] * len(units)
+        invalidated = []
+        keys = digests = None
+        if self.cache is not None:
+            keys = unit_keys(units, {"lean": self.command, "preamble": self.preamble})
+            digests = [hashlib.sha256(unit.key_text().encode("utf-8")).hexdigest() for unit in units]
+            for index, unit in enumerate(units):
+                entry, reason = self.cache.lookup(scope, unit.name, keys[index], digests[index])
+                if entry is not None:
+                    results[index] = _cached_result(unit, entry)
+                elif reason is not None:
+                    name = list(unit.name) if isinstance(unit.name, tuple) else unit.name
+                    invalidated.append({"declaration": name, "reason": reason})
+        pending = [index for index, result in enumerate(results) if result is None]
+        if pending:
+            directory = tempfile.mkdtemp(prefix="pylean_verify_")
+            try:
+                jobs = [(index, directory, prelude, units) for index in pending]
+                if self.workers <= 1 or len(jobs) == 1:
+                    checked = [self._check(*job) for job in jobs]
+                else:
+                    with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                        checked = list(pool.map(lambda job: self._check(*job), jobs))
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+            for index, result in zip(pending, checked):
+                results[index] = result
+                if self.cache is not None and result.status in CACHEABLE:
+                    self.cache.store(scope, units[index].name, keys[index], digests[index],
+                                     _cache_entry(result))
+        if self.cache is not None:
+            self.cache.flush()
+        return results, invalidated
+
+    def render_unit(self, prelude, units, index):
+        """
+        検査単位 index を検査するファイルの内容と、前置きの最終行・対象の宣言の開始行（どちらも1始まり）を返す。
+        ファイルは 前置き・依存先の宣言（出力順）・対象の宣言 を空行で区切って並べたもの。
+        """
+        unit = units[index]
+        parts = [prelude] if prelude else []
+        parts += [units[d].text for d in unit.depends]
+        head = "\n\n".join(parts)
+        prelude_end = prelude.count("\n") + 1 if prelude else 0
+        start = head.count("\n") + 3 if head else 1
+        return (f"{head}\n\n{unit.text}" if head else unit.text) + "\n", prelude_end, start
+
+    def run(self, path):
+        """
+        lean でファイルを1つ検査し、(状態, 出力) を返す。状態は ERROR / TIMEOUT / MEMORY / CRASHED か、
+        終了コードが 0 なら None（メッセージを見て決める）。
+        """
+        try:
+            process = self.start(path)
+        except OSError as e:
+            return CRASHED, f"{self.command[0]}: {e}"
+        return self.wait(process)
+
+    @property
+    def limits_memory(self):
+        """起動する lean にメモリの上限を設定するか"""
+        return bool(self.memory_mb) and resource is not None
+
+    def start(self, path):
+        """lean を時間を待たずに起動し、Popen を返す（途中で kill できるように。起動できなければ OSError）"""
+        argv = self.command + [path]
+        prlimit = getattr(resource, "prlimit", None)
+        if self.limits_memory and prlimit is None:
+            argv = ["/bin/sh", "-c", f'ulimit -v {self.memory_mb * 1024} && exec "$@"', "sh"] + argv
+        # preexec_fn はスレッドから Popen を呼ぶと安全でないため使わない（検査・証明はスレッドで lean を起動する）
+        process = subprocess.Popen(argv, cwd=self.cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if self.limits_memory and prlimit is not None:
+            limit = self.memory_mb * 1024 * 1024
+            try:
+                prlimit(process.pid, resource.RLIMIT_AS, (limit, limit))
+            except OSError:
+                # すでに終了している
+                pass
+        return process
+
+    def wait(self, process):
+        """start で起動した lean の終了を時間上限まで待ち、run と同じ (状態, 出力) を返す"""
+        try:
+            stdout, stderr = process.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            stdout, stderr = process.communicate()
+            return TIMEOUT, _text(stdout) + _text(stderr)
+        output = stdout + stderr
+        if process.returncode < 0:
+            number = -process.returncode
+            if self.limits_memory and (number == getattr(signal, "SIGKILL", None) or _out_of_memory(output)):
+                return MEMORY, output
+            return CRASHED, f"{output}\n{self.command[0]}: terminated by {_signal_name(number)}"
+        if self.limits_memory and _out_of_memory(output):
+            return MEMORY, output
+        return (None if process.returncode == 0 else ERROR), output
+
+    def write_unit(self, directory, prelude, units, index, suffix=""):
+        """検査単位 index のファイルを directory に書き、(パス, 前置きの最終行, 対象の宣言の開始行) を返す"""
+        text, prelude_end, start = self.render_unit(prelude, units, index)
+        path = os.path.join(directory, f"unit_{index}{suffix}.lean")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path, prelude_end, start
+
+    def interpret(self, unit, status, output, prelude_end, start, seconds):
+        """lean の出力を、対象の宣言の VerificationResult にまとめる（メッセージを Python の行に対応づける）"""
+        end = start + unit.text.count("\n")
+        messages = []
+        for message in parse_messages(output):
+            line = message["lean_line"]
+            if start <= line <= end:
+                # 宣言の中の行は、その行を含む文の Python ソース上の行に対応づける
+                message["lean_line"] = line - start + 1
+                message["python_line"] = unit.python_line(message["lean_line"])
+            elif line <= prelude_end:
+                # 前置き（プリアンブル）で出たメッセージは Python の行を持たない
+                message["lean_line"] = None
+                message["python_line"] = None
+            else:
+                continue
+            messages.append(message)
+        if status is None:
+            if any(m["severity"] == "error" for m in messages):
+                status = ERROR
+            elif any(m["severity"] == "warning" and "sorry" in m["message"] for m in messages):
+                status = SORRY
+            else:
+                status = OK
+        elif status in (ERROR, CRASHED) and not messages and output.strip():
+            messages.append({"severity": "error", "message": output.strip()[-2000:], "lean_line": None,
+                             "lean_col": None, "python_line": None})
+        return VerificationResult(unit.name, status, messages, seconds, unit.span)
+
+    def _check(self, index, directory, prelude, units):
+        path, prelude_end, start = self.write_unit(directory, prelude, units, index)
+        started = time.perf_counter()
+        status, output = self.run(path)
+        return self.interpret(units[index], status, output, prelude_end, start, time.perf_counter() - started)
+
+def parse_messages(output):
+    """Lean の出力からメッセージ (重大度, 本文, 行, 列) を取り出す。続きの行は本文に含める"""
+    messages = []
+    for line in output.splitlines():
+        match = _MESSAGE.match(line)
+        if match:
+            messages.append({"severity": match["severity"], "message": match["text"],
+                             "lean_line": int(match["line"]), "lean_col": int(match["col"])})
+        elif messages and line.strip():
+            messages[-1]["message"] += "\n" + line
+    return messages
+
+def verify_python(code, lean="lean", workers=None, timeout=60.0, memory_mb=None, cwd=None, cache=None,
+                  pool_threshold=None):
+    """Pythonソースを変換して宣言ごとに Lean で検査し、レポートを返す"""
+    verifier = LeanVerifier(lean, workers=workers, timeout=timeout, memory_mb=memory_mb, cwd=cwd, cache=cache,
+                            pool_threshold=pool_threshold)
+    return verifier.verify(code)
+
+def _cache_entry(result):
+    """
+    キャッシュに保存する形。Python の行は保存せず、読み出すときに宣言内の Lean の行から求め直す
+    （Leanコードが同じでも、空行やコメントの編集で Python の行はずれるため）
+    """
+    messages = [{k: v for k, v in message.items() if k != "python_line"} for message in result.messages]
+    return {"status": result.status, "messages": messages, "seconds": result.seconds}
+
+def _cached_result(unit, entry):
+    messages = []
+    for message in entry["messages"]:
+        message = dict(message)
+        line = message["lean_line"]
+        message["python_line"] = None if line is None else unit.python_line(line)
+        messages.append(message)
+    return VerificationResult(unit.name, entry["status"], messages, entry["seconds"], unit.span, cached=True)
+
+def _report(results, warnings, elapsed, failed=False):
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    if failed or any(r.status not in (OK, SORRY) for r in results):
+        status = ERROR
+    else:
+        status = SORRY if counts.get(SORRY) else OK
+    return {"status": status, "declarations": [r.to_dict() for r in results], "warnings": list(warnings),
+            "summary": {"declarations": len(results), "counts": counts, "seconds": elapsed}}
+
+def _out_of_memory(output):
+    """lean がメモリの確保に失敗したことを示す出力か (Lean の out of memory と ENOMEM)"""
+    output = output.lower()
+    return "out of memory" in output or os.strerror(errno.ENOMEM).lower() in output
+
+def _signal_name(number):
+    try:
+        return signal.Signals(number).name
+    except ValueError:
+        return f"signal {number}"
+
+def _text(data):
+    if data is None:
+        return ""
+    return data.decode("utf-8", "replace") if isinstance(data, bytes) else data
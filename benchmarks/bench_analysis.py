@@ -0,0 +1,63 @@
+"""
+SafetyAnalyzer のネストの深さに対するスケーリングを測るベンチマーク。
+
+1. for ループを depth 段ネストし、最内側に代入文を並べた関数を解析する。
+   解析が1回の走査で済んでいれば、ノードあたりの時間は深さによらずほぼ一定になる。
+2. if b != 0: で守られた除算を count 個含む関数を解析する。
+   ガードの表は関数ごとに1回だけ作るため、除算1つあたりの時間は個数によらずほぼ一定になる。
+
+実行: python benchmarks/bench_analysis.py
+"""
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean import translator
+
+def nested_loops_source(depth, inner_stmts=200):
+    """depth 段の for ループの最内側に inner_stmts 個の代入文を置いた関数"""
+    lines = ["def f(n, total, rate):"]
+    for level in range(depth):
+        lines.append("    " * (level + 1) + f"for i{level} in range(n):")
+    indent = "    " * (depth + 1)
+    for k in range(inner_stmts):
+        lines.append(f"{indent}total = total + rate * {k}")
+    lines.append("    return total")
+    return "\n".join(lines) + "\n"
+
+def guarded_divisions_source(count):
+    """早期 return と if で守られた除算を count 個含む関数"""
+    lines = ["def f(a, b, c):", "    if c == 0:", "        return 0", "    total = 0"]
+    for k in range(count):
+        lines += [f"    if b != 0 and a > {k}:", f"        total = total + a / b + {k} / c", "    else:",
+                  f"        total = total - {k}"]
+    lines.append("    return total")
+    return "\n".join(lines) + "\n"
+
+def measure(tree, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        translator.analyze(tree)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    # Python のインデントは最大 100 段のため、深さは 90 段までとする
+    for depth in (1, 10, 30, 60, 90):
+        tree = ast.parse(nested_loops_source(depth))
+        nodes = sum(1 for _ in ast.walk(tree))
+        seconds = measure(tree)
+        print(f"depth={depth:3d}  nodes={nodes:6d}  {seconds * 1e3:8.2f} ms  {seconds / nodes * 1e6:6.2f} us/node")
+
+    for count in (100, 1000, 5000):
+        tree = ast.parse(guarded_divisions_source(count))
+        seconds = measure(tree)
+        divisions = 2 * count
+        print(f"guarded divisions={divisions:6d}  {seconds * 1e3:8.2f} ms  {seconds / divisions * 1e6:6.2f} us/division")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+呼び出し箇所の多いモジュールの変換時間を測るベンチマーク。
+
+事前条件を持つ関数 callee を、同じ事前条件を持つ関数から calls 回呼び出す。
+呼び出しごとに両者の事前条件を Lean の文字列へ変換する必要があるため、
+式の変換結果をメモ化すると呼び出し回数に比例する再変換がなくなる。
+
+実行: python benchmarks/bench_call_sites.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean.translator import TranslatorSession, parse_module
+
+PRECONDITIONS = [
+    "price > 0",
+    "rate >= 0 and rate <= 1",
+    "price * (1 + rate) - price * rate * rate / 2 > 0",
+    "(price + rate) * (price - rate) != 0",
+]
+
+def call_sites_source(calls, loops=50):
+    """事前条件付きの関数と、それを calls 回呼び出す関数・loops 個の for ループを持つモジュール"""
+    asserts = [f"    assert {cond}" for cond in PRECONDITIONS]
+    lines = ["def callee(price: float, rate: float) -> float:", *asserts, "    return price * rate", ""]
+    lines += ["def caller(price: float, rate: float) -> float:", *asserts, "    total = 0"]
+    for k in range(calls):
+        lines.append(f"    total = total + callee(price, rate) * {k}")
+    for k in range(loops):
+        lines.append(f"    for i{k} in range(3):")
+        lines.append(f"        total = total + {k}")
+    lines.append("    return total")
+    return "\n".join(lines) + "\n"
+
+def measure(tree, repeat=5):
+    session = TranslatorSession()
+    session.analyze(tree)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        session.translate(tree)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    for calls in (100, 500, 2000):
+        tree = parse_module(call_sites_source(calls))
+        seconds = measure(tree)
+        print(f"calls={calls:5d}  {seconds * 1e3:8.2f} ms  {seconds / calls * 1e6:7.2f} us/call")
+
+if __name__ == "__main__":
+    main()
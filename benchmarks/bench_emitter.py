@@ -0,0 +1,60 @@
+"""
+深くネストした if / elif 入力での LeanEmitter と BufferedLeanEmitter の比較ベンチマーク。
+
+実行: python benchmarks/bench_emitter.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean.translator import TranslatorSession, parse_module
+
+def nested_if_source(depth, stmts_per_level=3):
+    """then 節の中に if を depth 段ネストさせた関数"""
+    lines = ["def nested(x: int) -> int:"]
+    for level in range(depth):
+        pad = "    " * (level + 1)
+        lines.append(f"{pad}if x > {level}:")
+        for k in range(stmts_per_level):
+            lines.append(f"{pad}    v{k} = x * {level} + {k}")
+        lines.append(f"{pad}else:")
+        lines.append(f"{pad}    return {level}")
+    lines.append("    " * (depth + 1) + "return x")
+    return "\n".join(lines)
+
+def elif_ladder_source(length, stmts_per_branch=1):
+    """elif が length 個続く料率表のような関数"""
+    lines = ["def rate(x: int) -> int:", "    if x <= 0:", "        return 0"]
+    for i in range(1, length):
+        lines.append(f"    elif x <= {i * 100}:")
+        lines += [f"        t{k} = x * {i} + {k}" for k in range(stmts_per_branch - 1)]
+        lines.append(f"        return {i}")
+    lines += ["    else:", f"        return {length}"]
+    return "\n".join(lines)
+
+def measure(tree, buffered, repeat=3):
+    session = TranslatorSession(buffered=buffered)
+    session.analyze(tree)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = session.translate(tree)
+        best = min(best, time.perf_counter() - started)
+    return best, text
+
+def main():
+    # Python のインデントは最大 100 段のため、ネストの深さは elif の連鎖で稼ぐ
+    cases = [(f"nested if depth={d}", nested_if_source(d, 20)) for d in (30, 60, 90)]
+    cases += [(f"elif ladder k={k}", elif_ladder_source(k)) for k in (250, 500, 1000, 2000)]
+    for label, source in cases:
+        tree = parse_module(source)
+        plain, plain_text = measure(tree, buffered=False)
+        buffered, buffered_text = measure(tree, buffered=True)
+        assert plain_text == buffered_text
+        print(f"{label:24s} string: {plain * 1e3:8.2f} ms  buffered: {buffered * 1e3:8.2f} ms  "
+              f"output: {len(plain_text) / 1024:8.1f} KiB")
+
+if __name__ == "__main__":
+    main()
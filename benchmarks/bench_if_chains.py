@@ -0,0 +1,56 @@
+"""
+if-elif チェーンの到達可能性解析のスケーリングを測るベンチマーク。
+
+税率表のように、昇順の区分 (elif income <= 上限:) を branches 個並べた関数と、
+0 <= x < 10 のような連鎖比較の区分を並べた関数を解析する。
+チェーンは先頭の if で1回だけ解析し、各条件は IntervalSet の二分探索で判定するため、
+分岐1つあたりの時間は分岐の数によらずほぼ一定になる。
+
+実行: python benchmarks/bench_if_chains.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean import translator
+from to_Lean.translator import parse_module
+
+def bracket_source(branches):
+    """income <= 上限 の区分を branches 個並べた関数（最後の1つは前の区分に覆われる）"""
+    lines = ["def tax(income):"]
+    for k in range(branches):
+        keyword = "if" if k == 0 else "elif"
+        lines += [f"    {keyword} income <= {(k + 1) * 100}:", f"        return {k}"]
+    lines += ["    elif income <= 50:", "        return -1", "    else:", "        return 0"]
+    return "\n".join(lines) + "\n"
+
+def range_source(branches):
+    """lo <= x < hi の区分を branches 個並べた関数"""
+    lines = ["def fee(x):"]
+    for k in range(branches):
+        keyword = "if" if k == 0 else "elif"
+        lines += [f"    {keyword} {k * 10} <= x < {(k + 1) * 10}:", f"        return {k}"]
+    lines += ["    else:", "        return 0"]
+    return "\n".join(lines) + "\n"
+
+def measure(tree, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        context = translator.analyze(tree)
+        best = min(best, time.perf_counter() - started)
+    return best, context
+
+def main():
+    for name, source in (("brackets", bracket_source), ("ranges", range_source)):
+        for branches in (100, 1000, 5000):
+            tree = parse_module(source(branches))
+            seconds, context = measure(tree)
+            unreachable = sum("Logic Inconsistency" in warning for warning in context.warnings)
+            print(f"{name:8s} branches={branches:6d}  {seconds * 1e3:8.2f} ms  "
+                  f"{seconds / branches * 1e6:7.2f} us/branch  unreachable={unreachable}")
+
+if __name__ == "__main__":
+    main()
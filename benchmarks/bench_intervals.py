@@ -0,0 +1,90 @@
+"""
+区間抽象解釈 (IntervalAnalysis) のスケーリングを測るベンチマーク。
+
+1. 代入・分岐・range ループを持つ関数を functions 個並べたモジュールを解析する。
+   関数ごとに独立して解析するため、関数あたりの時間は個数によらずほぼ一定になる。
+2. 1つの関数に statements 個の代入と if を並べる。命令列の各命令は定数回しか処理されないため、
+   文あたりの時間は関数の大きさによらずほぼ一定になる。
+3. for ループを depth 段ネストする。widening により、ループ先頭の再評価は変数ごとに定数回で止まる。
+
+実行: python benchmarks/bench_intervals.py
+"""
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean import translator
+from to_Lean.translator.intervals import IntervalAnalysis
+
+def module_source(functions):
+    """事前条件・range ループ・分岐・除算を持つ関数を functions 個並べたモジュール"""
+    lines = []
+    for k in range(functions):
+        lines += [
+            f"def f{k}(price: float, n: int) -> float:",
+            "    assert n > 0",
+            "    total = 0.0",
+            "    count = 1",
+            "    for i in range(n):",
+            "        if i % 2 == 0:",
+            "            total = total + price",
+            "        else:",
+            "            total = total - price / 2",
+            "        count += 1",
+            "    return total / count",
+            "",
+        ]
+    return "\n".join(lines)
+
+def straight_line_source(statements):
+    """代入と if を statements 個並べた1つの関数"""
+    lines = ["def f(a: int, b: int):", "    x = 1"]
+    for k in range(statements):
+        if k % 3 == 0:
+            lines += [f"    if a > {k}:", f"        x = x + {k}", "    else:", "        x = x - 1"]
+        else:
+            lines.append(f"    y{k} = x * {k % 7} + b")
+    lines.append("    return a / x")
+    return "\n".join(lines) + "\n"
+
+def nested_loops_source(depth):
+    """depth 段の for ループの最内側でカウンタを増やす関数"""
+    lines = ["def f(n: int):", "    s = 1"]
+    for level in range(depth):
+        lines.append("    " * (level + 1) + f"for i{level} in range(n):")
+    lines.append("    " * (depth + 1) + "s = s + 1")
+    lines.append("    return n / s")
+    return "\n".join(lines) + "\n"
+
+def best_of(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    for functions in (100, 1000, 5000):
+        tree = ast.parse(module_source(functions))
+        seconds = best_of(lambda: translator.analyze(tree))
+        print(f"functions={functions:6d}  analyze {seconds * 1e3:8.2f} ms  {seconds / functions * 1e6:7.2f} us/function")
+
+    for statements in (1000, 5000, 20000):
+        func = ast.parse(straight_line_source(statements)).body[0]
+        result = IntervalAnalysis(func)
+        seconds = best_of(lambda: IntervalAnalysis(func))
+        print(f"statements={statements:6d}  {seconds * 1e3:8.2f} ms  {seconds / statements * 1e6:7.2f} us/statement"
+              f"  ({result.visits} instruction visits)")
+
+    for depth in (1, 10, 30, 60, 90):
+        func = ast.parse(nested_loops_source(depth)).body[0]
+        result = IntervalAnalysis(func)
+        seconds = best_of(lambda: IntervalAnalysis(func))
+        print(f"depth={depth:3d}  {seconds * 1e3:8.2f} ms  ({result.visits} instruction visits)")
+
+if __name__ == "__main__":
+    main()
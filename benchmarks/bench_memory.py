@@ -0,0 +1,93 @@
+"""
+TranslationContext の解析結果が使うメモリを測るベンチマーク。
+
+1. 関数ごとの解析結果を、以前の辞書の形式 ({"loop_info": [{"state_vars", "node"}], "preconditions": ...})
+   と __slots__ のレコード (FunctionInfo / LoopInfo) で保持した場合の大きさを比べる。
+2. TranslatorSession.compile の後にセッションが保持し続けるメモリを、
+   keep_ast=True（AST を保持）と keep_ast=False（変換後に参照を手放す）で比べる。
+
+実行: python benchmarks/bench_memory.py
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean.translator import TranslatorSession, parse_module
+
+def generated_module(functions):
+    """事前条件・for ループ・除算を持つ関数を functions 個並べたモジュール"""
+    lines = []
+    for k in range(functions):
+        lines += [
+            f"def f{k}(price: float, rate: float, n: int) -> float:",
+            "    assert price > 0",
+            "    assert rate >= 0 and rate <= 1",
+            "    assert n > 0",
+            "    total = 0",
+            "    for i in range(n):",
+            "        total = total + price * rate / n",
+            "    return total / price",
+            "",
+        ]
+    return "\n".join(lines)
+
+def legacy_records(functions):
+    """以前の形式（関数ごとの辞書）に変換する"""
+    return {
+        name: {
+            "loop_info": [{"state_vars": list(loop.state_vars), "node": loop.node} for loop in info.loops],
+            "preconditions": list(info.preconditions),
+            "params": list(info.params),
+            "divisions": list(info.divisions),
+        }
+        for name, info in functions.items()
+    }
+
+def records_size(obj, seen=None):
+    """レコードとコンテナの大きさの合計（ASTノードと文字列は共有されるため数えない）"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen or not isinstance(obj, (dict, list, tuple, set)) and not hasattr(obj, "__slots__"):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        children = list(obj.values())
+    elif isinstance(obj, (list, tuple, set)):
+        children = list(obj)
+    else:
+        children = [getattr(obj, slot, None) for slot in obj.__slots__]
+    return size + sum(records_size(child, seen) for child in children if not _is_ast(child))
+
+def _is_ast(obj):
+    return type(obj).__module__ == "ast"
+
+def retained_after_compile(code, keep_ast):
+    """compile の後、セッションが保持しているメモリ量（バイト）"""
+    gc.collect()
+    tracemalloc.start()
+    session = TranslatorSession(keep_ast=keep_ast)
+    session.compile(code)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak, session
+
+def main(functions=2000):
+    code = generated_module(functions)
+    session = TranslatorSession()
+    session.analyze(parse_module(code))
+    slots = records_size(session.context.functions)
+    legacy = records_size(legacy_records(session.context.functions))
+    print(f"records for {functions} functions: dict {legacy / 1024:8.1f} KiB  slots {slots / 1024:8.1f} KiB"
+          f"  ({slots / legacy:.0%})")
+
+    for keep_ast in (True, False):
+        current, peak, _ = retained_after_compile(code, keep_ast)
+        print(f"keep_ast={keep_ast!s:5}  retained after compile {current / 1024 / 1024:7.2f} MiB"
+              f"  peak {peak / 1024 / 1024:7.2f} MiB")
+
+if __name__ == "__main__":
+    main()
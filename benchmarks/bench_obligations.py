@@ -0,0 +1,75 @@
+"""
+証明責務マニフェストのベンチマーク。
+
+事前条件付きの関数・assert・再帰関数を含むモジュールを functions 組分作り、
+- 通常の変換と、マニフェストも作る変換の時間
+- 責務の種類ごとの件数
+- 先頭に無関係な関数を1つ足したとき、ID が変わらずに残った責務の割合（100% になるはず）
+- IncrementalSession で1関数だけ編集したときの再変換数と、責務が全体変換と一致するか
+を表示する。
+
+実行: python benchmarks/bench_obligations.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean import IncrementalSession, compile_python_to_lean_with_obligations
+from to_Lean.translator import TranslatorSession
+from to_Lean.translator.obligations import manifest
+
+def module_source(functions):
+    lines = []
+    for k in range(functions):
+        lines += [
+            f"def safe{k}(x: int) -> int:",
+            "    assert x > 0",
+            "    return x - 1",
+            "",
+            f"def use{k}(y: int) -> int:",
+            f"    z = safe{k}(y)",
+            "    assert z >= 0",
+            "    return z",
+            "",
+            f"def count{k}(n: int) -> int:",
+            "    if n <= 0:",
+            "        return 0",
+            f"    return count{k}(n - 1) + 1",
+            "",
+        ]
+    return "\n".join(lines)
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+def main(functions=200):
+    code = module_source(functions)
+    _, plain = timed(TranslatorSession().compile, code)
+    (_, _, first), with_manifest = timed(compile_python_to_lean_with_obligations, code)
+    print(f"translate          {plain * 1e3:8.1f} ms")
+    print(f"with manifest      {with_manifest * 1e3:8.1f} ms  obligations {len(first['obligations']):5d}  "
+          f"{first['counts']}")
+
+    edited = "def extra(a: int) -> int:\n    return a\n\n" + code
+    _, _, second = compile_python_to_lean_with_obligations(edited)
+    before = {o["id"] for o in first["obligations"]}
+    after = {o["id"] for o in second["obligations"]}
+    print(f"stable ids         {len(before & after) / len(before):8.1%}  (after prepending an unrelated function)")
+
+    session = IncrementalSession()
+    session.compile(code)
+    changed = code.replace("    return z\n", "    return z + 0\n", 1)
+    before_stats = session.stats()
+    _, incremental = timed(session.compile, changed)
+    retranslated = session.stats()["retranslated"] - before_stats["retranslated"]
+    _, _, full = compile_python_to_lean_with_obligations(changed)
+    same = manifest(session.obligations()) == full
+    print(f"incremental edit   {incremental * 1e3:8.1f} ms  retranslated {retranslated:5d}  "
+          f"matches full compile {same}")
+
+if __name__ == "__main__":
+    main()
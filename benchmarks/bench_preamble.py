@@ -0,0 +1,48 @@
+"""
+プリアンブルの出力方式ごとの出力量と変換時間を測るベンチマーク。
+
+除算・小数・sum を使う小さなファイルを files 個変換し、
+preamble=None / "inline" (ファイルごとに使うヘルパーを定義) / "import" (共有の PyLean/Prelude.lean を import)
+のそれぞれで、出力の合計サイズと変換時間を比べる。
+inline ではヘルパーの定義がファイルの数だけ繰り返され、Lean はそれを毎回 elaborate する。
+import では共有モジュールを1度だけコンパイルすればよい。
+
+実行: python benchmarks/bench_preamble.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean import preamble
+from to_Lean.translator import TranslatorSession
+
+def file_source(k):
+    """k 番目のファイル: 除算・小数・sum のいずれかを使う関数をいくつか持つ"""
+    lines = [
+        f"def rate{k}(total: float, count: int) -> float:",
+        "    assert count > 0",
+        "    return total / count * 0.25",
+        "",
+        f"def fee{k}(price: float) -> float:",
+        "    return price * 0.25 + 1.5",
+        "",
+    ]
+    if k % 2:
+        lines += [f"def total{k}(xs: list) -> int:", "    return sum(xs)", ""]
+    return "\n".join(lines)
+
+def main(files=500):
+    sources = [file_source(k) for k in range(files)]
+    for mode in (None, "inline", "import"):
+        session = TranslatorSession(preamble=mode)
+        started = time.perf_counter()
+        size = sum(len(session.compile(code)[0]) for code in sources)
+        elapsed = time.perf_counter() - started
+        shared = len(preamble.prelude()) if mode == "import" else 0
+        print(f"preamble={mode!s:7}  files {files:5d}  output {size / 1024:8.1f} KiB  "
+              f"shared prelude {shared / 1024:5.1f} KiB  translate {elapsed * 1e3:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Lake プロジェクト出力 (LeanProject) のベンチマーク。
+
+依存が木状に広がる modules 個の Python モジュールを一時ディレクトリに作り、
+- 初回の書き出し時間と書き込んだファイル数
+- 何も変えずに再実行したときの時間と書き込んだファイル数（0 になるはず）
+- 1モジュールだけ編集したときに書き換わるファイル数
+- import グラフの層の数と最大幅（lake build で並列にビルドできるモジュール数の目安）
+を表示する。PATH に lake があれば、初回と編集後の lake build の時間も測る。
+
+実行: python benchmarks/bench_project.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean.project import LeanProject, run_lake
+from to_Lean.translator import CallGraph
+
+def make_sources(root, modules, functions=5):
+    """m{k} は m{(k - 1) // 2} を import する（二分木状の依存）"""
+    os.makedirs(root, exist_ok=True)
+    for k in range(modules):
+        lines = []
+        if k:
+            parent = (k - 1) // 2
+            lines += [f"from m{parent} import f{parent}_0", ""]
+        for j in range(functions):
+            call = f"f{(k - 1) // 2}_0(x)" if k and j == 0 else "x"
+            lines += [f"def f{k}_{j}(x: int) -> int:", f"    return {call} + {j}", ""]
+        with open(os.path.join(root, f"m{k}.py"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+def main(modules=200):
+    work = tempfile.mkdtemp(prefix="bench_project_")
+    try:
+        source, output = os.path.join(work, "src"), os.path.join(work, "out")
+        make_sources(source, modules)
+        project = LeanProject(source, library="Bench", mathlib=False)
+        report, first = timed(project.write, output)
+        print(f"first write    {first * 1e3:8.1f} ms  files written {report['written']:5d}")
+        report, again = timed(project.write, output)
+        print(f"unchanged      {again * 1e3:8.1f} ms  files written {report['written']:5d}")
+        with open(os.path.join(source, f"m{modules - 1}.py"), "a", encoding="utf-8") as f:
+            f.write("\ndef extra(x: int) -> int:\n    return x\n")
+        report, edited = timed(project.write, output)
+        print(f"one edit       {edited * 1e3:8.1f} ms  files written {report['written']:5d}")
+
+        infos = project.plan()
+        graph = CallGraph([({info.name}, set(info.imports)) for info in infos])
+        layers = graph.layers()
+        print(f"import graph   modules {len(infos):5d}  layers {len(layers):3d}  "
+              f"widest layer {max(len(layer) for layer in layers):5d}")
+
+        lake = shutil.which("lake")
+        if lake is None:
+            print("lake build     (lake not found)")
+            return
+        result, seconds = timed(run_lake, output, lake)
+        print(f"lake build     {seconds:8.2f} s  exit {result.returncode}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+タクティクのポートフォリオ (TacticPortfolio) のベンチマーク。
+
+assert を含む関数を functions 個持つモジュールの by sorry を埋める時間を、
+- タクティクを1つずつ順に試す場合（成功した時点で次の責務へ進む）
+- すべてのタクティクを同時に起動し、最初の成功で残りを止める場合
+- 勝ったタクティクの記録 (TacticStore) を使った2回目
+で比べる。lean の代わりに、タクティクごとに所要時間と成否が決まったスクリプトを使う
+（decide は即座に失敗、norm_num は 1.5 秒で失敗、omega は 1 秒で成功、simp は 5 秒かかる、linarith は 0.5 秒で失敗）。
+同時に起動するプロセスの数は workers × タクティクの数になるため、CPU が少ない環境では起動の費用が目立つ。
+
+実行: python benchmarks/bench_prover.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean.prover import DEFAULT_TACTICS, TacticPortfolio, TacticStore
+from to_Lean.verify import LeanVerifier
+
+STAND_IN = """import re, sys, time
+text = open(sys.argv[-1], encoding="utf-8").read()
+used = set(re.findall(r"by (\\w+)", text.split("\\n\\n")[-1])) - {"sorry"}
+delays = {"decide": 0.0, "norm_num": 1.5, "omega": 1.0, "simp": 5.0, "linarith": 0.5}
+time.sleep(max((delays.get(t, 0.0) for t in used), default=0.0))
+sys.exit(0 if used <= {"omega"} else 1)
+"""
+
+def module_source(functions):
+    lines = []
+    for k in range(functions):
+        lines += [f"def f{k}(x: int) -> int:", "    y = x * x", "    assert y >= 0", f"    return y + {k}", ""]
+    return "\n".join(lines)
+
+def main(functions=8):
+    work = tempfile.mkdtemp(prefix="bench_prover_")
+    try:
+        path = os.path.join(work, "stand_in_lean.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(STAND_IN)
+        verifier = LeanVerifier([sys.executable, path], workers=4, timeout=30)
+        code = module_source(functions)
+
+        started = time.perf_counter()
+        for tactic in DEFAULT_TACTICS:
+            report = TacticPortfolio(verifier, (tactic,)).prove(code)
+            if report["summary"]["proved"] == report["summary"]["obligations"]:
+                break
+        print(f"one at a time    {time.perf_counter() - started:8.2f} s")
+
+        store = TacticStore(os.path.join(work, "tactics.json"))
+        started = time.perf_counter()
+        report = TacticPortfolio(verifier, DEFAULT_TACTICS, store).prove(code)
+        winners = sorted({o["tactic"] for o in report["obligations"]} - {None})
+        print(f"portfolio race   {time.perf_counter() - started:8.2f} s  proved {report['summary']['proved']:3d}"
+              f"/{report['summary']['obligations']:<3d} winners {winners}")
+
+        started = time.perf_counter()
+        report = TacticPortfolio(verifier, DEFAULT_TACTICS, TacticStore(store.path)).prove(code)
+        print(f"recorded winners {time.perf_counter() - started:8.2f} s  reused {report['summary']['reused']:3d}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
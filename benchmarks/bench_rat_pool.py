@@ -0,0 +1,76 @@
+"""
+小数リテラルの定数プール (RatPool) の効果を測るベンチマーク。
+
+税率や日数計算の除数など、同じ小数を多数の関数で使うモジュールを、
+プールなし (pool_threshold=None) とプールあり (しきい値 2 / 10) で変換し、
+出力の大きさ・(n/d : Rat) リテラルの個数・変換時間を比べる。
+PATH に lean があれば、出力を lean で elaborate する時間も測る。
+
+実行: python benchmarks/bench_rat_pool.py
+"""
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean.translator import TranslatorSession
+
+INLINE_RAT = re.compile(r"\(\d+/\d+ : Rat\)")
+RATES = ["0.1", "0.08", "0.05", "0.0125", "0.3", "0.15", "0.025"]
+
+def rate_heavy_source(functions):
+    """同じ税率・除数の小数を使う関数を functions 個並べたモジュール"""
+    lines = []
+    for k in range(functions):
+        rate = RATES[k % len(RATES)]
+        other = RATES[(k * 3 + 1) % len(RATES)]
+        lines += [
+            f"def fee{k}(price: float, days: float) -> float:",
+            f"    tax = price * {rate}",
+            f"    daily = price * {other} / 365.0",
+            f"    return tax + daily * days + price * {rate} * 0.5",
+            "",
+        ]
+    return "\n".join(lines)
+
+def translate(code, threshold, repeat=3):
+    best, lean_code = float("inf"), None
+    for _ in range(repeat):
+        session = TranslatorSession(pool_threshold=threshold)
+        started = time.perf_counter()
+        lean_code, _ = session.compile(code)
+        best = min(best, time.perf_counter() - started)
+    return lean_code, best
+
+def elaborate(lean_code):
+    """lean で出力を elaborate する時間（lean がなければ None）"""
+    lean = shutil.which("lean")
+    if lean is None:
+        return None
+    with tempfile.NamedTemporaryFile("w", suffix=".lean", delete=False, encoding="utf-8") as f:
+        f.write(lean_code)
+        path = f.name
+    try:
+        started = time.perf_counter()
+        subprocess.run([lean, path], capture_output=True)
+        return time.perf_counter() - started
+    finally:
+        os.unlink(path)
+
+def main(functions=2000):
+    code = rate_heavy_source(functions)
+    for threshold in (None, 10, 2):
+        lean_code, seconds = translate(code, threshold)
+        literals = len(INLINE_RAT.findall(lean_code))
+        elapsed = elaborate(lean_code)
+        lean_time = f"{elapsed:7.2f} s" if elapsed is not None else "(lean not found)"
+        print(f"pool_threshold={threshold!s:5}  output {len(lean_code) / 1024:8.1f} KiB  "
+              f"inline literals {literals:6d}  translate {seconds * 1e3:7.1f} ms  lean {lean_time}")
+
+if __name__ == "__main__":
+    main()
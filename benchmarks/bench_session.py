@@ -0,0 +1,51 @@
+"""
+TranslatorSession の再利用による1回あたりのオーバーヘッド削減を測るマイクロベンチマーク。
+
+実行: python benchmarks/bench_session.py
+"""
+import ast
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import samples
+from to_Lean import translator
+from to_Lean.translator.analysis import SafetyAnalyzer
+from to_Lean.translator.context import TranslationContext
+from to_Lean.translator.core import LeanTranslator
+
+SOURCES = [s["code"] for s in samples.SAMPLES]
+TREES = [ast.parse(code) for code in SOURCES]
+
+def fresh_objects():
+    """毎回コンテキスト・解析器・翻訳器を作り直す（従来の呼び出し方）"""
+    for tree in TREES:
+        context = translator.analyze(tree)
+        translator.translate_to_lean(tree, context)
+
+def reused_session(session=translator.TranslatorSession()):
+    """1つのセッションを使い回す"""
+    for tree in TREES:
+        session.analyze(tree)
+        session.translate(tree)
+
+def setup_only():
+    """入力を変換せず、オブジェクトの構築だけを行う"""
+    context = TranslationContext()
+    SafetyAnalyzer(context)
+    LeanTranslator(context)
+
+def main(repeat=5, number=200):
+    per_call = number * len(TREES)
+    for label, fn, calls in [
+        ("fresh objects", fresh_objects, per_call),
+        ("reused session", reused_session, per_call),
+        ("set-up only", setup_only, number),
+    ]:
+        best = min(timeit.repeat(fn, repeat=repeat, number=number))
+        print(f"{label:16s} {best / calls * 1e6:8.2f} us/call")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+宣言ごとの Lean 検査 (LeanVerifier) のベンチマーク。
+
+functions 個の関数を持つモジュールを宣言単位に分け、ワーカー数を変えて検査時間を比べる。
+PATH に lean があればそれを使い、なければ一時ディレクトリに作る代わりのスクリプト
+（1ファイルあたり delay 秒かかり、sorry を警告として報告する）を使う。
+1つの宣言が時間上限を超えても、他の宣言の結果が得られることも確認する。
+
+実行: python benchmarks/bench_verify.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean.verify import LeanVerifier, split_declarations
+
+FAKE_LEAN = """import sys, time
+path = sys.argv[-1]
+text = open(path, encoding="utf-8").read()
+time.sleep(30 if "slow_" in text.split("\\n\\n")[-1] else {delay})
+for number, line in enumerate(text.splitlines(), 1):
+    if "sorry" in line:
+        print(f"{{path}}:{{number}}:{{line.index('sorry')}}: warning: declaration uses 'sorry'")
+"""
+
+def module_source(functions, slow=False):
+    lines = []
+    for k in range(functions):
+        lines += [
+            f"def step{k}(x: int) -> int:",
+            "    assert x > 0",
+            f"    return x + {k}",
+            "",
+            f"def use{k}(y: int) -> int:",
+            f"    return step{k}(y)",
+            "",
+        ]
+    if slow:
+        lines += ["def slow_one(n: int) -> int:", "    return n", ""]
+    return "\n".join(lines)
+
+def main(functions=40, delay=0.05):
+    work = tempfile.mkdtemp(prefix="bench_verify_")
+    try:
+        lean = shutil.which("lean")
+        if lean is None:
+            path = os.path.join(work, "fake_lean.py")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(FAKE_LEAN.format(delay=delay))
+            lean = [sys.executable, path]
+            print(f"lean not found: using a stand-in ({delay * 1e3:.0f} ms per declaration)")
+        code = module_source(functions)
+        _, units, _ = split_declarations(code)
+        print(f"declarations {len(units):5d}")
+        for workers in (1, 2, 4, 8):
+            started = time.perf_counter()
+            report = LeanVerifier(lean, workers=workers).verify(code)
+            elapsed = time.perf_counter() - started
+            print(f"workers {workers:2d}  {elapsed:8.2f} s  {report['summary']['counts']}")
+
+        started = time.perf_counter()
+        report = LeanVerifier(lean, workers=8, timeout=1.0).verify(module_source(functions, slow=True))
+        elapsed = time.perf_counter() - started
+        print(f"with a slow declaration (timeout 1 s)  {elapsed:8.2f} s  {report['summary']['counts']}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+宣言ごとの検査結果キャッシュ (VerificationCache) のベンチマーク。
+
+chains 本の呼び出しの鎖（各 depth 個の関数）からなるモジュールを作り、
+- キャッシュなしの検査時間
+- 何も変えずに再検査したときの時間とヒット数（全宣言がヒットするはず）
+- 1本の鎖の先頭（他から参照される関数）を編集したときに再検査される宣言の数と、無効化の理由
+- ソースの先頭に空行を足しただけのときのヒット数（Leanコードが変わらないので全宣言がヒットする）
+を表示する。PATH に lean がなければ、1宣言あたり delay 秒かかる代わりのスクリプトを使う。
+
+実行: python benchmarks/bench_verify_cache.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from to_Lean.cache import VerificationCache
+from to_Lean.verify import LeanVerifier
+
+FAKE_LEAN = """import sys, time
+time.sleep({delay})
+"""
+
+def module_source(chains, depth, edited=None):
+    """f{c}_{k} は f{c}_{k - 1} を呼ぶ。edited 番目の鎖の f{c}_0 だけ本体を変える"""
+    lines = []
+    for c in range(chains):
+        for k in range(depth):
+            body = f"f{c}_{k - 1}(x) + 1" if k else ("x + 2" if c == edited else "x + 1")
+            lines += [f"def f{c}_{k}(x: int) -> int:", f"    return {body}", ""]
+    return "\n".join(lines)
+
+def main(chains=20, depth=5, delay=0.05):
+    work = tempfile.mkdtemp(prefix="bench_verify_cache_")
+    try:
+        lean = shutil.which("lean")
+        if lean is None:
+            path = os.path.join(work, "fake_lean.py")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(FAKE_LEAN.format(delay=delay))
+            lean = [sys.executable, path]
+            print(f"lean not found: using a stand-in ({delay * 1e3:.0f} ms per declaration)")
+        code = module_source(chains, depth)
+        cache = VerificationCache(os.path.join(work, "cache"))
+        verifier = LeanVerifier(lean, workers=4, cache=cache)
+
+        def run(label, source):
+            started = time.perf_counter()
+            report = verifier.verify(source, scope="bench")
+            elapsed = time.perf_counter() - started
+            stats = report["summary"]["cache"]
+            reasons = {}
+            for item in stats["invalidated"]:
+                reasons[item["reason"]] = reasons.get(item["reason"], 0) + 1
+            print(f"{label:16} {elapsed:8.2f} s  hits {stats['hits']:4d}  checked {stats['misses']:4d}  "
+                  f"invalidated {reasons}")
+
+        run("cold", code)
+        run("unchanged", code)
+        run("edit one chain", module_source(chains, depth, edited=0))
+        run("blank lines", "\n\n" + module_source(chains, depth, edited=0))
+        print(f"cache totals     {cache.stats()}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# テストは app/ をインポートのルートとして実行する（benchmarks と同じ）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
@@ -0,0 +1,67 @@
+"""
+テストで lake の代わりに使うスクリプト（lake build だけを扱う）。
+
+lakefile.lean の @[default_target] のライブラリのルートから import を辿り、依存先から順にモジュールを「ビルド」して
+"Built <モジュール>" を1行ずつ出力する。モジュールの内容と依存先のハッシュを .lake/fake.json に記録し、
+どちらも変わらないモジュールは再ビルドしない。import 先のファイルがないか、import が循環していれば終了コード 1。
+Lean 本体のモジュールと、lakefile.lean で require した Mathlib のモジュールはビルド済みとして扱う。
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+
+STATE = os.path.join(".lake", "fake.json")
+
+def fail(message):
+    print(f"error: {message}", file=sys.stderr)
+    sys.exit(1)
+
+def path_of(module):
+    return os.path.join(*[part.strip("«»") for part in module.split(".")]) + ".lean"
+
+def main():
+    if sys.argv[1:] != ["build"]:
+        fail(f"unsupported arguments {sys.argv[1:]}")
+    with open("lakefile.lean", encoding="utf-8") as f:
+        lakefile = f.read()
+    match = re.search(r"@\[default_target\]\nlean_lib «(\w+)»", lakefile)
+    external = {"Init", "Std", "Lean"} | ({"Mathlib"} if "require mathlib" in lakefile else set())
+    if not match:
+        fail("no default target")
+    try:
+        with open(STATE, encoding="utf-8") as f:
+            previous = json.load(f)
+    except OSError:
+        previous = {}
+    digests, visiting = {}, set()
+
+    def build(module):
+        if module in digests:
+            return digests[module]
+        if module.split(".")[0] in external:
+            return module
+        if module in visiting:
+            fail(f"import cycle at {module}")
+        path = path_of(module)
+        if not os.path.exists(path):
+            fail(f"unknown module {module}")
+        visiting.add(module)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        deps = [build(m) for m in re.findall(r"^import (\S+)$", text, re.M)]
+        visiting.discard(module)
+        digest = hashlib.sha256("\0".join([text] + deps).encode("utf-8")).hexdigest()
+        if previous.get(module) != digest:
+            print(f"Built {module}")
+        digests[module] = digest
+        return digest
+
+    build(match.group(1))
+    os.makedirs(".lake", exist_ok=True)
+    with open(STATE, "w", encoding="utf-8") as f:
+        json.dump(digests, f)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+テストで lean の代わりに使うスクリプト。検査するファイルの最後の宣言（空行で区切った最後の塊）で振る舞いを決める。
+
+- 宣言名に segv / killed を含む: SIGSEGV / SIGKILL で終了する
+- 宣言名に oom を含む: "out of memory" を出して終了コード 1
+- 宣言名に rlimit を含む: 自分のアドレス空間の上限を宣言の先頭行の info として出す
+- "bad" を含む行: その行に error を出し、終了コード 1
+- "sorry" を含む行: その行に declaration uses 'sorry' の warning を出す
+- by <タクティク>: 環境変数 FAKE_TACTICS (タクティク=秒 または タクティク=秒:ok をカンマ区切り) の秒数だけ待ち、
+  :ok のないタクティクはその行に error を出す。FAKE_LOG があれば、使ったタクティクを1行ずつ追記する
+"""
+import os
+import re
+import resource
+import signal
+import sys
+import time
+
+path = sys.argv[-1]
+with open(path, encoding="utf-8") as f:
+    text = f.read()
+lines = text.split("\n")
+target = text.rstrip("\n").rsplit("\n\n", 1)[-1]
+# LeanVerifier の書くファイルは改行で終わる（lines の末尾は空文字列）
+start = len(lines) - len(target.split("\n"))
+header = re.search(r"(?:def|theorem) (\w+)", target)
+name = header.group(1) if header else ""
+
+if "segv" in name:
+    os.kill(os.getpid(), signal.SIGSEGV)
+if "killed" in name:
+    os.kill(os.getpid(), signal.SIGKILL)
+if "oom" in name:
+    print("INTERNAL PANIC: out of memory")
+    sys.exit(1)
+if "rlimit" in name:
+    print(f"{path}:{start}:0: info: {resource.getrlimit(resource.RLIMIT_AS)[0]}")
+
+tactics = {}
+for item in filter(None, os.environ.get("FAKE_TACTICS", "").split(",")):
+    tactic, _, spec = item.partition("=")
+    seconds, _, ok = spec.partition(":")
+    tactics[tactic] = (float(seconds), ok == "ok")
+
+code = 0
+for number, line in enumerate(lines, 1):
+    if "bad" in line:
+        print(f"{path}:{number}:0: error: unknown identifier 'bad'")
+        code = 1
+    if "sorry" in line:
+        print(f"{path}:{number}:{line.index('sorry')}: warning: declaration uses 'sorry'")
+    for tactic in re.findall(r"by (\w+)", line):
+        if tactic == "sorry":
+            continue
+        if os.environ.get("FAKE_LOG"):
+            with open(os.environ["FAKE_LOG"], "a", encoding="utf-8") as log:
+                log.write(tactic + "\n")
+        seconds, ok = tactics.get(tactic, (0.0, False))
+        time.sleep(seconds)
+        if not ok:
+            print(f"{path}:{number}:0: error: {tactic} failed")
+            code = 1
+sys.exit(code)
@@ -0,0 +1,52 @@
+import asyncio
+import time
+from to_Lean import aio
+from to_Lean.aio import AsyncTranslator
+
+CODE = "def f(x: int) -> int:\n    return x\n"
+
+def test_queue_time_counts_toward_the_timeout():
+    async def main():
+        async with AsyncTranslator(max_concurrency=1, timeout=0.2) as t:
+            await t._semaphore.acquire()  # 先行するリクエストが枠を使っている状態
+            started = time.perf_counter()
+            result = await t.compile(CODE)
+            return result, time.perf_counter() - started
+    result, elapsed = asyncio.run(main())
+    assert result.status == "timeout"
+    assert elapsed < 1.0
+
+def test_cancel_while_acquiring_returns_the_worker():
+    async def main():
+        async with AsyncTranslator(max_concurrency=1) as t:
+            task = asyncio.create_task(t.compile(CODE))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            for _ in range(200):
+                if not t._busy:
+                    break
+                await asyncio.sleep(0.05)
+            busy = len(t._busy)
+            result = await t.compile(CODE)
+            return busy, result
+    busy, result = asyncio.run(main())
+    assert busy == 0
+    assert result.ok and result.lean_code == "def f (x : Int) : Int :=\n  x"
+
+def test_worker_startup_does_not_count_toward_the_timeout(monkeypatch):
+    start = aio._Worker.__init__
+
+    def slow_start(self, mp_context):
+        time.sleep(0.5)
+        start(self, mp_context)
+    monkeypatch.setattr(aio._Worker, "__init__", slow_start)
+
+    async def main():
+        async with AsyncTranslator(max_concurrency=1, timeout=0.4) as t:
+            return await t.compile(CODE), t.restarts
+    result, restarts = asyncio.run(main())
+    assert result.ok and restarts == 0
@@ -0,0 +1,57 @@
+import ast
+from to_Lean import IncrementalSession, compile_python_to_lean, iter_compile_python_to_lean
+from to_Lean.translator.callgraph import CallGraph
+
+SOURCE = """def is_even(n: int) -> bool:
+    if n == 0:
+        return True
+    return is_odd(n - 1)
+
+def is_odd(n: int) -> bool:
+    if n == 0:
+        return False
+    return is_even(n - 1)
+
+def main(n: int) -> int:
+    return helper(n) + fact(n)
+
+def helper(n: int) -> int:
+    return n + 1
+
+def fact(n: int) -> int:
+    if n <= 0:
+        return 1
+    return n * fact(n - 1)
+
+def loop(n: int) -> int:
+    return loop(n + 1)
+"""
+
+def test_graph_components_order_and_layers():
+    graph = CallGraph.from_module(ast.parse(SOURCE).body)
+    members = [[graph.names[i] for i in graph.components[c]] for c in graph.order()]
+    assert members == [["is_even", "is_odd"], ["helper"], ["fact"], ["main"], ["loop"]]
+    assert [graph.is_recursive(i) for i in range(6)] == [True, True, False, False, True, True]
+    layers = [sorted(graph.names[i] for c in layer for i in graph.components[c]) for layer in graph.layers()]
+    assert layers == [["fact", "helper", "is_even", "is_odd", "loop"], ["main"]]
+
+def test_dependency_order_and_mutual_block():
+    lean, _ = compile_python_to_lean(SOURCE)
+    names = [line.split()[1] for line in lean.splitlines() if line.startswith("def ")]
+    assert names == ["is_even", "is_odd", "helper", "fact", "main", "loop"]
+    assert lean.startswith("mutual\ndef is_even") and "termination_by n.toNat\nend\n" in lean
+    assert "n * fact (n - 1)\ntermination_by n.toNat" in lean
+    # 減少する引数が見つからない再帰には警告を付ける
+    assert "-- [PyLean] Warning: No termination measure found.\ndef loop" in lean
+    assert [name for name, _, _ in iter_compile_python_to_lean(SOURCE)][:2] == [("is_even", "is_odd"), "helper"]
+
+def test_incremental_follows_recursion_changes():
+    session = IncrementalSession()
+    session.compile(SOURCE)
+    # helper が fact を呼ぶと依存順が変わり、fact が helper より前に出る
+    edited = SOURCE.replace("    return n + 1\n", "    return fact(n) + 1\n")
+    assert session.compile(edited) == compile_python_to_lean(edited)
+    # 相互再帰を解くと mutual ブロックがなくなる
+    edited = edited.replace("return is_even(n - 1)", "return not (n == 1)")
+    result = session.compile(edited)
+    assert result == compile_python_to_lean(edited) and "mutual" not in result[0]
@@ -0,0 +1,57 @@
+import io
+import json
+import threading
+from to_Lean.daemon import INVALID_PARAMS, INVALID_REQUEST, PARSE_ERROR, TranslationServer
+
+def serve(*messages):
+    reader = io.StringIO("".join(json.dumps(m) + "\n" for m in messages))
+    writer = io.StringIO()
+    server = TranslationServer()
+    try:
+        server.serve_stream(reader, writer)
+    finally:
+        server.close()
+    return {r["id"]: r for r in map(json.loads, writer.getvalue().splitlines())}
+
+def test_malformed_messages_are_rejected_and_serving_continues():
+    replies = serve(
+        {"jsonrpc": "2.0", "id": 1, "method": "cancel", "params": [5]},
+        {"jsonrpc": "2.0", "id": 2, "method": ["translate"]},
+        {"jsonrpc": "2.0", "id": [3], "method": "stats"},
+        {"jsonrpc": "2.0", "id": 4, "method": "translate", "params": {"code": "def f(x: int) -> int:\n    return x\n"}},
+    )
+    assert replies[1]["error"]["code"] == INVALID_PARAMS
+    assert replies[2]["error"]["code"] == INVALID_REQUEST
+    assert replies[None]["error"]["code"] == INVALID_REQUEST
+    assert replies[4]["result"]["lean"] == "def f (x : Int) : Int :=\n  x"
+
+def test_deeply_nested_json_is_a_parse_error():
+    reader = io.StringIO("[" * 100000 + "\n" + json.dumps({"jsonrpc": "2.0", "id": 1, "method": "stats"}) + "\n")
+    writer = io.StringIO()
+    server = TranslationServer()
+    try:
+        server.serve_stream(reader, writer)
+    finally:
+        server.close()
+    replies = {r["id"]: r for r in map(json.loads, writer.getvalue().splitlines())}
+    assert replies[None]["error"]["code"] == PARSE_ERROR
+    assert "served" in replies[1]["result"]
+
+def test_duplicate_pending_id_is_rejected():
+    release = threading.Event()
+    server = TranslationServer()
+    server.methods["wait"] = lambda params: {"released": release.wait(5)}
+    messages = [{"jsonrpc": "2.0", "id": 7, "method": "wait"}, {"jsonrpc": "2.0", "id": 7, "method": "stats"}]
+    reader = io.StringIO("".join(json.dumps(m) + "\n" for m in messages))
+    writer = io.StringIO()
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    try:
+        server.serve_stream(reader, writer)
+    finally:
+        timer.cancel()
+        server.close()
+    first, second = map(json.loads, writer.getvalue().splitlines())
+    assert second["id"] == 7 and first["id"] == 7
+    assert first["error"]["code"] == INVALID_REQUEST
+    assert second["result"]["released"] is True
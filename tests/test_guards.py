@@ -0,0 +1,50 @@
+import ast
+from to_Lean.translator import guards
+from to_Lean.translator.guards import GuardMap
+
+def divisions(tree):
+    return [n for n in ast.walk(tree) if isinstance(n, ast.BinOp) and isinstance(n.op, ast.Div)]
+
+def test_guards_from_branches_early_return_and_boolop():
+    tree = ast.parse(
+        "def f(x, b, c, d):\n"
+        "    if c == 0:\n"
+        "        return 0\n"
+        "    y = x / c\n"
+        "    z = b != 0 and x / b\n"
+        "    w = x / d if d > 0 else x / d\n"
+        "    return y + z + w\n"
+    )
+    guard_map = GuardMap(tree.body[0])
+    by_c, by_b, by_d_then, by_d_else = divisions(tree)
+    assert guard_map.is_nonzero(by_c, "c")
+    assert guard_map.is_nonzero(by_b, "b")
+    assert guard_map.is_nonzero(by_d_then, "d")
+    assert not guard_map.is_nonzero(by_d_else, "d")
+    assert not guard_map.is_nonzero(by_c, "b")
+
+def test_condition_checks_grow_linearly(monkeypatch):
+    calls = []
+    original = guards._excludes_zero
+    monkeypatch.setattr(guards, "_excludes_zero", lambda *args: calls.append(1) or original(*args))
+    n = 2000
+    nested = ast.parse("def f(x, b):\n    return x" + " / b" * n + "\n")
+    block = ast.parse("def g(x, b):\n" + "".join(f"    assert x > {k}\n" for k in range(n))
+                      + "".join(f"    y{k} = x / b\n" for k in range(n)))
+    for tree in (nested, block):
+        calls.clear()
+        guard_map = GuardMap(tree.body[0])
+        assert not any([guard_map.is_nonzero(node, "b") for node in divisions(tree)])
+        assert len(calls) <= 2 * n
+
+def test_handler_helpers_use_the_given_guard_map():
+    from to_Lean.translator.handlers.utils import get_parent_if, is_guarded_by_zero_check
+    tree = ast.parse("def f(x, c):\n    if c != 0:\n        return x / c\n    return x / c\n")
+    guard_map = GuardMap(tree.body[0])
+    # ast.walk は幅優先なので、浅い位置にある if の外の除算が先に来る
+    unguarded, guarded = divisions(tree)
+    assert get_parent_if(guarded, guard_map) is tree.body[0].body[0]
+    assert get_parent_if(unguarded, guard_map) is None
+    assert is_guarded_by_zero_check(guarded, "c", guard_map)
+    assert not is_guarded_by_zero_check(unguarded, "c", guard_map)
+    assert not is_guarded_by_zero_check(guarded, "c")
@@ -0,0 +1,57 @@
+from to_Lean import IncrementalSession, compile_python_to_lean
+
+SOURCE = """def g(a: int, b: int) -> int:
+    assert b > 0
+    return a // b
+
+def f(x: int, q: int) -> int:
+    assert q > 0
+    return g(x, q)
+
+def h(y: float) -> float:
+    z = y / 2
+    return z
+
+def k(a: int, b: int) -> float:
+    return a / b
+"""
+
+class Editor:
+    """編集ごとに全体変換と比較し、再解析・再変換・再利用した宣言の数を返す"""
+    def __init__(self):
+        self.session = IncrementalSession()
+
+    def compile(self, code):
+        before = self.session.stats()
+        result = self.session.compile(code)
+        assert result == compile_python_to_lean(code)
+        after = self.session.stats()
+        return tuple(after[k] - before[k] for k in ("reanalyzed", "retranslated", "reused")), result
+
+def test_only_changed_declarations_are_retranslated():
+    editor = Editor()
+    assert editor.compile(SOURCE)[0] == (4, 4, 0)
+    edited = SOURCE.replace("y / 2", "y * 2")
+    assert editor.compile(edited)[0] == (1, 1, 3)
+    # 呼び出し先 g の事前条件を変えると、それを仮定として渡す f も再変換する
+    edited = edited.replace("assert b > 0", "assert b != 0")
+    counts, (lean, _) = editor.compile(edited)
+    assert counts == (2, 2, 2)
+    assert "g x q (by sorry)" in lean
+
+def test_moved_declarations_are_reused_with_shifted_warnings():
+    editor = Editor()
+    _, (_, warnings) = editor.compile(SOURCE)
+    counts, (_, moved) = editor.compile("# header\n\n" + SOURCE)
+    assert counts == (0, 0, 4)
+    assert warnings and len(moved) == len(warnings)
+    assert all(w.startswith("Warning at line 14") for w in warnings)
+    assert all(w.startswith("Warning at line 16") for w in moved)
+
+def test_syntax_errors_fall_back_to_a_full_compile():
+    editor = Editor()
+    editor.compile(SOURCE)
+    counts, (_, warnings) = editor.compile(SOURCE + "def broken(:\n")
+    assert counts == (0, 0, 0) and warnings
+    # エラーの後も、以前の宣言の結果を使い続ける
+    assert editor.compile(SOURCE)[0] == (0, 0, 4)
@@ -0,0 +1,53 @@
+from to_Lean import compile_python_to_lean
+from to_Lean.translator.intervals import Interval, floordiv
+
+def test_floordiv_integer_bounds_are_exact():
+    # 49 * (1/49) は浮動小数点では 0.999... になるが、49 // 49 は 1
+    assert floordiv(Interval.point(49, "int"), Interval.point(49, "int")) == Interval.point(1, "int")
+    assert floordiv(Interval(-7, 7, kind="int"), Interval(2, 3, kind="int")) == Interval(-4, 3, kind="int")
+    assert floordiv(Interval(-7, 7, kind="int"), Interval(-3, -2, kind="int")) == Interval(-4, 3, kind="int")
+
+def test_floordiv_float_bounds_contain_the_result():
+    result = floordiv(Interval(1.0, 2.0, kind="float"), Interval.point(3.0, "float"))
+    assert result.lo <= 1.0 // 3.0 and 2.0 // 3.0 <= result.hi
+
+def test_no_division_by_zero_warning_for_exact_quotient():
+    _, warnings = compile_python_to_lean("def g() -> float:\n    return 1 / (49 // 49)\n")
+    assert not any("division by zero" in w for w in warnings)
+
+def test_walrus_rebinds_the_divisor():
+    # d は 1 で初期化されるが、条件の代入式で a の値に変わる
+    source = ("def f(a: int) -> float:\n    d = 1\n    if (d := a) > -5:\n        return 1 / d\n"
+              "    return 0.0\n")
+    _, warnings = compile_python_to_lean(source)
+    assert any("Division by variable 'd'" in w for w in warnings)
+
+def test_walrus_in_comprehension_rebinds_the_divisor():
+    source = ("def f(a: int) -> float:\n    d = 1\n    ys = [(d := y) for y in range(a)]\n"
+              "    return 1 / d\n")
+    _, warnings = compile_python_to_lean(source)
+    assert any("Division by variable 'd'" in w for w in warnings)
+
+def test_walrus_refines_its_target():
+    source = "def f(a: int) -> float:\n    if (d := a) > 0:\n        return 1 / d\n    return 0.0\n"
+    _, warnings = compile_python_to_lean(source)
+    assert not any("Division" in w for w in warnings)
+
+def test_unbounded_growth_in_loop_is_reported():
+    for update in ("x *= 1e10", "x = x * 1e10"):
+        source = f"def f(n: int) -> float:\n    x = 1.0\n    for i in range(n):\n        {update}\n    return x\n"
+        _, warnings = compile_python_to_lean(source)
+        assert any("Warning at line 4: Overflow" in w for w in warnings), update
+
+def test_bounded_growth_in_loop_is_not_reported():
+    source = ("def f(n: int) -> float:\n    x = 1.0\n    for i in range(n):\n        if x < 100.0:\n"
+              "            x *= 2.0\n    return x\n")
+    _, warnings = compile_python_to_lean(source)
+    assert not any("Overflow" in w for w in warnings)
+
+def test_shadowed_branch_warning_shows_operator_symbols():
+    source = ("def tax(income: int) -> int:\n    if income <= 5000:\n        return 1\n"
+              "    elif income < 2000:\n        return 2\n    else:\n        return 3\n")
+    _, warnings = compile_python_to_lean(source)
+    assert ("Warning at line 4: Logic Inconsistency: condition 'income < 2000' is unreachable "
+            "because it is shadowed by a previous 'income <= 5000'") in warnings
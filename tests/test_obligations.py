@@ -0,0 +1,27 @@
+from to_Lean import compile_python_to_lean_with_obligations
+
+SOURCE = """def f(y: float) -> float:
+    w = y * 2
+    assert w > 0.5
+    return w
+
+def verify_f(y: float) -> bool:
+    z = f(y)
+    return z > 0.25
+
+def g(x: float) -> float:
+    return x
+"""
+
+def ids(code):
+    _, _, manifest = compile_python_to_lean_with_obligations(code, pool_threshold=2)
+    return {(o["kind"], o["declaration"]): o["id"] for o in manifest["obligations"]}
+
+def test_ids_do_not_depend_on_unrelated_declarations():
+    before = ids(SOURCE)
+    # g で 0.5 と 0.25 を使うと定数プールに入り、f と verify_f の Lean の式は rat_1_2 / rat_1_4 を参照するようになる
+    edited = SOURCE.replace("    return x\n", "    return x * 0.5 + 0.25\n")
+    lean, _, _ = compile_python_to_lean_with_obligations(edited, pool_threshold=2)
+    assert "(w > rat_1_2)" in lean and "(z > rat_1_4)" in lean
+    assert ids(edited) == before
+    assert {kind for kind, _ in before} == {"assert", "theorem"}
@@ -0,0 +1,19 @@
+import sys
+import pytest
+from to_Lean import compile_python_to_lean
+from to_Lean.translator.parsing import parse_module
+
+DEEP_SUM = "def f(a: int) -> int:\n    return " + " + ".join(["a"] * 5000) + "\n"
+
+def test_deep_input_parses_without_changing_the_recursion_limit():
+    limit = sys.getrecursionlimit()
+    assert len(parse_module(DEEP_SUM).body) == 1
+    assert sys.getrecursionlimit() == limit
+    with pytest.raises(SyntaxError):
+        parse_module(DEEP_SUM + ")")
+    assert sys.getrecursionlimit() == limit
+
+def test_deep_sum_translates():
+    lean, warnings = compile_python_to_lean(DEEP_SUM)
+    assert lean.startswith("def f (a : Int) : Int :=\n  a + a + a") and lean.count(" + a") == 4999
+    assert sys.getrecursionlimit() < 30000
@@ -0,0 +1,37 @@
+from to_Lean import IncrementalSession, compile_python_to_lean
+
+SOURCE = """from decimal import Decimal
+
+def tax(x: Decimal) -> Decimal:
+    return x * Decimal("0.05")
+
+def fee(x: Decimal) -> Decimal:
+    return x + Decimal("0.05") + 0.5
+
+def half(x: float) -> float:
+    return x * 0.5
+"""
+
+def test_pool_is_off_by_default():
+    lean, _ = compile_python_to_lean(SOURCE)
+    assert "rat_" not in lean
+    assert "x * (1/20 : Rat)" in lean and "(1/2 : Rat)" in lean
+
+def test_repeated_literals_become_defs():
+    lean, _ = compile_python_to_lean(SOURCE, pool_threshold=2)
+    assert lean.startswith("@[reducible] def rat_1_20 : Rat := 1/20\n@[reducible] def rat_1_2 : Rat := 1/2\n")
+    # Decimal('0.05') と 0.5 の使用箇所は名前で参照する
+    assert "x * rat_1_20" in lean and "(1/20 : Rat)" not in lean
+    assert "x * rat_1_2" in lean and "(1/2 : Rat)" not in lean
+
+def test_names_colliding_with_identifiers_are_not_pooled():
+    source = SOURCE + "\ndef rat_1_20(x: float) -> float:\n    return x\n"
+    lean, _ = compile_python_to_lean(source, pool_threshold=2)
+    assert "rat_1_20 : Rat" not in lean and "x * (1/20 : Rat)" in lean
+    assert "@[reducible] def rat_1_2 : Rat := 1/2" in lean
+
+def test_incremental_session_matches_full_compile():
+    session = IncrementalSession(pool_threshold=2)
+    for code in (SOURCE, SOURCE.replace("return x * 0.5", "return x * 2.0"),
+                 SOURCE + "\ndef rat_1_2(x: float) -> float:\n    return x\n"):
+        assert session.compile(code) == compile_python_to_lean(code, pool_threshold=2)
@@ -0,0 +1,16 @@
+from to_Lean import compile_python_to_lean
+from to_Lean.preamble import generate, prelude
+
+def test_header_imports_lean_and_only_needed_modules():
+    lean, _ = compile_python_to_lean("def f(a: int, b: int) -> float:\n    return a / b\n", preamble="inline")
+    head = lean.split("\n\n", 1)[0].splitlines()
+    assert head == ["import Lean", "import Mathlib.Data.Rat.Defs"]
+    assert "def py_div" in lean and "py_floor" not in lean
+
+def test_no_helpers_means_no_header():
+    assert generate(set()) == ""
+    lean, _ = compile_python_to_lean("def f(a: int) -> int:\n    return a\n", preamble="inline")
+    assert "import" not in lean
+
+def test_shared_prelude_imports_lean():
+    assert prelude().startswith("import Lean\n")
@@ -0,0 +1,31 @@
+import ast
+from to_Lean import compile_python_to_lean_with_obligations
+from to_Lean.translator.preconditions import condition_key
+
+SOURCE = """def g(a: int, b: int) -> int:
+    assert b > 0
+    return a // b
+
+def f(x: int, q: int) -> int:
+    assert 0 < q
+    return g(x, q) + g(q, x)
+"""
+
+def key(text, env=None):
+    return condition_key(ast.parse(text, mode="eval").body, env)
+
+def test_condition_keys_are_normalized():
+    assert key("0 < b") == key("b > 0")
+    assert key("0 <= a < 10") == key("a >= 0 and 10 > a")
+    assert key("b > 0", {"b": key("q")}) == key("q > 0")
+    assert key("b >= 0") != key("b > 0")
+    assert key("f(b) > 0") is None
+
+def test_call_site_uses_matching_precondition():
+    lean, _, manifest = compile_python_to_lean_with_obligations(SOURCE)
+    # 呼び出し元の 0 < q は、仮引数 b を q に置き換えた g の b > 0 と同じ条件
+    assert "g x q h_precond_0 + g q x (by sorry)" in lean
+    # 一致する仮定のない呼び出しは証明責務になる
+    [obligation] = manifest["obligations"]
+    assert obligation["kind"] == "precondition" and obligation["declaration"] == "f"
+    assert obligation["detail"] == {"callee": "g", "arguments": "a := q, b := x"}
@@ -0,0 +1,56 @@
+import os
+import sys
+from to_Lean.project import run_lake, write_project
+
+FAKE_LAKE = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_lake.py")]
+
+FILES = {
+    "__init__.py": "",
+    "base.py": "def double(x: int) -> int:\n    return x * 2\n",
+    "use.py": "from .base import double\n\ndef quad(x: int) -> int:\n    return double(double(x))\n",
+    "sub/__init__.py": "",
+    "sub/leaf.py": "from shop import use\n\ndef eight(x: int) -> int:\n    return use.quad(x) * 2\n",
+    "ring_a.py": "from . import ring_b\n\ndef a(x: int) -> int:\n    return x\n",
+    "ring_b.py": "from .ring_a import a\n\ndef b(x: int) -> int:\n    return a(x)\n",
+}
+
+def make_tree(root):
+    for name, text in FILES.items():
+        path = root / "shop" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    return root / "shop"
+
+def built(result):
+    assert result.returncode == 0, result.stderr
+    return [line.split()[1] for line in result.stdout.splitlines() if line.startswith("Built ")]
+
+def test_lakefile_and_import_graph(tmp_path):
+    out = tmp_path / "out"
+    report = write_project(str(make_tree(tmp_path)), str(out), mathlib=False)
+    modules = {m["module"]: m for m in report["modules"]}
+    assert modules["shop.use"]["imports"] == ["Shop.shop.base"]
+    assert modules["shop.sub.leaf"]["imports"] == ["Shop.shop.use"]
+    assert report["cycles"] == [["shop.ring_a", "shop.ring_b"]]
+    assert modules["shop.ring_b"]["imports"] == [] and modules["shop.ring_b"]["dropped_imports"] == ["shop.ring_a"]
+
+    lakefile = (out / "lakefile.lean").read_text(encoding="utf-8")
+    assert "package «shop» where" in lakefile
+    assert "@[default_target]\nlean_lib «Shop» where" in lakefile
+    assert "mathlib" not in lakefile
+    use = (out / "Shop" / "shop" / "use.lean").read_text(encoding="utf-8")
+    assert "import Shop.shop.base\n\nopen shop.base (double)\n\nnamespace shop.use" in use
+
+def test_lake_builds_dependencies_first_and_only_rebuilds_dependents(tmp_path):
+    source, out = make_tree(tmp_path), tmp_path / "out"
+    write_project(str(source), str(out))
+    order = built(run_lake(str(out), lake=FAKE_LAKE))
+    assert order.index("Shop.shop.base") < order.index("Shop.shop.use") < order.index("Shop.shop.sub.leaf")
+    assert len(order) == len(FILES) + 2  # プレリュードとライブラリのルートを含む
+
+    assert built(run_lake(str(out), lake=FAKE_LAKE)) == []
+    (source / "use.py").write_text(FILES["use.py"] + "\ndef eight2(x: int) -> int:\n    return quad(x) * 2\n",
+                                   encoding="utf-8")
+    report = write_project(str(source), str(out))
+    assert report["written"] == 1
+    assert built(run_lake(str(out), lake=FAKE_LAKE)) == ["Shop.shop.use", "Shop.shop.sub.leaf", "Shop"]
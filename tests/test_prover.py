@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+import time
+from to_Lean import compile_python_to_lean_with_obligations
+from to_Lean.prover import TacticPortfolio, TacticStore
+from to_Lean.verify import LeanVerifier
+
+FAKE_LEAN = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_lean.py")]
+
+SOURCE = '''def square(x: int) -> int:
+    """Nonnegative; the docstring mentions by sorry but is not an obligation."""
+    y = x * x
+    assert y >= 0
+    return y
+'''
+
+def prove(store, code=SOURCE, pool_threshold=None):
+    verifier = LeanVerifier(FAKE_LEAN, workers=2, timeout=60, pool_threshold=pool_threshold)
+    return TacticPortfolio(verifier, ("decide", "omega", "simp"), store).prove(code, scope="m.py")
+
+def runs(log):
+    with open(log, encoding="utf-8") as f:
+        return f.read().split()
+
+def test_first_success_cancels_the_rest(tmp_path, monkeypatch):
+    log = tmp_path / "log"
+    monkeypatch.setenv("FAKE_LOG", str(log))
+    monkeypatch.setenv("FAKE_TACTICS", "decide=0,omega=0.3:ok,simp=30:ok")
+    started = time.perf_counter()
+    report = prove(TacticStore())
+    assert time.perf_counter() - started < 15
+    _, _, manifest = compile_python_to_lean_with_obligations(SOURCE)
+    [obligation] = report["obligations"]
+    assert obligation["id"] == manifest["obligations"][0]["id"]
+    assert (obligation["tactic"], obligation["reused"], obligation["line"]) == ("omega", False, 4)
+    assert "have h_assert_0 : (y >= 0) := by omega" in report["lean"]
+    assert "mentions by sorry but is not an obligation" in report["lean"]
+    assert sorted(runs(log)) == ["decide", "omega", "simp"]
+
+def test_winner_is_reused_by_obligation_id(tmp_path, monkeypatch):
+    log = tmp_path / "log"
+    monkeypatch.setenv("FAKE_LOG", str(log))
+    monkeypatch.setenv("FAKE_TACTICS", "omega=0:ok")
+    path = str(tmp_path / "tactics.json")
+    prove(TacticStore(path))
+    assert json.load(open(path, encoding="utf-8"))["winners"]
+
+    log.write_text("")
+    [again] = prove(TacticStore(path))["obligations"]
+    assert (again["tactic"], again["reused"], again["tried"]) == ("omega", True, 0)
+    assert runs(log) == []
+
+    # 前に宣言を足すと assert の番号と行が変わる。ID は変わらないので、前回の勝者だけを試す
+    edited = "def first(a: int) -> int:\n    b = a + 1\n    assert b > a\n    return b\n\n" + SOURCE
+    report = prove(TacticStore(path), edited)
+    moved = next(o for o in report["obligations"] if o["declaration"] == "square")
+    assert (moved["id"], moved["tactic"], moved["reused"], moved["tried"]) == (again["id"], "omega", True, 1)
+    assert "have h_assert_1 : (y >= 0) := by omega" in report["lean"]
+
+def test_winner_survives_pooling_from_an_unrelated_edit(tmp_path, monkeypatch):
+    log = tmp_path / "log"
+    monkeypatch.setenv("FAKE_LOG", str(log))
+    monkeypatch.setenv("FAKE_TACTICS", "omega=0:ok")
+    path = str(tmp_path / "tactics.json")
+    code = "def scale(x: float) -> float:\n    y = x * x\n    assert y >= 0.5\n    return y\n"
+    [first] = prove(TacticStore(path), code, pool_threshold=2)["obligations"]
+
+    # 無関係な宣言が 0.5 を使うと定数プールに入り、scale の Lean の式も変わる。責務の ID と記録は変わらない
+    edited = code + "\ndef other(x: float) -> float:\n    return x + 0.5\n"
+    report = prove(TacticStore(path), edited, pool_threshold=2)
+    assert "(y >= rat_1_2)" in report["lean"]
+    [again] = [o for o in report["obligations"] if o["declaration"] == "scale"]
+    assert (again["id"], again["tactic"], again["reused"]) == (first["id"], "omega", True)
@@ -0,0 +1,106 @@
+import os
+import sys
+from to_Lean.cache import VerificationCache
+from to_Lean.verify import CRASHED, ERROR, MEMORY, OK, SORRY, LeanVerifier
+
+FAKE_LEAN = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_lean.py")]
+
+SOURCE = """def ok_case(x: int) -> int:
+    return x + 1
+
+def sorry_case(x: int) -> int:
+    assert x > 0
+    return x
+
+def segv_case(x: int) -> int:
+    return x
+
+def killed_case(x: int) -> int:
+    return x
+
+def oom_case(x: int) -> int:
+    return x
+
+def error_case(x: int) -> int:
+    y = x + 1
+    if y > 0:
+        bad = y * 2
+    else:
+        bad = 0
+    return bad
+"""
+
+def statuses(report):
+    return {d["declaration"]: d["status"] for d in report["declarations"]}
+
+def test_status_mapping_with_memory_limit():
+    report = LeanVerifier(FAKE_LEAN, workers=2, memory_mb=1024).verify(SOURCE)
+    assert statuses(report) == {"ok_case": OK, "sorry_case": SORRY, "segv_case": CRASHED,
+                                "killed_case": MEMORY, "oom_case": MEMORY, "error_case": ERROR}
+    segv = next(d for d in report["declarations"] if d["declaration"] == "segv_case")
+    assert "SIGSEGV" in segv["messages"][0]["message"]
+
+def test_signals_are_crashes_without_memory_limit():
+    report = LeanVerifier(FAKE_LEAN, workers=2).verify(SOURCE)
+    found = statuses(report)
+    assert found["killed_case"] == CRASHED
+    assert found["segv_case"] == CRASHED
+    assert found["oom_case"] == ERROR
+
+def test_memory_limit_is_applied_to_the_lean_process():
+    report = LeanVerifier(FAKE_LEAN, memory_mb=1024).verify("def rlimit_case(x: int) -> int:\n    return x\n")
+    [message] = report["declarations"][0]["messages"]
+    assert message["severity"] == "info"
+    assert int(message["message"]) == 1024 * 1024 * 1024
+
+def test_messages_map_to_the_python_line_of_their_statement(tmp_path):
+    cache = VerificationCache(str(tmp_path))
+    verifier = LeanVerifier(FAKE_LEAN, workers=2, cache=cache)
+
+    def lines(code):
+        report = verifier.verify(code, scope="m.py")
+        result = next(d for d in report["declarations"] if d["declaration"] == "error_case")
+        return [m["python_line"] for m in result["messages"]], result["cached"]
+
+    assert lines(SOURCE) == ([20, 22, 23], False)
+    # Leanコードの変わらない編集（コメントの追加）はキャッシュを使い、Python の行だけずらす
+    edited = SOURCE.replace("    if y > 0:\n", "    # positive\n    if y > 0:\n")
+    assert lines(edited) == ([21, 23, 24], True)
+
+CHAIN = """def round_amount(x: float) -> float:
+    return x * 0.5
+
+def calculate_tax_amount(x: float) -> float:
+    return round_amount(x) + 1
+
+def other(x: float) -> float:
+    return x + 0.5
+"""
+
+def test_edit_rechecks_only_dependents(tmp_path):
+    cache = VerificationCache(str(tmp_path))
+    verifier = LeanVerifier(FAKE_LEAN, workers=2, cache=cache, pool_threshold=2)
+
+    def cached(code):
+        report = verifier.verify(code, scope="m.py")
+        return {d["declaration"]: d["cached"] for d in report["declarations"]}
+
+    assert cached(CHAIN) == {"round_amount": False, "calculate_tax_amount": False, "other": False}
+    # 0.5 が1回だけになり定数プールから外れても、other のキーは変わらない
+    edited = CHAIN.replace("x * 0.5", "x * 2.0")
+    assert cached(edited) == {"round_amount": False, "calculate_tax_amount": False, "other": True}
+    s = cache.stats()
+    assert (s["hits"], s["invalidations"]) == (1, 2)
+
+def test_verification_cache_is_bounded(tmp_path):
+    cache = VerificationCache(str(tmp_path), max_entries=2, max_disk_bytes=300)
+    entry = {"status": "ok", "messages": [], "seconds": 0.1}
+    for i in range(10):
+        cache.store("m.py", f"f{i}", f"k{i}", "d", entry)
+    s = cache.stats()
+    assert s["entries"] == 2 and s["disk_bytes"] <= 300 and s["evictions"] > 0
+    files = [name for name in os.listdir(tmp_path) if name != "names.json"]
+    assert "k9.json" in files and len(files) < 10
+    # 削除した結果は再検査になり、残っている結果はディスクから読み出せる
+    assert cache.lookup("m.py", "f0", "k0", "d")[0] is None
+    assert cache.lookup("m.py", "f9", "k9", "d")[0] == entry